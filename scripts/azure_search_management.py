@@ -17,7 +17,7 @@ from pathlib import Path
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.core.database import get_supabase_client
+from src.core.database import init_supabase_client, close_supabase_client
 from src.integrations.azure_search import azure_search_client
 from src.services.onboarding.azure_search_service import AzureSearchService
 from src.core.logging import get_logger
@@ -39,7 +39,7 @@ async def reindex_roles():
     """Reindex all roles."""
     try:
         logger.info("Starting role reindexing...")
-        db = get_supabase_client()
+        db = await init_supabase_client()
         service = AzureSearchService(db)
         result = await service.reindex_all_roles()
         
@@ -61,7 +61,7 @@ async def clear_index():
             return 0
         
         logger.info("Clearing Azure Search index...")
-        db = get_supabase_client()
+        db = await init_supabase_client()
         service = AzureSearchService(db)
         result = await service.clear_index()
         
@@ -75,7 +75,7 @@ async def generate_embeddings():
     """Generate missing embeddings."""
     try:
         logger.info("Generating missing embeddings...")
-        db = get_supabase_client()
+        db = await init_supabase_client()
         service = AzureSearchService(db)
         result = await service.generate_missing_embeddings()
         
@@ -107,7 +107,10 @@ async def main():
         print(__doc__)
         return 1
     
-    return await commands[command]()
+    try:
+        return await commands[command]()
+    finally:
+        await close_supabase_client()
 
 if __name__ == "__main__":
     exit_code = asyncio.run(main())
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Dict, Any, Annotated
-from supabase import Client
+from supabase import AsyncClient
 from ...core.dependencies import get_current_user, get_db
 from ...core.rate_limiting import limiter, STRICT_RATE_LIMIT
 from ...services.onboarding.azure_search_service import AzureSearchService
+from ...repositories.onboarding.reference_data import (
+    refresh_reference_data as reload_reference_data,
+)
 from ...core.logging import get_logger
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -11,11 +14,11 @@ logger = get_logger(__name__)
 
 
 @router.post("/reindex-roles")
-@limiter.limit(STRICT_RATE_LIMIT)
+@limiter.limit(STRICT_RATE_LIMIT, exact=True)
 async def reindex_all_roles(
     request: Request,
     current_user: Annotated[Dict[str, Any], Depends(get_current_user)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Reindex all roles in Azure Search (Admin only)."""
     # TODO: Add proper admin role check when user roles are implemented
@@ -34,11 +37,11 @@ async def reindex_all_roles(
 
 
 @router.post("/generate-embeddings")
-@limiter.limit(STRICT_RATE_LIMIT)
+@limiter.limit(STRICT_RATE_LIMIT, exact=True)
 async def generate_missing_embeddings(
     request: Request,
     current_user: Annotated[Dict[str, Any], Depends(get_current_user)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Generate embeddings for roles that don't have them (Admin only)."""
     logger.info(f"User {current_user['id']} initiated embedding generation")
@@ -54,11 +57,11 @@ async def generate_missing_embeddings(
 
 
 @router.delete("/clear-index")
-@limiter.limit(STRICT_RATE_LIMIT)
+@limiter.limit(STRICT_RATE_LIMIT, exact=True)
 async def clear_search_index(
     request: Request,
     current_user: Annotated[Dict[str, Any], Depends(get_current_user)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Clear all documents from Azure Search index (Admin only)."""
     logger.warning(f"User {current_user['id']} initiated index clearing")
@@ -71,3 +74,21 @@ async def clear_search_index(
     except Exception as e:
         logger.error(f"Index clearing failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/refresh-reference-data")
+@limiter.limit(STRICT_RATE_LIMIT, exact=True)
+async def refresh_reference_data(
+    request: Request,
+    current_user: Annotated[Dict[str, Any], Depends(get_current_user)],
+    db: Annotated[AsyncClient, Depends(get_db)],
+):
+    """Reload cached partners, units and industries (Admin only)."""
+    logger.info(f"User {current_user['id']} refreshed reference data")
+
+    try:
+        versions = await reload_reference_data(db)
+        return {"success": True, **versions}
+    except Exception as e:
+        logger.error(f"Reference data refresh failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
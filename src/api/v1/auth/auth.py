@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user_auth0_id, get_current_user, get_db
 from ....core.rate_limiting import limiter, AUTH_RATE_LIMIT
 from ....schemas.auth.auth import AuthStatus, SignupRequest, SignupResponse, LoginRequest, LoginResponse
@@ -41,9 +41,9 @@ async def verify_token(
 
 
 @router.post("/login", response_model=LoginResponse)
-@limiter.limit(AUTH_RATE_LIMIT)
+@limiter.limit(AUTH_RATE_LIMIT, exact=True)
 async def login_user(
-    request: Request, login_data: LoginRequest, db: Client = Depends(get_db)
+    request: Request, login_data: LoginRequest, db: AsyncClient = Depends(get_db)
 ):
     """Authenticate user and return access token"""
     try:
@@ -66,9 +66,9 @@ async def login_user(
 
 
 @router.post("/signup", response_model=SignupResponse)
-@limiter.limit(AUTH_RATE_LIMIT)
+@limiter.limit(AUTH_RATE_LIMIT, exact=True)
 async def signup_user(
-    request: Request, signup_data: SignupRequest, db: Client = Depends(get_db)
+    request: Request, signup_data: SignupRequest, db: AsyncClient = Depends(get_db)
 ):
     """Create a new user account"""
     try:
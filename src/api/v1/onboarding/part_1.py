@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Annotated
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user_auth0_id, get_db
 from ....core.rate_limiting import limiter, API_RATE_LIMIT
 from ....schemas.onboarding.part_1 import (
@@ -31,7 +31,7 @@ async def set_native_language(
     request: Request,
     language_request: NativeLanguageRequest,
     auth0_id: str = Depends(get_current_user_auth0_id),
-    db: Client = Depends(get_db),
+    db: AsyncClient = Depends(get_db),
 ):
     """Set user's native language."""
     logger.info(
@@ -74,7 +74,7 @@ async def set_industry(
     request: Request,
     industry_request: IndustryRequest,
     auth0_id: str = Depends(get_current_user_auth0_id),
-    db: Client = Depends(get_db),
+    db: AsyncClient = Depends(get_db),
 ):
     """Set user's industry."""
     logger.info(f"Setting industry for user {auth0_id} to {industry_request.industry}")
@@ -116,7 +116,7 @@ async def search_roles(
     request: Request,
     search_request: RoleSearchRequest,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Search for matching roles based on job title and description."""
     logger.info(f"Searching roles for user {auth0_id}")
@@ -173,7 +173,7 @@ async def select_role(
     request: Request,
     selection_request: RoleSelectionRequest,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Select a role or submit a custom role."""
     logger.info(f"Role selection for user {auth0_id}")
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Annotated
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user_auth0_id, get_db
 from ....core.rate_limiting import limiter, API_RATE_LIMIT
 from ....schemas.onboarding.part_2 import (
@@ -27,7 +27,7 @@ logger = get_logger(__name__)
 async def get_communication_partners(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Get all available communication partners."""
     logger.info(f"Getting communication partners for user {auth0_id}")
@@ -54,7 +54,7 @@ async def select_communication_partners(
     request: Request,
     selection: SelectCommunicationPartnersRequest,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Select communication partners in priority order."""
     logger.info(f"User {auth0_id} selecting {len(selection.partner_ids)} partners")
@@ -94,7 +94,7 @@ async def get_situations_for_partner(
     request: Request,
     partner_id: str,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Get available situations and user's selections for a specific partner."""
     logger.info(f"Getting situations for partner {partner_id}")
@@ -128,7 +128,7 @@ async def select_situations_for_partner(
     request: Request,
     selection: SelectSituationsRequest,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Select situations for a specific communication partner."""
     logger.info(
@@ -176,7 +176,7 @@ async def select_situations_for_partner(
 async def get_selections_summary(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Get summary of all user's selections."""
     logger.info(f"Getting selections summary for user {auth0_id}")
@@ -207,7 +207,7 @@ async def get_selections_summary(
 async def complete_part_2(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """Complete Part 2 of onboarding and proceed to Part 3."""
     logger.info(f"Completing Part 2 for user {auth0_id}")
@@ -1,7 +1,7 @@
 """API endpoints for Onboarding Part 3 - Summary and Completion."""
 from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import Annotated
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user_auth0_id, get_db
 from ....core.rate_limiting import limiter, API_RATE_LIMIT
 from ....schemas.onboarding.part_3 import (
@@ -25,7 +25,7 @@ logger = get_logger(__name__)
 async def get_onboarding_summary(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """
     Get complete onboarding summary for the authenticated user.
@@ -72,7 +72,7 @@ async def get_onboarding_summary(
 async def complete_onboarding(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """
     Complete the onboarding process.
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from typing import Annotated
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user_auth0_id, get_db
 from ....core.rate_limiting import limiter, API_RATE_LIMIT
 from ....schemas.onboarding.progress import (
@@ -23,7 +23,7 @@ logger = get_logger(__name__)
 async def get_onboarding_status(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """
     Get current onboarding status and next step.
@@ -64,7 +64,7 @@ async def track_onboarding_action(
     request: Request,
     action_request: OnboardingActionRequest,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """
     Track an onboarding action (internal use).
@@ -104,7 +104,7 @@ async def track_onboarding_action(
 async def reset_onboarding_progress(
     request: Request,
     auth0_id: Annotated[str, Depends(get_current_user_auth0_id)],
-    db: Annotated[Client, Depends(get_db)],
+    db: Annotated[AsyncClient, Depends(get_db)],
 ):
     """
     Reset user's onboarding progress (admin or testing).
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from supabase import Client
+from supabase import AsyncClient
 from ....core.dependencies import get_current_user, get_db
 from ....core.exceptions import UserNotFoundError
 from ....core.rate_limiting import limiter, API_RATE_LIMIT
@@ -30,7 +30,7 @@ async def update_current_user_profile(
     request: Request,
     profile_data: UserUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Client = Depends(get_db),
+    db: AsyncClient = Depends(get_db),
 ):
     """Update current user profile"""
     user_service = UserService(db)
@@ -56,7 +56,7 @@ async def update_current_user_profile(
 async def get_user_by_id(
     request: Request,
     user_id: str,
-    db: Client = Depends(get_db),
+    db: AsyncClient = Depends(get_db),
     current_user: Dict[str, Any] = Depends(get_current_user),  # Ensure authenticated
 ):
     """Get user by ID (requires authentication)"""
@@ -0,0 +1,368 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from .codec import cache_codec
+from .config import settings
+from .logging import get_logger
+from .redis_client import get_redis
+
+logger = get_logger(__name__)
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a fixed TTL (seconds).
+
+    With ``stale_ttl``, expired entries are kept that much longer so lookup()
+    can still return them, marked stale, for stale-while-revalidate.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry and mark it most recently used."""
+        value, fresh = self.lookup(key)
+        return value if fresh else default
+
+    def lookup(self, key: Hashable) -> Tuple[Any, bool]:
+        """Get ``(value, fresh)``; value is None when absent or past the stale window."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self.misses += 1
+            if expires_at + self.stale_ttl <= now:
+                del self._data[key]
+                return None, False
+            return value, False
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value, True
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used one when full."""
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value."""
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """Run at most one loader per key at a time.
+
+    Callers that ask for a key while its load is in flight wait for that
+    load and share its result. The load runs as its own task, so a caller
+    that is cancelled does not cancel it for the others. Results and errors
+    are not kept once the load finishes.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    def start(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> "asyncio.Task[Any]":
+        """Start a load for key unless one is running; return its task."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Load key, or wait for the load already in flight."""
+        return await asyncio.shield(self.start(key, loader))
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight load for {key!r} failed: {task.exception()}")
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class RowCache:
+    """Cross-request cache of table rows addressable by several unique columns.
+
+    The in-process tier is an LRU with a short TTL; an optional Redis tier
+    shares rows between workers. Writes go through the repository layer,
+    which stores the returned row here or invalidates it. Only the writing
+    worker's local tier is updated, so the local TTL bounds how long other
+    workers serve the old row.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        key_fields: Sequence[str],
+        maxsize: int,
+        ttl: float,
+        redis_ttl: Optional[int] = None,
+    ):
+        self.table = table
+        self.key_fields = tuple(key_fields)
+        self.redis_ttl = redis_ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def indexes(self, field: str) -> bool:
+        """Whether rows can be looked up by this column."""
+        return field in self.key_fields
+
+    async def get(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached row, checking Redis on a local miss."""
+        row = self._local.get((field, value))
+        if row is None and self.redis_ttl:
+            row = await self._redis_get(field, value)
+            if row is not None:
+                self._set_local(row)
+        return dict(row) if row is not None else None
+
+    async def set(self, row: Dict[str, Any]) -> None:
+        """Store a row under every key column it carries."""
+        self._set_local(row)
+        if self.redis_ttl:
+            await self._redis_set(row)
+
+    async def invalidate(self, field: str, value: Any) -> None:
+        """Drop a row from both tiers under all of its keys."""
+        row = self._local.pop((field, value))
+        if row is None and self.redis_ttl:
+            row = await self._redis_get(field, value)
+        keys = {(field, value)}
+        if row is not None:
+            keys.update((f, row[f]) for f in self.key_fields if row.get(f))
+        for key in keys:
+            self._local.pop(key)
+        if self.redis_ttl:
+            await self._redis_delete(keys)
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._local),
+            "hits": self._local.hits,
+            "misses": self._local.misses,
+        }
+
+    def _set_local(self, row: Dict[str, Any]) -> None:
+        for field in self.key_fields:
+            if row.get(field) is not None:
+                self._local.set((field, row[field]), dict(row))
+
+    def _redis_key(self, field: str, value: Any) -> str:
+        return f"rows:{self.table}:{field}:{value}"
+
+    def _redis(self):
+        return get_redis()
+
+    async def _redis_get(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
+        client = self._redis()
+        if not client:
+            return None
+        try:
+            data = await client.get(self._redis_key(field, value))
+            return cache_codec.decode(data) if data else None
+        except Exception as e:
+            logger.error(f"Redis row cache get error: {e}")
+            return None
+
+    async def _redis_set(self, row: Dict[str, Any]) -> None:
+        client = self._redis()
+        if not client:
+            return
+        try:
+            data = cache_codec.encode(row)
+            pipe = client.pipeline(transaction=False)
+            for field in self.key_fields:
+                if row.get(field) is not None:
+                    pipe.setex(self._redis_key(field, row[field]), self.redis_ttl, data)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Redis row cache set error: {e}")
+
+    async def _redis_delete(self, keys) -> None:
+        client = self._redis()
+        if not client:
+            return
+        try:
+            await client.delete(*[self._redis_key(f, v) for f, v in keys])
+        except Exception as e:
+            logger.error(f"Redis row cache delete error: {e}")
+
+
+class ReferenceSnapshot:
+    """Immutable, versioned copy of a reference table with dict indexes."""
+
+    def __init__(
+        self,
+        version: int,
+        rows: List[Dict[str, Any]],
+        indexes: Dict[str, Dict[Hashable, Dict[str, Any]]],
+    ):
+        self.version = version
+        self.rows = rows
+        self.indexes = indexes
+        self.loaded_at = time.monotonic()
+
+    def get(self, index: str, key: Hashable) -> Optional[Dict[str, Any]]:
+        """Look up a row by an indexed key."""
+        return self.indexes[index].get(key)
+
+
+class ReferenceCache:
+    """Process-wide cache of a small, rarely changing table.
+
+    Rows are loaded whole and indexed once, so lookups are dict hits with no
+    database call. Snapshots expire after ``ttl`` seconds and can be refreshed
+    or invalidated explicitly; concurrent reloads share one load.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        indexes: Mapping[str, Callable[[Dict[str, Any]], Hashable]],
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.index_keys = dict(indexes)
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _is_fresh(self, snapshot: Optional[ReferenceSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def get(
+        self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> ReferenceSnapshot:
+        """Get the current snapshot, loading it when missing or expired."""
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            # Another caller may have reloaded while we waited
+            if self._is_fresh(self._snapshot):
+                return self._snapshot
+            return await self._load(loader)
+
+    async def refresh(
+        self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> ReferenceSnapshot:
+        """Reload the snapshot now, regardless of its age."""
+        async with self._lock:
+            return await self._load(loader)
+
+    def invalidate(self) -> None:
+        """Drop the snapshot so the next read reloads it."""
+        self._snapshot = None
+
+    async def _load(
+        self, loader: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> ReferenceSnapshot:
+        rows = await loader()
+        indexes: Dict[str, Dict[Hashable, Dict[str, Any]]] = {
+            name: {} for name in self.index_keys
+        }
+        for row in rows:
+            for name, key_fn in self.index_keys.items():
+                key = key_fn(row)
+                if key is not None:
+                    indexes[name].setdefault(key, row)
+
+        self._version += 1
+        self._snapshot = ReferenceSnapshot(self._version, rows, indexes)
+        logger.info(f"Loaded {len(rows)} {self.name} rows (version {self._version})")
+        return self._snapshot
+
+
+async def refresh_periodically(
+    name: str,
+    interval: float,
+    refresh: Callable[[], Awaitable[Any]],
+    initial_delay: float = 0.0,
+) -> None:
+    """Run refresh after ``initial_delay``, then every ``interval`` seconds.
+
+    Failures are logged and retried on the next tick, so readers keep using
+    the last good snapshot. Runs until cancelled.
+    """
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Refreshing {name} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+# Users are looked up on every authenticated request, by auth0_id and by id
+user_cache = RowCache(
+    table="users",
+    key_fields=("id", "auth0_id"),
+    maxsize=settings.USER_CACHE_MAXSIZE,
+    ttl=settings.USER_CACHE_TTL,
+    redis_ttl=(
+        settings.USER_CACHE_REDIS_TTL if settings.USER_CACHE_REDIS_ENABLED else None
+    ),
+)
+
+_row_caches: Dict[str, RowCache] = {user_cache.table: user_cache}
+
+
+def get_row_cache(table: str) -> Optional[RowCache]:
+    """Get the cross-request row cache registered for a table, if any."""
+    return _row_caches.get(table)
@@ -0,0 +1,126 @@
+import time
+from typing import Callable
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+# Gauge values; higher means less traffic reaches the dependency
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_breaker_state = metrics.gauge(
+    "circuit_breaker_state",
+    "Circuit state (0 closed, 1 half-open, 2 open)",
+    ("breaker",),
+)
+circuit_breaker_transitions_total = metrics.counter(
+    "circuit_breaker_transitions_total",
+    "Circuit state changes by new state",
+    ("breaker", "state"),
+)
+circuit_breaker_rejected_total = metrics.counter(
+    "circuit_breaker_rejected_total",
+    "Calls skipped because the circuit was open",
+    ("breaker",),
+)
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures, or calls slower than
+    ``slow_call`` seconds, the circuit opens and ``allow()`` returns False
+    for ``cooldown`` seconds. It then half-opens: up to ``probes`` calls
+    are let through, and the circuit closes once that many succeed in a
+    row, or opens again on the first failure.
+
+    Callers check ``allow()`` before a call and report its outcome with
+    ``record_success()`` or ``record_failure()``, or ``release()`` when
+    the outcome says nothing about the dependency (e.g. cancellation).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call: float = 1.0,
+        cooldown: float = 10.0,
+        probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.probes = probes
+        self._clock = clock
+        self._state = CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._in_flight = 0
+        self._opened_at = 0.0
+        circuit_breaker_state.set(STATE_VALUES[CLOSED], breaker=name)
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may be made now."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._in_flight < self.probes:
+            self._in_flight += 1
+            return True
+        circuit_breaker_rejected_total.inc(breaker=self.name)
+        return False
+
+    def record_success(self, duration: float = 0.0) -> None:
+        """Report a completed call; calls slower than ``slow_call`` count as failures."""
+        if duration >= self.slow_call:
+            self.record_failure()
+            return
+
+        if self._state == HALF_OPEN:
+            self._in_flight = max(self._in_flight - 1, 0)
+            self._successes += 1
+            if self._successes >= self.probes:
+                self._transition(CLOSED)
+        elif self._state == CLOSED:
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+        elif self._state == CLOSED:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without recording an outcome."""
+        if self._state == HALF_OPEN:
+            self._in_flight = max(self._in_flight - 1, 0)
+
+    def reset(self) -> None:
+        self._transition(CLOSED)
+
+    def _transition(self, state: str) -> None:
+        previous, self._state = self._state, state
+        self._failures = 0
+        self._successes = 0
+        self._in_flight = 0
+        if state == OPEN:
+            self._opened_at = self._clock()
+        circuit_breaker_state.set(STATE_VALUES[state], breaker=self.name)
+        if state != previous:
+            circuit_breaker_transitions_total.inc(breaker=self.name, state=state)
+            log = logger.warning if state == OPEN else logger.info
+            log(f"Circuit '{self.name}' {previous} -> {state}")
@@ -0,0 +1,171 @@
+"""Serialization of cached values, with optional compression.
+
+Encoded payloads start with a three byte header: a marker, the serializer
+id and the compression id. Decoding reads the header rather than the
+configured codec, so workers running different codecs during a rolling
+deploy can read each other's entries. Values written before the header was
+introduced (plain JSON) are still decoded.
+"""
+
+import json
+from typing import Any, Callable, Dict, Tuple
+from .config import settings
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - optional dependency
+    lz4_frame = None
+
+MARKER = 0xFE  # Never the first byte of UTF-8 JSON
+
+SERIALIZER_IDS = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSION_IDS = {"none": 0, "zstd": 1, "lz4": 2}
+
+
+class CodecError(ValueError):
+    """Payload cannot be encoded or decoded with the available libraries."""
+
+
+def _default(value: Any) -> Any:
+    # Datetimes and dates from Supabase rows are stored as ISO strings
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), default=_default).encode()
+
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    return msgpack.packb(value, default=_default, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def _serializers() -> Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {1: (_json_dumps, _json_loads)}
+    if orjson:
+        serializers[2] = (_orjson_dumps, _json_loads)
+    if msgpack:
+        serializers[3] = (_msgpack_dumps, _msgpack_loads)
+    return serializers
+
+
+def _compressors() -> (
+    Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]
+):
+    compressors = {0: (bytes, bytes)}
+    if zstandard:
+        compressors[1] = (
+            zstandard.ZstdCompressor(level=3).compress,
+            zstandard.ZstdDecompressor().decompress,
+        )
+    if lz4_frame:
+        compressors[2] = (lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+class Codec:
+    """Encodes values with one serializer and, above a size, one compressor."""
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "none",
+        compress_threshold: int = 1024,
+    ):
+        self._serializers = _serializers()
+        self._compressors = _compressors()
+
+        try:
+            self.serializer_id = SERIALIZER_IDS[serializer]
+            self.compression_id = COMPRESSION_IDS[compression]
+        except KeyError as e:
+            raise CodecError(f"Unknown codec setting: {e}")
+        if self.serializer_id not in self._serializers:
+            raise CodecError(f"Serializer '{serializer}' is not installed")
+        if self.compression_id not in self._compressors:
+            raise CodecError(f"Compression '{compression}' is not installed")
+
+        self.name = (
+            serializer if compression == "none" else f"{serializer}+{compression}"
+        )
+        self.compress_threshold = compress_threshold
+        self._dumps = self._serializers[self.serializer_id][0]
+        self._compress = self._compressors[self.compression_id][0]
+
+    def encode(self, value: Any) -> bytes:
+        body = self._dumps(value)
+        compression_id = 0
+        if self.compression_id and len(body) >= self.compress_threshold:
+            body = self._compress(body)
+            compression_id = self.compression_id
+        return bytes((MARKER, self.serializer_id, compression_id)) + body
+
+    def decode(self, data: Any) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MARKER:
+            # Unversioned JSON from before payloads carried a header
+            return json.loads(data)
+
+        serializer_id, compression_id = data[1], data[2]
+        try:
+            loads = self._serializers[serializer_id][1]
+            decompress = self._compressors[compression_id][1]
+        except KeyError:
+            raise CodecError(
+                f"Cannot decode payload (serializer {serializer_id}, "
+                f"compression {compression_id}); codec library missing"
+            )
+        return loads(decompress(data[3:]))
+
+
+def build_codec() -> Codec:
+    """Codec configured by CACHE_CODEC / CACHE_COMPRESSION.
+
+    Falls back to stdlib JSON without compression when a configured library
+    is not installed.
+    """
+    try:
+        return Codec(
+            settings.CACHE_CODEC,
+            settings.CACHE_COMPRESSION,
+            settings.CACHE_COMPRESS_THRESHOLD,
+        )
+    except CodecError as e:
+        logger.warning(f"{e}; caching with plain JSON")
+        return Codec("json")
+
+
+# Codec used by the Redis caches
+cache_codec = build_codec()
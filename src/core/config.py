@@ -16,14 +16,86 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
     SUPABASE_SERVICE_KEY: str
+    # Optional PostgREST read replica; empty sends reads to SUPABASE_URL
+    SUPABASE_READ_URL: str = ""
+
+    # Supabase HTTP connection pool
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 100
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 20
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    SUPABASE_TIMEOUT: float = 10.0  # seconds
+
+    # Bulk repository writes
+    BULK_CHUNK_ROWS: int = 500
+    BULK_CHUNK_BYTES: int = 1_000_000  # encoded JSON payload per request
+    BULK_MAX_CONCURRENCY: int = 4
+
+    # Cached planned/estimated table totals used by paginate()
+    COUNT_CACHE_TTL: float = 30.0  # seconds
+
+    # Requests slower than this are logged with their query breakdown
+    SLOW_REQUEST_MS: float = 1000.0
+    # Bearer token scrapers must send to /metrics; empty disables the endpoint
+    METRICS_TOKEN: str = ""
+
+    # Process-wide snapshots of partners, units and industries
+    REFERENCE_DATA_TTL: float = 300.0  # seconds
+    REFERENCE_DATA_REFRESH_INTERVAL: float = 240.0  # seconds, below the TTL
+
+    # Open connections and load caches before /ready reports the instance
+    WARMUP_ENABLED: bool = False
+    WARMUP_TIMEOUT: float = 10.0  # seconds per dependency
+    WARMUP_REDIS_CONNECTIONS: int = 4  # pooled connections opened up front
 
     # Application Configuration
     DEBUG: bool = True
     CORS_ALLOWED_ORIGINS: str = "*"
     ALLOWED_HOSTS: str = "localhost"
 
+    # Per-process rate limit counters, used while Redis is unavailable
+    RATE_LIMIT_LOCAL_MAXSIZE: int = 10000
+    # Count routes not marked exact locally and sync them to Redis in batches
+    RATE_LIMIT_APPROXIMATE: bool = False
+    RATE_LIMIT_SYNC_INTERVAL: float = 0.25  # seconds
+
     # Redis Configuration (optional - for rate limiting)
     REDIS_URL: str = ""
+    REDIS_POOL_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT: float = 1.0  # seconds to wait for a free connection
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # seconds, connect and per command
+    REDIS_BREAKER_FAILURES: int = 5  # consecutive errors or slow calls to open
+    REDIS_BREAKER_SLOW_CALL: float = 0.5  # seconds; slower calls count as errors
+    REDIS_BREAKER_COOLDOWN: float = 10.0  # seconds open before probing again
+    REDIS_BREAKER_PROBES: int = 3  # successful probes needed to close
+
+    # Serialization of cached values: json, orjson or msgpack, optionally
+    # compressed with zstd or lz4 above the threshold (bytes)
+    CACHE_CODEC: str = "orjson"
+    CACHE_COMPRESSION: str = "none"
+    CACHE_COMPRESS_THRESHOLD: int = 1024
+
+    # Write-behind onboarding progress: Redis + stream, flushed in batches
+    PROGRESS_WRITE_BEHIND: bool = False
+    PROGRESS_STREAM_KEY: str = "onboarding:progress:stream"
+    PROGRESS_STREAM_ALERT_LENGTH: int = 100_000  # pending entries before warning
+    PROGRESS_FLUSH_INTERVAL: float = 2.0  # seconds, bounds the flush lag
+    PROGRESS_FLUSH_BATCH: int = 500  # stream entries per upsert
+    PROGRESS_FLUSH_CLAIM_IDLE: float = 60.0  # seconds before taking over entries
+
+    # In-process tier in front of the Redis progress cache
+    PROGRESS_LOCAL_CACHE_MAXSIZE: int = 10000
+    PROGRESS_LOCAL_CACHE_TTL: float = 5.0  # seconds, bounds cross-worker staleness
+    # Serve expired entries this much longer while one refresh runs (0 = off)
+    PROGRESS_LOCAL_CACHE_STALE_TTL: float = 0.0  # seconds
+
+    # Users row cache (keyed by id and auth0_id)
+    USER_CACHE_MAXSIZE: int = 10000
+    # In-process tier; other workers' writes only evict Redis, so this bounds
+    # how long a worker can serve a users row changed elsewhere
+    USER_CACHE_TTL: float = 5.0  # seconds
+    USER_CACHE_REDIS_ENABLED: bool = False
+    USER_CACHE_REDIS_TTL: int = 600  # seconds, shared Redis tier
 
     # OpenAI Configuration
     OPENAI_API_KEY: str
@@ -1,13 +1,103 @@
-from supabase import create_client, Client
+import asyncio
+import httpx
+from typing import Optional
+from supabase import AsyncClient, AsyncClientOptions, acreate_client
 from .config import settings
+from .logging import get_logger
 
+logger = get_logger(__name__)
 
-def get_supabase_client() -> Client:
-    """Get Supabase client instance with service role key for backend operations"""
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY)
+# Process-wide client, created once by the app lifespan and shared by every request
+_supabase_client: Optional[AsyncClient] = None
+# Optional client for a read replica (SUPABASE_READ_URL), sharing the HTTP pool
+_read_client: Optional[AsyncClient] = None
+_http_client: Optional[httpx.AsyncClient] = None
+_init_lock = asyncio.Lock()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """Build the pooled HTTP client used for all PostgREST traffic."""
+    return httpx.AsyncClient(
+        http2=settings.SUPABASE_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.SUPABASE_TIMEOUT),
+    )
+
+
+async def init_supabase_client() -> AsyncClient:
+    """Create the shared async Supabase client (idempotent).
+
+    When SUPABASE_READ_URL is set, a second client pointing at the read
+    replica is created on the same connection pool; see get_read_client.
+    """
+    global _supabase_client, _read_client, _http_client
+
+    async with _init_lock:
+        if _supabase_client is not None:
+            return _supabase_client
+
+        _http_client = _build_http_client()
+        options = AsyncClientOptions(
+            httpx_client=_http_client,
+            postgrest_client_timeout=settings.SUPABASE_TIMEOUT,
+        )
+        _supabase_client = await acreate_client(
+            settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY, options=options
+        )
+        if settings.SUPABASE_READ_URL:
+            _read_client = await acreate_client(
+                settings.SUPABASE_READ_URL,
+                settings.SUPABASE_SERVICE_KEY,
+                options=options,
+            )
+            logger.info(f"Routing repository reads to {settings.SUPABASE_READ_URL}")
+        logger.info(
+            f"Supabase client initialized (http2={settings.SUPABASE_HTTP2}, "
+            f"max_connections={settings.SUPABASE_POOL_MAX_CONNECTIONS})"
+        )
+        return _supabase_client
+
+
+async def close_supabase_client() -> None:
+    """Close the shared client and release pooled connections."""
+    global _supabase_client, _read_client, _http_client
+
+    async with _init_lock:
+        if _http_client is not None:
+            await _http_client.aclose()
+        _supabase_client = None
+        _read_client = None
+        _http_client = None
+
+
+def get_supabase_client() -> AsyncClient:
+    """Get the shared Supabase client with service role key for backend operations"""
+    if _supabase_client is None:
+        raise RuntimeError(
+            "Supabase client not initialized; call init_supabase_client() first"
+        )
+    return _supabase_client
+
+
+def get_read_client(db: AsyncClient) -> AsyncClient:
+    """Get the client that serves reads for ``db``.
+
+    Returns the read replica client when ``db`` is the shared primary and a
+    replica is configured, otherwise ``db`` itself.
+    """
+    if _read_client is not None and db is _supabase_client:
+        return _read_client
+    return db
 
 
 # Dependency for FastAPI
-async def get_db() -> Client:
+async def get_db() -> AsyncClient:
     """FastAPI dependency to get database client"""
-    return get_supabase_client()
+    if _supabase_client is None:
+        # Lifespan did not run (e.g. scripts or bare test clients)
+        return await init_supabase_client()
+    return _supabase_client
@@ -1,16 +1,22 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer
-from supabase import Client
+import secrets
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from supabase import AsyncClient
 from .auth import auth0_validator
+from .config import settings
 from .database import get_db
 from ..services.auth.auth_service import AuthService
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
+# Internal endpoints check their own static token
+internal_security = HTTPBearer(auto_error=False)
 
 
-async def get_current_user_auth0_id(token: str = Depends(security)) -> str:
+async def get_current_user_auth0_id(
+    token: str = Depends(security), request: Request = None
+) -> str:
     """Extract Auth0 user ID from JWT token"""
     try:
         payload = auth0_validator.verify_jwt_token(token.credentials)
@@ -20,14 +26,34 @@ async def get_current_user_auth0_id(token: str = Depends(security)) -> str:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token: no user ID found",
             )
+        if request is not None:
+            # Rate limits are keyed by the verified user
+            request.state.auth0_id = user_id
         return user_id
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
 
 
 async def get_current_user(
-    auth0_id: str = Depends(get_current_user_auth0_id), db: Client = Depends(get_db)
+    auth0_id: str = Depends(get_current_user_auth0_id),
+    db: AsyncClient = Depends(get_db),
 ) -> Dict[str, Any]:
     """Get current user from Supabase or create if doesn't exist"""
     auth_service = AuthService(db)
     return await auth_service.get_or_create_user(auth0_id)
+
+
+async def require_metrics_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(internal_security),
+) -> None:
+    """Admit only scrapers presenting METRICS_TOKEN; 404 when it is unset."""
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials, settings.METRICS_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
@@ -0,0 +1,247 @@
+"""Per-request database query instrumentation."""
+
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from postgrest.base_request_builder import RequestConfig
+from .config import settings
+from .logging import get_logger
+from .metrics import metrics
+
+logger = get_logger(__name__)
+
+QUERY_LABELS = ("table", "operation")
+
+db_queries_total = metrics.counter(
+    "db_queries_total", "Supabase queries executed", QUERY_LABELS
+)
+db_query_errors_total = metrics.counter(
+    "db_query_errors_total", "Supabase queries that raised", QUERY_LABELS
+)
+db_query_duration_seconds = metrics.histogram(
+    "db_query_duration_seconds", "Supabase query latency", QUERY_LABELS
+)
+db_query_rows_total = metrics.counter(
+    "db_query_rows_total", "Rows returned by Supabase queries", QUERY_LABELS
+)
+db_query_bytes_total = metrics.counter(
+    "db_query_bytes_total", "Approximate JSON bytes returned", QUERY_LABELS
+)
+http_request_duration_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_request_db_queries = metrics.histogram(
+    "http_request_db_queries",
+    "Supabase queries issued per HTTP request",
+    ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34),
+)
+
+
+@dataclass
+class QueryRecord:
+    """One executed query."""
+
+    table: str
+    operation: str
+    duration_ms: float
+    rows: int
+    bytes: int
+    fingerprint: str
+    error: Optional[str] = None
+
+
+class QueryLog:
+    """Queries executed during one request (or other unit of work)."""
+
+    def __init__(self):
+        self.records: List[QueryRecord] = []
+
+    def add(self, record: QueryRecord) -> None:
+        self.records.append(record)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(r.duration_ms for r in self.records)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(r.bytes for r in self.records)
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        """Compact description for logs, slowest queries first."""
+        slowest = sorted(self.records, key=lambda r: r.duration_ms, reverse=True)
+        return {
+            "query_count": self.count,
+            "query_ms": round(self.total_ms, 1),
+            "query_bytes": self.total_bytes,
+            "queries": [
+                {
+                    "table": r.table,
+                    "operation": r.operation,
+                    "ms": round(r.duration_ms, 1),
+                    "rows": r.rows,
+                    "bytes": r.bytes,
+                }
+                for r in slowest[:limit]
+            ],
+        }
+
+
+_query_log: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+_listeners: List[Callable[[QueryRecord], None]] = []
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """Get the query log of the current request, if any."""
+    return _query_log.get()
+
+
+@contextmanager
+def query_scope() -> Iterator[QueryLog]:
+    """Collect the queries executed within a unit of work."""
+    log = QueryLog()
+    token = _query_log.set(log)
+    try:
+        yield log
+    finally:
+        _query_log.reset(token)
+
+
+def add_query_listener(listener: Callable[[QueryRecord], None]) -> None:
+    """Call listener with every recorded query, in any request."""
+    _listeners.append(listener)
+
+
+def remove_query_listener(listener: Callable[[QueryRecord], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def record_query(record: QueryRecord) -> None:
+    """Attach a query to the current request and export it as metrics."""
+    labels = {"table": record.table, "operation": record.operation}
+    db_queries_total.inc(**labels)
+    db_query_duration_seconds.observe(record.duration_ms / 1000, **labels)
+    db_query_rows_total.inc(record.rows, **labels)
+    db_query_bytes_total.inc(record.bytes, **labels)
+    if record.error:
+        db_query_errors_total.inc(**labels)
+
+    log = get_query_log()
+    if log is not None:
+        log.add(record)
+    for listener in list(_listeners):
+        listener(record)
+
+
+async def execute_query(query, table: str, operation: str):
+    """Execute a PostgREST query builder and record it."""
+    started = time.perf_counter()
+    try:
+        result = await query.execute()
+    except Exception as e:
+        record_query(
+            QueryRecord(
+                table=table,
+                operation=operation,
+                duration_ms=(time.perf_counter() - started) * 1000,
+                rows=0,
+                bytes=0,
+                fingerprint=_fingerprint(query, table, operation),
+                error=type(e).__name__,
+            )
+        )
+        raise
+
+    data = getattr(result, "data", None)
+    record_query(
+        QueryRecord(
+            table=table,
+            operation=operation,
+            duration_ms=(time.perf_counter() - started) * 1000,
+            rows=len(data) if isinstance(data, list) else int(bool(data)),
+            bytes=_payload_size(data),
+            fingerprint=_fingerprint(query, table, operation),
+        )
+    )
+    return result
+
+
+# Parameters that describe the shape of a query rather than carry values
+_STRUCTURAL_PARAMS = {"select", "order", "on_conflict", "columns"}
+
+
+def _fingerprint(query, table: str, operation: str) -> str:
+    """Identify a query by method, path, parameter names and operators.
+
+    Filter values are left out, so the same lookup repeated for different
+    ids (the usual N+1) gets the same fingerprint.
+    """
+    request = getattr(query, "request", None)
+    if isinstance(request, RequestConfig):
+        params = "&".join(
+            sorted(_param_shape(k, v) for k, v in request.params.multi_items())
+        )
+        return f"{request.http_method} {request.path}?{params}"
+    return f"{operation} {table}"
+
+
+def _param_shape(key: str, value: str) -> str:
+    if key in _STRUCTURAL_PARAMS:
+        return f"{key}={value}"
+    if key in ("or", "and", "limit", "offset"):
+        return key
+    # Filters are "<operator>.<value>", possibly negated ("not.eq.x")
+    parts = value.split(".", 2)
+    operator = ".".join(parts[:2]) if parts[0] == "not" else parts[0]
+    return f"{key}={operator}"
+
+
+def _payload_size(data: Any) -> int:
+    if not data:
+        return 0
+    try:
+        return len(json.dumps(data, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class QueryMetricsMiddleware:
+    """ASGI middleware that collects each request's queries.
+
+    Exports per-route latency and query counts, and logs the query breakdown
+    of requests slower than SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        with query_scope() as log:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                duration_ms = (time.perf_counter() - started) * 1000
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                labels = {"method": scope["method"], "route": route}
+                http_request_duration_seconds.observe(duration_ms / 1000, **labels)
+                http_request_db_queries.observe(log.count, **labels)
+
+                if duration_ms >= settings.SLOW_REQUEST_MS:
+                    logger.warning(
+                        f"Slow request {scope['method']} {scope['path']} "
+                        f"took {duration_ms:.0f}ms: {json.dumps(log.summary())}"
+                    )
@@ -0,0 +1,178 @@
+"""Minimal in-process metrics exported in the Prometheus text format."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, per label set."""
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterable[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._format_labels(key)} {value}"
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values, per label set."""
+
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (bucket counts, sum, count)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            index = bisect_left(self.buckets, value)
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = self._format_labels(key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = self._format_labels(key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{self._format_labels(key)} {total}"
+            yield f"{self.name}_count{self._format_labels(key)} {count}"
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics, created on first use."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, description, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(
+                    f"Metric {name} already registered as {metric.type_name}"
+                )
+            return metric
+
+    def counter(
+        self, name: str, description: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self._get_or_create(Counter, name, description, labelnames)
+
+    def gauge(
+        self, name: str, description: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, description, labelnames, buckets=buckets or DEFAULT_BUCKETS
+        )
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Shared registry exported at /metrics
+metrics = MetricsRegistry()
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import socket
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence
+from .cache import SingleFlight, TTLCache
+from .config import settings
+from .logging import get_logger
+from .metrics import metrics
+from .redis_client import OnboardingRedisClient, get_redis, onboarding_redis
+
+logger = get_logger(__name__)
+
+cache_requests_total = metrics.counter(
+    "cache_requests_total",
+    "Cache lookups by tier and result",
+    ("cache", "tier", "result"),
+)
+cache_invalidations_total = metrics.counter(
+    "cache_invalidations_total",
+    "Local cache entries evicted by other workers",
+    ("cache",),
+)
+
+
+def _copy(progress: Dict[str, Any]) -> Dict[str, Any]:
+    # Callers may edit the returned row; keep the cached one intact
+    return {**progress, "data": dict(progress.get("data") or {})}
+
+
+class ProgressCache:
+    """Two-tier onboarding progress cache.
+
+    An in-process LRU with a short TTL sits in front of the Redis hashes of
+    OnboardingRedisClient, so repeated status polls are served from memory.
+    Every write publishes the user id on a Redis pub/sub channel and the
+    other workers evict their local copy; the local TTL bounds staleness
+    if a message is lost.
+    """
+
+    name = "onboarding_progress"
+    poll_timeout = 1.0  # seconds a quiet channel is waited on per poll
+
+    def __init__(self, remote: OnboardingRedisClient, channel: str):
+        self.remote = remote
+        self.channel = channel
+        self.origin = f"{socket.gethostname()}-{os.getpid()}"
+        self._local = TTLCache(
+            maxsize=settings.PROGRESS_LOCAL_CACHE_MAXSIZE,
+            ttl=settings.PROGRESS_LOCAL_CACHE_TTL,
+            stale_ttl=settings.PROGRESS_LOCAL_CACHE_STALE_TTL,
+        )
+        self._flight = SingleFlight()
+
+    def _count(self, tier: str, hit: bool) -> None:
+        cache_requests_total.inc(
+            cache=self.name, tier=tier, result="hit" if hit else "miss"
+        )
+
+    async def get_progress(
+        self, user_id: str, local: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Get progress from memory, then Redis.
+
+        Pass ``local=False`` to read Redis directly, e.g. before a write.
+        """
+        if local:
+            progress = self._local.get(user_id)
+            self._count("local", progress is not None)
+            if progress is not None:
+                return _copy(progress)
+
+        progress = await self.remote.get_progress(user_id)
+        if self.remote.redis_client:
+            self._count("redis", progress is not None)
+        if progress is not None:
+            self._local.set(user_id, _copy(progress))
+        return progress
+
+    async def get_or_load(
+        self,
+        user_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Get progress, running ``loader`` (the database) when neither tier has it.
+
+        Concurrent misses for a user share one load. Within the stale window
+        (PROGRESS_LOCAL_CACHE_STALE_TTL) an expired local entry is returned
+        at once while a single background load refreshes it.
+        """
+        progress, fresh = self._local.lookup(user_id)
+        if progress is not None:
+            self._count("local", fresh)
+            if not fresh:
+                self._flight.start(user_id, lambda: self._load(user_id, loader))
+            return _copy(progress)
+        self._count("local", False)
+
+        progress = await self._flight.do(user_id, lambda: self._load(user_id, loader))
+        return _copy(progress) if progress is not None else None
+
+    async def _load(
+        self,
+        user_id: str,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        progress = await self.get_progress(user_id, local=False)
+        if progress is None:
+            progress = await loader()
+            if progress is not None:
+                await self.set_progress(user_id, progress)
+        return progress
+
+    async def set_progress(self, user_id: str, progress: Dict[str, Any]) -> bool:
+        """Replace the cached progress in both tiers."""
+        stored = await self.remote.set_progress(user_id, progress)
+        await self.changed(user_id, progress)
+        return stored
+
+    async def update_progress(
+        self,
+        user_id: str,
+        changes: Dict[str, Any],
+        action: Optional[str] = None,
+        action_data: Any = None,
+        progress: Optional[Dict[str, Any]] = None,
+        step_order: Optional[Sequence[str]] = None,
+    ) -> bool:
+        """Write only the changed fields to Redis.
+
+        See OnboardingRedisClient.update_progress. ``progress`` is the full
+        row after the update, kept in memory when given.
+        """
+        updated = await self.remote.update_progress(
+            user_id,
+            changes,
+            action=action,
+            action_data=action_data,
+            step_order=step_order,
+        )
+        await self.changed(user_id, progress if updated else None)
+        return updated
+
+    async def delete_progress(self, user_id: str) -> bool:
+        deleted = await self.remote.delete_progress(user_id)
+        await self.changed(user_id)
+        return deleted
+
+    async def changed(
+        self, user_id: str, progress: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Record that a user's progress was written.
+
+        Keeps ``progress`` (or drops the entry) locally, and tells the other
+        workers to drop theirs.
+        """
+        if progress is not None:
+            self._local.set(user_id, _copy(progress))
+        else:
+            self._local.pop(user_id)
+
+        client = get_redis()
+        if not client:
+            return
+        try:
+            await client.publish(
+                self.channel, json.dumps({"user_id": user_id, "origin": self.origin})
+            )
+        except Exception as e:
+            logger.error(f"Progress invalidation publish error: {e}")
+
+    def _on_message(self, data: bytes) -> None:
+        message = json.loads(data)
+        if message.get("origin") == self.origin:
+            return
+        if self._local.pop(message["user_id"]) is not None:
+            cache_invalidations_total.inc(cache=self.name)
+
+    async def listen(self) -> None:
+        """Apply invalidations published by other workers until cancelled."""
+        while True:
+            client = get_redis(ignore_breaker=True)
+            if not client:
+                return
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                # Entries cached before (re)subscribing may have missed messages
+                self._local.clear()
+                while True:
+                    # Poll with an explicit timeout: a blocking listen() is
+                    # bounded by socket_timeout on some redis-py versions and
+                    # would raise on every quiet second
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=self.poll_timeout
+                    )
+                    if message and message.get("type") == "message":
+                        self._on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress invalidation listener error: {e}")
+                self._local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def clear(self) -> None:
+        self._local.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._local),
+            "hits": self._local.hits,
+            "misses": self._local.misses,
+        }
+
+
+# Global instance
+progress_cache = ProgressCache(
+    onboarding_redis, channel=f"{onboarding_redis.key_prefix}invalidate"
+)
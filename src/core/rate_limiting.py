@@ -1,51 +1,326 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import asyncio
+import functools
+import math
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Tuple
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
-import redis
-from typing import Optional
-import os
+from .cache import TTLCache
+from .config import settings
+from .logging import get_logger
+from .metrics import metrics
+from .redis_client import get_redis
 
+logger = get_logger(__name__)
 
-# Redis connection for rate limiting
-def get_redis_client() -> Optional[redis.Redis]:
-    """Get Redis client for rate limiting"""
+rate_limit_rejected_total = metrics.counter(
+    "rate_limit_rejected_total", "Requests rejected by a rate limit", ("mode",)
+)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# GCRA (generic cell rate algorithm). Each client has one key holding the
+# theoretical arrival time (TAT) of its next request, in milliseconds on
+# the Redis clock, so every worker sees the same time. A request is allowed
+# while TAT - period <= now, which admits ``limit`` requests per period and
+# then one every ``interval``. One round trip per check.
+# ARGV: interval ms (period / limit), period ms. Returns {allowed, wait ms}.
+GCRA = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local allow_at = tat + interval - period
+if allow_at > now then
+    return {0, math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], tat + interval, 'PX', math.ceil(tat + interval - now))
+return {1, 0}
+"""
+
+
+class RateLimitExceeded(Exception):
+    """A client went over the limit of an endpoint."""
+
+    def __init__(self, limit: str, retry_after: int):
+        self.detail = limit
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit {limit} exceeded")
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse ``"100/minute"`` into (requests, period in seconds)."""
+    count, _, unit = rate.partition("/")
     try:
-        # For Render, check if Redis URL is provided
-        redis_url = os.getenv("REDIS_URL")
-        if redis_url:
-            return redis.from_url(redis_url, decode_responses=True)
+        return int(count), PERIODS[unit.strip().rstrip("s")]
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit: {rate!r}")
+
+
+class _Window:
+    """One client's counts for the current fixed window of a limit."""
+
+    __slots__ = ("window", "period", "previous", "synced", "sending", "unsent")
+
+    def __init__(self, window: int, period: int, previous: int = 0):
+        self.window = window
+        self.period = period
+        self.previous = previous  # global count of the window before
+        self.synced = 0  # global count of this window at the last sync
+        self.sending = 0  # local hits in the sync in flight
+        self.unsent = 0  # local hits not yet sent
+
+    @property
+    def current(self) -> int:
+        return self.synced + self.sending + self.unsent
+
+
+class BatchedCounter:
+    """Approximate sliding-window counts, kept locally and synced in batches.
+
+    Each hit is counted in memory and checked against the last known
+    global count, without a network call. ``sync()`` adds every worker's
+    new hits to per-window Redis counters with INCRBY and reads back the
+    global totals, all in one pipeline. The estimate weights the previous
+    window by how much of it still overlaps the sliding window. Between
+    syncs, workers can together admit a few requests over the limit.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._windows: Dict[str, _Window] = {}
+        # Hits of windows that ended before they were sent, by (key, period)
+        self._late: Dict[Tuple[str, int], int] = defaultdict(int)
+
+    def _redis_key(self, key: str, window: int) -> str:
+        return f"{self.prefix}:{key}:{window}"
+
+    def hit(self, key: str, limit: int, period: int) -> float:
+        """Count one request; returns 0 if allowed, else seconds to wait."""
+        now = time.time()  # Wall clock, so windows line up across workers
+        window = int(now // period)
+        entry = self._windows.get(key)
+        if entry is None or entry.window != window:
+            entry = self._roll(key, entry, window, period)
+
+        overlap = 1 - (now / period - window)
+        current = entry.current
+        if entry.previous * overlap + current < limit:
+            entry.unsent += 1
+            return 0.0
+
+        if current >= limit:
+            return (window + 1) * period - now
+        # Wait until enough of the previous window has slid out
+        return (window + 1 - (limit - current) / entry.previous) * period - now
+
+    def _roll(
+        self, key: str, entry: Optional[_Window], window: int, period: int
+    ) -> _Window:
+        previous = 0
+        if entry is not None:
+            if entry.unsent:
+                self._late[
+                    (self._redis_key(key, entry.window), entry.period)
+                ] += entry.unsent
+            if entry.window == window - 1:
+                previous = entry.current
+        if len(self._windows) >= settings.RATE_LIMIT_LOCAL_MAXSIZE:
+            self._prune(time.time())
+        entry = self._windows[key] = _Window(window, period, previous)
+        return entry
+
+    def _prune(self, now: float) -> None:
+        """Drop clients whose windows no longer count towards any limit."""
+        for key, entry in list(self._windows.items()):
+            if int(now // entry.period) > entry.window + 1 and not entry.unsent:
+                del self._windows[key]
+
+    async def sync(self, client) -> int:
+        """Send local hits and fetch global counts; returns keys synced."""
+        late, self._late = self._late, defaultdict(int)
+        batch = []
+        for key, entry in self._windows.items():
+            if entry.unsent:
+                entry.sending, entry.unsent = entry.unsent, 0
+                batch.append((key, entry))
+        if not batch and not late:
+            return 0
+
+        pipe = client.pipeline(transaction=False)
+        for key, entry in batch:
+            redis_key = self._redis_key(key, entry.window)
+            pipe.incrby(redis_key, entry.sending)
+            pipe.expire(redis_key, entry.period * 2)
+            pipe.get(self._redis_key(key, entry.window - 1))
+        for (redis_key, period), count in late.items():
+            pipe.incrby(redis_key, count)
+            pipe.expire(redis_key, period * 2)
 
-        # For local development, try local Redis
         try:
-            client = redis.Redis(
-                host="localhost", port=6379, db=0, decode_responses=True
-            )
-            client.ping()  # Test connection
-            return client
-        except (redis.ConnectionError, redis.TimeoutError):
-            print(
-                "Warning: Redis not available, falling back to in-memory rate limiting"
-            )
-            return None
-    except Exception as e:
-        print(f"Redis connection error: {e}")
-        return None
-
-
-# Initialize rate limiter
-redis_client = get_redis_client()
-
-if redis_client:
-    # Use Redis-based rate limiting
-    limiter = Limiter(
-        key_func=get_remote_address,
-        storage_uri=f"redis://{redis_client.connection_pool.connection_kwargs.get('host', 'localhost')}:{redis_client.connection_pool.connection_kwargs.get('port', 6379)}",
-    )
-else:
-    # Fallback to in-memory rate limiting
-    limiter = Limiter(key_func=get_remote_address)
+            results = await pipe.execute()
+        except Exception:
+            # Keep counting locally; unsent hits go out with the next sync
+            for _key, entry in batch:
+                entry.unsent += entry.sending
+                entry.sending = 0
+            for late_key, count in late.items():
+                self._late[late_key] += count
+            raise
+
+        for i, (key, entry) in enumerate(batch):
+            total, _, previous = results[i * 3 : i * 3 + 3]
+            entry.synced = int(total)
+            entry.sending = 0
+            entry.previous = max(entry.previous, int(previous or 0))
+            rolled = self._windows.get(key)
+            if rolled is not None and rolled.window == entry.window + 1:
+                # The window ended during the sync; its total is now previous
+                rolled.previous = max(rolled.previous, int(total))
+
+        self._prune(time.time())
+        return len(batch)
+
+    def clear(self) -> None:
+        self._windows.clear()
+        self._late.clear()
+
+
+def rate_limit_key(request: Request) -> str:
+    """Authenticated user (Auth0 ``sub``), or the client IP when anonymous.
+
+    The ``sub`` is set on ``request.state`` by get_current_user_auth0_id
+    once the token is verified, so clients sharing a NAT are limited
+    separately and an unverified token cannot pick its own key.
+    """
+    sub = getattr(request.state, "auth0_id", None)
+    if sub:
+        return f"user:{sub}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimiter:
+    """Per-endpoint limits shared by all workers through Redis.
+
+    Exact checks run the GCRA script on the shared Redis pool, one round
+    trip per request. When Redis is unavailable the same algorithm runs in
+    process, so limits still hold per worker.
+
+    With RATE_LIMIT_APPROXIMATE, routes not marked ``exact`` are counted by
+    a BatchedCounter instead: no network call per request, with counts
+    synced every RATE_LIMIT_SYNC_INTERVAL seconds by ``run_sync()``.
+    """
+
+    def __init__(self, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self.enabled = True
+        self._script = None
+        self._script_client = None
+        # TATs for the in-process fallback; a day outlives any period in use
+        self._local = TTLCache(maxsize=settings.RATE_LIMIT_LOCAL_MAXSIZE, ttl=86400)
+        self._batched = BatchedCounter(f"{prefix}:approx")
+
+    def _gcra(self, client):
+        # Scripts are bound to the client they were registered on
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(GCRA)
+            self._script_client = client
+        return self._script
+
+    async def hit(self, key: str, rate: str) -> float:
+        """Count one request against ``rate``.
+
+        Returns 0 when allowed, otherwise the seconds until the next
+        request would be.
+        """
+        limit, period = parse_rate(rate)
+        interval = period / limit
+
+        client = get_redis()
+        if client is not None:
+            try:
+                allowed, wait_ms = await self._gcra(client)(
+                    keys=[key], args=[interval * 1000, period * 1000]
+                )
+                return 0.0 if allowed else wait_ms / 1000
+            except Exception as e:
+                logger.error(f"Redis rate limit error: {e}")
+
+        return self._hit_local(key, interval, period)
+
+    def _hit_local(self, key: str, interval: float, period: float) -> float:
+        now = time.monotonic()
+        tat = max(self._local.get(key) or now, now)
+        allow_at = tat + interval - period
+        if allow_at > now:
+            return allow_at - now
+        self._local.set(key, tat + interval)
+        return 0.0
+
+    def limit(self, rate: str, exact: bool = False) -> Callable:
+        """Limit an endpoint to ``rate`` (e.g. ``"100/minute"``) per client.
+
+        The endpoint must take a ``request: Request`` parameter. Each
+        endpoint has its own budget. Pass ``exact=True`` for sensitive
+        routes that must be checked against Redis on every request.
+        """
+        count, period = parse_rate(rate)  # Reject malformed limits at import
+
+        def decorator(func: Callable) -> Callable:
+            scope = f"{func.__module__}.{func.__name__}"
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                request: Optional[Request] = next(
+                    (v for v in kwargs.values() if isinstance(v, Request)), None
+                )
+                if self.enabled and request is not None:
+                    key = f"{scope}:{rate_limit_key(request)}"
+                    if exact or not settings.RATE_LIMIT_APPROXIMATE:
+                        mode = "exact"
+                        retry_after = await self.hit(f"{self.prefix}:{key}", rate)
+                    else:
+                        mode = "approximate"
+                        retry_after = self._batched.hit(key, count, period)
+                    if retry_after:
+                        rate_limit_rejected_total.inc(mode=mode)
+                        raise RateLimitExceeded(rate, math.ceil(retry_after))
+                return await func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    async def sync(self) -> int:
+        """Sync approximate counts with Redis; returns clients synced."""
+        client = get_redis()
+        if client is None:
+            return 0
+        return await self._batched.sync(client)
+
+    async def run_sync(self) -> None:
+        """Sync every RATE_LIMIT_SYNC_INTERVAL seconds until cancelled."""
+        while True:
+            await asyncio.sleep(settings.RATE_LIMIT_SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Rate limit sync failed: {e}")
+
+    def reset(self) -> None:
+        """Forget in-process counts (Redis keys expire on their own)."""
+        self._local.clear()
+        self._batched.clear()
+
+
+limiter = RateLimiter()
 
 
 # Custom rate limit exceeded handler
@@ -1,67 +1,283 @@
-import redis
-import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List, Sequence
+import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
+from redis.asyncio.connection import BlockingConnectionPool
+from .circuit_breaker import OPEN, CircuitBreaker
+from .codec import cache_codec
 from .config import settings
 from .logging import get_logger
+from .metrics import metrics
 
 logger = get_logger(__name__)
 
+redis_pool_connections = metrics.gauge(
+    "redis_pool_connections", "Redis pool connections by state", ("state",)
+)
+redis_pool_wait_seconds = metrics.histogram(
+    "redis_pool_wait_seconds",
+    "Time spent waiting for a pooled Redis connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+redis_pool_timeouts_total = metrics.counter(
+    "redis_pool_timeouts_total", "Redis commands that found no free connection"
+)
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """Bounded pool that exports its usage and connection wait time."""
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            redis_pool_timeouts_total.inc()
+            raise
+        redis_pool_wait_seconds.observe(time.perf_counter() - started)
+        self._export_usage()
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self._export_usage()
+
+    def _export_usage(self) -> None:
+        redis_pool_connections.set(len(self._in_use_connections), state="in_use")
+        redis_pool_connections.set(len(self._available_connections), state="idle")
+        redis_pool_connections.set(self.max_connections, state="max")
+
+
+class RedisUnavailable(redis.ConnectionError):
+    """Raised instead of calling Redis while its circuit is open."""
+
+
+# Opens on consecutive errors or slow calls, so while Redis is degraded
+# requests fall back to the database at once instead of waiting on timeouts
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=settings.REDIS_BREAKER_FAILURES,
+    slow_call=settings.REDIS_BREAKER_SLOW_CALL,
+    cooldown=settings.REDIS_BREAKER_COOLDOWN,
+    probes=settings.REDIS_BREAKER_PROBES,
+)
+
+
+async def _guarded(call):
+    if not redis_breaker.allow():
+        raise RedisUnavailable("Redis circuit open")
+    started = time.perf_counter()
+    try:
+        result = await call()
+    except (redis.ConnectionError, redis.TimeoutError):
+        redis_breaker.record_failure()
+        raise
+    except redis.RedisError:
+        # Redis answered; the error is about the command itself
+        redis_breaker.record_success(time.perf_counter() - started)
+        raise
+    except BaseException:
+        redis_breaker.release()
+        raise
+    redis_breaker.record_success(time.perf_counter() - started)
+    return result
+
+
+class GuardedPipeline(Pipeline):
+    """Pipeline executed through the Redis circuit breaker."""
+
+    async def execute(self, raise_on_error: bool = True):
+        execute = super().execute
+        return await _guarded(lambda: execute(raise_on_error))
+
+
+class GuardedRedis(redis.Redis):
+    """Client whose commands and pipelines go through the circuit breaker."""
+
+    async def execute_command(self, *args, **options):
+        execute_command = super().execute_command
+        return await _guarded(lambda: execute_command(*args, **options))
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: Optional[str] = None
+    ) -> GuardedPipeline:
+        return GuardedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# Process-wide client, created by the app lifespan and shared by every cache
+_redis: Optional[GuardedRedis] = None
+
+
+async def init_redis() -> Optional[GuardedRedis]:
+    """Create the shared Redis client and check it is reachable (idempotent).
+
+    Uses REDIS_URL, or a local Redis in development. Returns None, leaving
+    callers on their database fallback, when Redis cannot be reached.
+    """
+    global _redis
+
+    if _redis is not None:
+        return _redis
+
+    # Responses are left as bytes; cached values are binary codec payloads
+    pool = InstrumentedConnectionPool.from_url(
+        settings.REDIS_URL or "redis://localhost:6379/0",
+        max_connections=settings.REDIS_POOL_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    )
+    client = GuardedRedis(connection_pool=pool)
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis not available, using database only: {e}")
+        await client.aclose()
+        await pool.disconnect()
+        return None
+
+    _redis = client
+    logger.info(
+        f"Redis connection established "
+        f"(max_connections={settings.REDIS_POOL_MAX_CONNECTIONS})"
+    )
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared client and its pooled connections."""
+    global _redis
+
+    if _redis is not None:
+        client, _redis = _redis, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
+
+
+def get_redis(ignore_breaker: bool = False) -> Optional[GuardedRedis]:
+    """Get the shared Redis client, or None when Redis is unavailable.
+
+    While the circuit is open this returns None too, so callers skip Redis
+    without attempting a call. Pass ``ignore_breaker=True`` for long-lived
+    connections such as pub/sub that manage their own reconnects.
+    """
+    if not ignore_breaker and redis_breaker.state == OPEN:
+        return None
+    return _redis
+
+
+# Progress is cached as a hash: one field per column, and one field per
+# action under ``data:<action>``. Values are encoded with the cache codec.
+DATA_FIELD_PREFIX = "data:"
+
+# HSET the given fields and refresh the TTL, only if the hash exists.
+# ARGV: TTL, the number of steps N, N encoded steps in order, then field/value
+# pairs. With N > 0, current_step is only written when it is further along
+# than the cached one. Returns 0 when not cached, else the cached step.
+UPDATE_IF_CACHED = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local steps = tonumber(ARGV[2])
+local rank = {}
+for i = 1, steps do
+    rank[ARGV[2 + i]] = i
+end
+local fields = {}
+for i = 3 + steps, #ARGV, 2 do
+    local write = true
+    if steps > 0 and ARGV[i] == 'current_step' then
+        local cached = redis.call('HGET', KEYS[1], 'current_step')
+        write = not cached or (rank[ARGV[i + 1]] or 0) > (rank[cached] or 0)
+    end
+    if write then
+        table.insert(fields, ARGV[i])
+        table.insert(fields, ARGV[i + 1])
+    end
+end
+if #fields > 0 then
+    redis.call('HSET', KEYS[1], unpack(fields))
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('HGET', KEYS[1], 'current_step') or 1
+"""
+
+
+def encode_progress(progress: Dict[str, Any]) -> Dict[str, bytes]:
+    """Flatten a progress row into hash fields."""
+    fields = {}
+    for column, value in progress.items():
+        if column == "data":
+            for action, action_data in (value or {}).items():
+                fields[f"{DATA_FIELD_PREFIX}{action}"] = cache_codec.encode(action_data)
+        else:
+            fields[column] = cache_codec.encode(value)
+    return fields
+
+
+def decode_progress(fields: Dict[Any, bytes]) -> Dict[str, Any]:
+    """Rebuild a progress row from its hash fields."""
+    progress: Dict[str, Any] = {"data": {}}
+    for field, value in fields.items():
+        if isinstance(field, bytes):
+            field = field.decode()
+        if field.startswith(DATA_FIELD_PREFIX):
+            progress["data"][field[len(DATA_FIELD_PREFIX) :]] = cache_codec.decode(
+                value
+            )
+        else:
+            progress[field] = cache_codec.decode(value)
+    return progress
+
 
 class OnboardingRedisClient:
     """Redis client specifically for onboarding progress caching."""
 
     def __init__(self):
-        self.redis_client = self._get_redis_client()
         self.key_prefix = "onboarding:progress:"
         self.ttl = 86400  # 24 hours - reasonable for session-like data
+        self._update_script = None
+        self._script_client = None
 
-    def _get_redis_client(self) -> Optional[redis.Redis]:
-        """Get Redis client instance."""
-        try:
-            if settings.REDIS_URL:
-                # Use Redis URL from environment (production)
-                client = redis.from_url(
-                    settings.REDIS_URL,
-                    decode_responses=True,
-                    socket_connect_timeout=5,
-                    socket_timeout=5,
-                )
-                client.ping()
-                logger.info("Redis connection established")
-                return client
-            else:
-                # Try local Redis for development
-                try:
-                    client = redis.Redis(
-                        host="localhost",
-                        port=6379,
-                        db=0,
-                        decode_responses=True,
-                        socket_connect_timeout=5,
-                        socket_timeout=5,
-                    )
-                    client.ping()
-                    logger.info("Local Redis connection established")
-                    return client
-                except (redis.ConnectionError, redis.TimeoutError):
-                    logger.warning("Redis not available, using database only")
-                    return None
-        except Exception as e:
-            logger.warning(f"Redis connection failed: {e}")
-            return None
+    @property
+    def redis_client(self) -> Optional[GuardedRedis]:
+        """The shared client, or None when Redis is unavailable."""
+        return get_redis()
+
+    def _update(self):
+        # Scripts are bound to the client they were registered on
+        client = self.redis_client
+        if self._script_client is not client:
+            self._update_script = client.register_script(UPDATE_IF_CACHED)
+            self._script_client = client
+        return self._update_script
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.key_prefix}{user_id}"
 
-    def get_progress(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get onboarding progress from Redis cache."""
+    async def get_progress(
+        self, user_id: str, refresh_ttl: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """Get onboarding progress from Redis cache.
+
+        The read and the TTL refresh for active users share one round trip.
+        """
         if not self.redis_client:
             return None
 
         try:
-            key = f"{self.key_prefix}{user_id}"
-            data = self.redis_client.get(key)
+            key = self._key(user_id)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hgetall(key)
+            if refresh_ttl:
+                pipe.expire(key, self.ttl)
+            fields = (await pipe.execute())[0]
 
-            if data:
+            if fields:
                 logger.debug(f"Cache hit for user {user_id}")
-                return json.loads(data)
+                return decode_progress(fields)
 
             logger.debug(f"Cache miss for user {user_id}")
             return None
@@ -69,49 +285,109 @@ class OnboardingRedisClient:
             logger.error(f"Redis get error: {e}")
             return None
 
-    def set_progress(self, user_id: str, progress_data: Dict[str, Any]) -> bool:
-        """Set onboarding progress in Redis cache with TTL."""
+    async def get_many_progress(
+        self, user_ids: List[str]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Get cached progress for several users in one round trip."""
+        if not self.redis_client or not user_ids:
+            return [None] * len(user_ids)
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipe.hgetall(self._key(user_id))
+        return [
+            decode_progress(fields) if fields else None
+            for fields in await pipe.execute()
+        ]
+
+    async def set_progress(
+        self, user_id: str, progress_data: Dict[str, Any], pipe=None
+    ) -> bool:
+        """Replace the cached progress with TTL.
+
+        Pass ``pipe`` to queue the commands on a caller's pipeline instead.
+        """
         if not self.redis_client:
             return False
 
         try:
-            key = f"{self.key_prefix}{user_id}"
-            # Ensure datetime objects are converted to strings
-            serializable_data = {
-                k: v.isoformat() if hasattr(v, "isoformat") else v
-                for k, v in progress_data.items()
-            }
-            data = json.dumps(serializable_data)
-
-            result = self.redis_client.setex(key, self.ttl, data)
+            key = self._key(user_id)
+            own_pipe = pipe is None
+            if own_pipe:
+                pipe = self.redis_client.pipeline(transaction=True)
+            pipe.delete(key)
+            pipe.hset(key, mapping=encode_progress(progress_data))
+            pipe.expire(key, self.ttl)
+            if own_pipe:
+                await pipe.execute()
             logger.debug(f"Cached progress for user {user_id}")
-            return bool(result)
+            return True
         except Exception as e:
             logger.error(f"Redis set error: {e}")
             return False
 
-    def delete_progress(self, user_id: str) -> bool:
+    async def update_progress(
+        self,
+        user_id: str,
+        changes: Dict[str, Any],
+        action: Optional[str] = None,
+        action_data: Any = None,
+        step_order: Optional[Sequence[str]] = None,
+        pipe=None,
+    ) -> bool:
+        """Write only the given fields of cached progress.
+
+        ``changes`` holds scalar columns such as current_step; ``action_data``
+        replaces the single data field of ``action``. With ``step_order``,
+        current_step is only replaced by a step further along it, checked in
+        the same script so concurrent updates cannot move it back. Nothing is
+        written when the progress is not cached, so a partial hash is never
+        created. Returns False in that case (only when run without ``pipe``;
+        with ``pipe`` the script's result is the cached step, or 0).
+        """
+        if not self.redis_client:
+            return False
+
+        fields = encode_progress(changes)
+        if action is not None:
+            fields[f"{DATA_FIELD_PREFIX}{action}"] = cache_codec.encode(action_data)
+        if not fields:
+            return True
+
+        steps = [cache_codec.encode(step) for step in step_order or ()]
+        args = [self.ttl, len(steps), *steps]
+        for field, value in fields.items():
+            args.extend((field, value))
+
+        try:
+            result = await self._update()(
+                keys=[self._key(user_id)], args=args, client=pipe
+            )
+            return pipe is not None or bool(result)
+        except Exception as e:
+            logger.error(f"Redis update error: {e}")
+            return False
+
+    async def delete_progress(self, user_id: str) -> bool:
         """Delete onboarding progress from Redis cache."""
         if not self.redis_client:
             return False
 
         try:
-            key = f"{self.key_prefix}{user_id}"
-            result = self.redis_client.delete(key)
+            result = await self.redis_client.delete(self._key(user_id))
             logger.debug(f"Deleted cache for user {user_id}")
             return bool(result)
         except Exception as e:
             logger.error(f"Redis delete error: {e}")
             return False
 
-    def extend_ttl(self, user_id: str) -> bool:
+    async def extend_ttl(self, user_id: str) -> bool:
         """Extend TTL for active users."""
         if not self.redis_client:
             return False
 
         try:
-            key = f"{self.key_prefix}{user_id}"
-            result = self.redis_client.expire(key, self.ttl)
+            result = await self.redis_client.expire(self._key(user_id), self.ttl)
             return bool(result)
         except Exception as e:
             logger.error(f"Redis expire error: {e}")
@@ -0,0 +1,95 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class IdentityMap:
+    """Per-request map of loaded rows keyed by (table, field, value).
+
+    Identical reads issued while a request is in flight share one query;
+    the repository layer hands each caller its own copy of the row. Writes
+    evict the affected table. Once the request has written, its later reads
+    go to the primary so they see the write despite replica lag.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, asyncio.Future] = {}
+        self.has_writes = False
+
+    async def get_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return the row for key, running loader only on the first request."""
+        future = self._entries.get(key)
+        if future is not None:
+            return await future
+
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = future
+        try:
+            result = await loader()
+        except BaseException as e:
+            # Don't memoize failures; waiters see the error, later reads retry
+            if self._entries.get(key) is future:
+                del self._entries[key]
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+
+        future.set_result(result)
+        return result
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a freshly written row so later reads see the write."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._entries[key] = future
+
+    def invalidate_table(self, table: str) -> None:
+        """Drop every entry loaded from a table after a write to it."""
+        self.has_writes = True
+        for key in [k for k in self._entries if k[0] == table]:
+            del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_identity_map: ContextVar[Optional[IdentityMap]] = ContextVar(
+    "identity_map", default=None
+)
+
+
+def get_identity_map() -> Optional[IdentityMap]:
+    """Get the identity map of the current request, if any."""
+    return _identity_map.get()
+
+
+@contextmanager
+def request_scope() -> Iterator[IdentityMap]:
+    """Open a fresh identity map for the duration of a unit of work."""
+    identity_map = IdentityMap()
+    token = _identity_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _identity_map.reset(token)
+
+
+class RequestScopeMiddleware:
+    """ASGI middleware that gives every HTTP request its own identity map."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with request_scope():
+            await self.app(scope, receive, send)
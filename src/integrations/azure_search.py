@@ -1,3 +1,4 @@
+import asyncio
 from azure.search.documents import SearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import (
@@ -17,7 +18,7 @@ from azure.search.documents.indexes.models import (
 )
 from azure.search.documents.models import VectorizedQuery
 from azure.core.credentials import AzureKeyCredential
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..core.config import settings
 from ..core.logging import get_logger
 
@@ -29,15 +30,48 @@ class AzureSearchClient:
         self.endpoint = settings.AZURE_SEARCH_ENDPOINT
         self.api_key = settings.AZURE_SEARCH_KEY
         self.index_name = settings.AZURE_SEARCH_INDEX_NAME
-        self.credential = AzureKeyCredential(self.api_key)
-
-        # Initialize clients
-        self.index_client = SearchIndexClient(self.endpoint, self.credential)
-        self.search_client = SearchClient(
-            endpoint=self.endpoint,
-            index_name=self.index_name,
-            credential=self.credential,
-        )
+
+        # SDK clients are created on first use rather than at import
+        self._index_client: Optional[SearchIndexClient] = None
+        self._search_client: Optional[SearchClient] = None
+
+    @property
+    def index_client(self) -> SearchIndexClient:
+        if self._index_client is None:
+            self._index_client = SearchIndexClient(
+                self.endpoint, AzureKeyCredential(self.api_key)
+            )
+        return self._index_client
+
+    @index_client.setter
+    def index_client(self, client: SearchIndexClient) -> None:
+        self._index_client = client
+
+    @property
+    def search_client(self) -> SearchClient:
+        if self._search_client is None:
+            self._search_client = SearchClient(
+                endpoint=self.endpoint,
+                index_name=self.index_name,
+                credential=AzureKeyCredential(self.api_key),
+            )
+        return self._search_client
+
+    @search_client.setter
+    def search_client(self, client: SearchClient) -> None:
+        self._search_client = client
+
+    def close(self) -> None:
+        """Close the SDK clients' HTTP connections, if they were created."""
+        for client in (self._index_client, self._search_client):
+            if client is not None:
+                client.close()
+        self._index_client = None
+        self._search_client = None
+
+    async def warm_up(self) -> int:
+        """Open the HTTPS connection with a document count; returns the count."""
+        return await asyncio.to_thread(self.search_client.get_document_count)
 
     async def delete_index(self):
         """Delete the Azure Search index."""
@@ -141,7 +175,10 @@ class AzureSearchClient:
     async def upload_documents(self, documents: List[Dict[str, Any]]):
         """Upload documents to Azure Search index."""
         try:
-            result = self.search_client.upload_documents(documents=documents)
+            # The SDK call blocks; run it off the event loop so uploads overlap I/O
+            result = await asyncio.to_thread(
+                self.search_client.upload_documents, documents=documents
+            )
             logger.info(f"Uploaded {len(documents)} documents to Azure Search")
             return result
         except Exception as e:
@@ -1,5 +1,6 @@
+import asyncio
 from openai import OpenAI
-from typing import List
+from typing import List, Optional
 from ..core.config import settings
 from ..core.logging import get_logger
 
@@ -8,9 +9,30 @@ logger = get_logger(__name__)
 
 class OpenAIClient:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._client: Optional[OpenAI] = None
         self.embedding_model = settings.OPENAI_EMBEDDING_MODEL
 
+    @property
+    def client(self) -> OpenAI:
+        """SDK client, created on first use rather than at import."""
+        if self._client is None:
+            self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._client
+
+    @client.setter
+    def client(self, client: OpenAI) -> None:
+        self._client = client
+
+    def close(self) -> None:
+        """Close the SDK client's HTTP connections, if it was created."""
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def warm_up(self) -> None:
+        """Open the HTTPS connection with a cheap model lookup."""
+        await asyncio.to_thread(self.client.models.retrieve, self.embedding_model)
+
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for given text using OpenAI."""
         try:
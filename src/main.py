@@ -1,10 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .core.rate_limiting import limiter, rate_limit_handler
+from .core.rate_limiting import RateLimitExceeded, limiter, rate_limit_handler
 from .api.router import api_router
-from slowapi.errors import RateLimitExceeded
 from .core.logging import setup_logging
+from .core.database import init_supabase_client, close_supabase_client
+from .core.redis_client import init_redis, close_redis
+from .core.progress_cache import progress_cache
+from .core.cache import refresh_periodically
+from .repositories.onboarding.reference_data import refresh_reference_data
+from .services.onboarding.progress_writer import progress_writer
+from .integrations.openai import openai_client
+from .integrations.azure_search import azure_search_client
+from .services.warmup import warmup
+from .core.request_context import RequestScopeMiddleware
+from .core.instrumentation import QueryMetricsMiddleware
+from .core.metrics import metrics
+from .core.dependencies import require_metrics_token
 
 # Setup logging
 logger = setup_logging(
@@ -13,16 +28,83 @@ logger = setup_logging(
     log_file=getattr(settings, "LOG_FILE", None),
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients on startup and release them on shutdown."""
+    db = await init_supabase_client()
+    redis = await init_redis()
+
+    # Evict local progress entries written by other workers
+    progress_invalidator = None
+    if redis is not None:
+        progress_invalidator = asyncio.create_task(progress_cache.listen())
+
+    # Open connections and load caches before /ready admits traffic;
+    # warm-up loads the reference data, so the refresher starts a tick later
+    warmup_task = None
+    if settings.WARMUP_ENABLED:
+        warmup.reset()
+        warmup_task = asyncio.create_task(warmup.run(db))
+    else:
+        warmup.mark_ready()
+
+    # Preload reference data in the background and keep it fresh
+    reference_refresher = asyncio.create_task(
+        refresh_periodically(
+            "reference data",
+            settings.REFERENCE_DATA_REFRESH_INTERVAL,
+            lambda: refresh_reference_data(db),
+            initial_delay=(
+                settings.REFERENCE_DATA_REFRESH_INTERVAL
+                if settings.WARMUP_ENABLED
+                else 0.0
+            ),
+        )
+    )
+
+    # Share locally counted rate limits with the other workers
+    limiter_sync = None
+    if redis is not None and settings.RATE_LIMIT_APPROXIMATE:
+        limiter_sync = asyncio.create_task(limiter.run_sync())
+
+    # Persist write-behind onboarding progress
+    progress_flusher = None
+    if progress_writer.enabled:
+        progress_flusher = asyncio.create_task(progress_writer.run(db))
+
+    yield
+
+    if warmup_task is not None:
+        warmup_task.cancel()
+    reference_refresher.cancel()
+    if limiter_sync is not None:
+        limiter_sync.cancel()
+    if progress_invalidator is not None:
+        progress_invalidator.cancel()
+    if progress_flusher is not None:
+        progress_flusher.cancel()
+        try:
+            await progress_writer.flush(db)
+        except Exception as e:
+            logger.error(f"Final progress flush failed: {e}")
+    # Integration clients are created on first use; release any that were
+    openai_client.close()
+    azure_search_client.close()
+    await close_redis()
+    await close_supabase_client()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="FluentPro Backend",
     description="Backend API for FluentPro language learning platform",
     version="1.0.0",
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 # Add rate limiting
-app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
 
 # CORS middleware
@@ -34,6 +116,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request-scoped identity map for deduplicating repository reads
+app.add_middleware(RequestScopeMiddleware)
+
+# Per-request query log, latency metrics and slow-request logging
+app.add_middleware(QueryMetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -45,6 +133,25 @@ async def health_check():
     return {"status": "healthy", "message": "FluentPro Backend is running"}
 
 
+# Readiness for the load balancer: ready once warm-up has finished
+@app.get("/ready")
+async def readiness_check():
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "warmup": warmup.results}
+
+
+# Internal: per-route latency, pool and breaker state for the scraper only
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_metrics_token)],
+    include_in_schema=False,
+)
+async def metrics_endpoint():
+    return metrics.render()
+
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")
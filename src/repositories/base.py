@@ -1,15 +1,92 @@
+import asyncio
+import base64
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, TypeVar, Generic
-from supabase import Client
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Generic,
+    Hashable,
+)
+from postgrest.types import CountMethod, ReturnMethod
+from supabase import AsyncClient
+from ..core.cache import TTLCache, get_row_cache
+from ..core.config import settings
+from ..core.database import get_read_client
+from ..core.instrumentation import execute_query
+from ..core.logging import get_logger
+from ..core.request_context import get_identity_map
+from ..schemas.common import BatchOperationResult
+
+logger = get_logger(__name__)
 
 T = TypeVar("T")
 
+# Recently computed planned/estimated totals, keyed by table, mode and filters
+_count_cache = TTLCache(maxsize=1024, ttl=settings.COUNT_CACHE_TTL)
+
+
+def _validate_count_mode(count: Optional[str]) -> Optional[str]:
+    """Accept 'exact', 'planned', 'estimated' or None (no count)."""
+    if count is None:
+        return None
+    try:
+        return CountMethod(count).value
+    except ValueError:
+        raise ValueError(
+            f"Invalid count mode '{count}'; use exact, planned, estimated or None"
+        )
+
+
+def encode_cursor(created_at: Any, id: Any) -> str:
+    """Encode a (created_at, id) keyset position as an opaque token."""
+    raw = json.dumps([str(created_at), str(id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[str]:
+    """Decode a continuation token produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return [str(created_at), str(id)]
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def _chunk_rows(
+    rows: List[Dict[str, Any]], max_rows: int, max_bytes: int
+) -> Iterator[List[Dict[str, Any]]]:
+    """Split rows into chunks bounded by row count and encoded payload size."""
+    chunk: List[Dict[str, Any]] = []
+    chunk_bytes = 2  # Enclosing brackets
+
+    for row in rows:
+        row_bytes = len(json.dumps(row, default=str)) + 1
+        if chunk and (len(chunk) >= max_rows or chunk_bytes + row_bytes > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 2
+        chunk.append(row)
+        chunk_bytes += row_bytes
+
+    if chunk:
+        yield chunk
+
 
 class BaseRepository(ABC, Generic[T]):
     """Base repository class for data access operations."""
 
-    def __init__(self, db: Client, table_name: str):
+    def __init__(self, db: AsyncClient, table_name: str):
         self.db = db
+        self.read_db = get_read_client(db)
         self.table_name = table_name
 
     @abstractmethod
@@ -19,7 +96,11 @@ class BaseRepository(ABC, Generic[T]):
 
     @abstractmethod
     async def get_all(
-        self, filters: Optional[Dict[str, Any]] = None
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+        is_null: Optional[Sequence[str]] = None,
+        not_null: Optional[Sequence[str]] = None,
     ) -> List[Dict[str, Any]]:
         """Get all records with optional filters."""
         pass
@@ -44,16 +125,91 @@ class BaseRepository(ABC, Generic[T]):
         result = await self.get_by_id(id)
         return result is not None
 
-    async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
-        """Count records with optional filters."""
-        query = self.db.table(self.table_name).select("id", count="exact")
-
-        if filters:
-            for key, value in filters.items():
-                query = query.eq(key, value)
+    def _count_key(self, mode: str, filters: Optional[Dict[str, Any]]) -> tuple:
+        return (
+            self.table_name,
+            mode,
+            json.dumps(filters or {}, sort_keys=True, default=str),
+        )
 
-        result = query.execute()
-        return result.count if result.count is not None else 0
+    def _cached_count(
+        self, mode: Optional[str], filters: Optional[Dict[str, Any]]
+    ) -> Optional[int]:
+        # Exact totals must reflect writes made since, so they are not cached
+        if mode in (None, CountMethod.exact.value):
+            return None
+        return _count_cache.get(self._count_key(mode, filters))
+
+    def _store_count(
+        self, mode: Optional[str], filters: Optional[Dict[str, Any]], total: int
+    ) -> None:
+        if mode not in (None, CountMethod.exact.value):
+            _count_cache.set(self._count_key(mode, filters), total)
+
+    def _reader(self, primary: bool = False) -> AsyncClient:
+        """Get the client for a read.
+
+        Reads go to the read replica unless ``primary`` is set or the current
+        request has already written, in which case they must see the write.
+        """
+        if primary:
+            return self.db
+        identity_map = get_identity_map()
+        if identity_map is not None and identity_map.has_writes:
+            return self.db
+        return self.read_db
+
+    async def _execute(self, query, operation: str, table: Optional[str] = None):
+        """Execute a query builder, recording it in the request's query log."""
+        return await execute_query(query, table or self.table_name, operation)
+
+    async def _load_row(
+        self,
+        field: str,
+        value: Any,
+        loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Load a single row once per request via the request identity map.
+
+        Every caller gets its own shallow copy, so editing a returned row does
+        not change what later reads in the request see.
+        """
+        identity_map = get_identity_map()
+        if identity_map is None:
+            return await loader()
+        row = await identity_map.get_or_load((self.table_name, field, value), loader)
+        return dict(row) if row is not None else None
+
+    async def _record_write(
+        self,
+        row: Optional[Dict[str, Any]] = None,
+        key_field: str = "id",
+        table: Optional[str] = None,
+        key: Any = None,
+    ) -> None:
+        """Propagate a write to the request identity map and the row cache.
+
+        The written row replaces any cached copy; when the write returned no
+        row, the cached entry for ``key`` (on ``key_field``) is invalidated.
+        """
+        table = table or self.table_name
+
+        row_cache = get_row_cache(table)
+        if row_cache is not None:
+            if row:
+                await row_cache.set(row)
+            elif key is None:
+                row_cache.clear()
+            elif row_cache.indexes(key_field):
+                await row_cache.invalidate(key_field, key)
+
+        identity_map = get_identity_map()
+        if identity_map is None:
+            return
+
+        identity_map.invalidate_table(table)
+        if row and key_field in row:
+            identity_map.put((table, key_field, row[key_field]), dict(row))
 
 
 class SupabaseRepository(BaseRepository[T]):
@@ -61,60 +217,324 @@ class SupabaseRepository(BaseRepository[T]):
 
     async def get_by_id(self, id: str) -> Optional[Dict[str, Any]]:
         """Get a single record by ID from Supabase."""
-        result = self.db.table(self.table_name).select("*").eq("id", id).execute()
-        return result.data[0] if result.data else None
+        return await self.get_by_field("id", id)
 
     async def get_all(
-        self, filters: Optional[Dict[str, Any]] = None
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: str = "*",
+        is_null: Optional[Sequence[str]] = None,
+        not_null: Optional[Sequence[str]] = None,
     ) -> List[Dict[str, Any]]:
-        """Get all records from Supabase with optional filters."""
-        query = self.db.table(self.table_name).select("*")
+        """Get all records from Supabase with optional filters.
+
+        ``columns`` limits the projection (e.g. ``"id, title"``) so large
+        columns are not transferred; ``is_null`` / ``not_null`` filter on
+        NULL-ness server-side.
+        """
+        query = self._reader().table(self.table_name).select(columns)
+        query = self._apply_filters(query, filters, is_null, not_null)
+
+        result = await self._execute(query, "select")
+        return result.data or []
 
+    @staticmethod
+    def _apply_filters(
+        query,
+        filters: Optional[Dict[str, Any]] = None,
+        is_null: Optional[Sequence[str]] = None,
+        not_null: Optional[Sequence[str]] = None,
+    ):
+        """Apply equality and NULL predicates to a PostgREST query."""
         if filters:
             for key, value in filters.items():
                 if value is not None:
                     query = query.eq(key, value)
-
-        result = query.execute()
-        return result.data or []
+        for column in is_null or ():
+            query = query.is_(column, "null")
+        for column in not_null or ():
+            query = query.not_.is_(column, "null")
+        return query
 
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new record in Supabase."""
-        result = self.db.table(self.table_name).insert(data).execute()
+        result = await self._execute(
+            self.db.table(self.table_name).insert(data), "insert"
+        )
         if not result.data:
             raise Exception(f"Failed to create record in {self.table_name}")
+        await self._record_write(result.data[0])
         return result.data[0]
 
     async def update(self, id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update an existing record in Supabase."""
-        result = self.db.table(self.table_name).update(data).eq("id", id).execute()
-        return result.data[0] if result.data else None
+        result = await self._execute(
+            self.db.table(self.table_name).update(data).eq("id", id), "update"
+        )
+        row = result.data[0] if result.data else None
+        await self._record_write(row, key=id)
+        return row
 
     async def delete(self, id: str) -> bool:
         """Delete a record from Supabase."""
-        result = self.db.table(self.table_name).delete().eq("id", id).execute()
+        result = await self._execute(
+            self.db.table(self.table_name).delete().eq("id", id), "delete"
+        )
+        await self._record_write(key=id)
         return len(result.data) > 0 if result.data else False
 
-    async def get_by_field(self, field: str, value: Any) -> Optional[Dict[str, Any]]:
-        """Get a single record by a specific field."""
-        result = self.db.table(self.table_name).select("*").eq(field, value).execute()
-        return result.data[0] if result.data else None
+    async def get_by_field(
+        self, field: str, value: Any, primary: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """Get a single record by a specific field.
+
+        Set ``primary`` when the row must reflect a write made outside the
+        current request; the request identity map and the cross-request row
+        cache are then skipped too, and refreshed with the row read.
+        """
+
+        row_cache = get_row_cache(self.table_name)
+        if row_cache is not None and not row_cache.indexes(field):
+            row_cache = None
+
+        async def load() -> Optional[Dict[str, Any]]:
+            if row_cache is not None and not primary:
+                cached = await row_cache.get(field, value)
+                if cached is not None:
+                    return cached
+
+            result = await self._execute(
+                self._reader(primary)
+                .table(self.table_name)
+                .select("*")
+                .eq(field, value),
+                "select",
+            )
+            row = result.data[0] if result.data else None
+            if row_cache is not None and row is not None:
+                await row_cache.set(row)
+            return row
+
+        if primary:
+            row = await load()
+            identity_map = get_identity_map()
+            if identity_map is not None:
+                identity_map.put((self.table_name, field, value), row)
+            return dict(row) if row is not None else None
+
+        return await self._load_row(field, value, load)
 
     async def get_many_by_field(self, field: str, value: Any) -> List[Dict[str, Any]]:
         """Get multiple records by a specific field."""
-        result = self.db.table(self.table_name).select("*").eq(field, value).execute()
+        result = await self._execute(
+            self._reader().table(self.table_name).select("*").eq(field, value), "select"
+        )
         return result.data or []
 
+    async def iter_batches(
+        self,
+        batch_size: int = 100,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        is_null: Optional[Sequence[str]] = None,
+        not_null: Optional[Sequence[str]] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream the table in id order, one keyset page per batch.
+
+        Only one page is held at a time, so memory stays flat whatever the
+        table size. ``columns`` must include ``id``.
+        """
+        last_id = None
+        while True:
+            query = self._reader().table(self.table_name).select(columns)
+            query = self._apply_filters(query, filters, is_null, not_null)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            result = await self._execute(query.order("id").limit(batch_size), "select")
+
+            rows = result.data or []
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]["id"]
+
     async def search(self, field: str, pattern: str) -> List[Dict[str, Any]]:
         """Search records by pattern matching on a field."""
-        result = (
-            self.db.table(self.table_name)
+        result = await self._execute(
+            self._reader()
+            .table(self.table_name)
             .select("*")
-            .ilike(field, f"%{pattern}%")
-            .execute()
+            .ilike(field, f"%{pattern}%"),
+            "select",
         )
         return result.data or []
 
+    async def bulk_create(
+        self,
+        rows: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> BatchOperationResult:
+        """Insert many records in chunked requests."""
+        return await self._run_chunked(
+            rows,
+            lambda chunk: self.db.table(self.table_name).insert(
+                chunk, returning=ReturnMethod.minimal, default_to_null=False
+            ),
+            "insert",
+            chunk_size,
+            max_chunk_bytes,
+            concurrency,
+        )
+
+    async def bulk_upsert(
+        self,
+        rows: List[Dict[str, Any]],
+        on_conflict: str = "id",
+        chunk_size: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> BatchOperationResult:
+        """Insert or update many records, resolving conflicts on the given columns."""
+        return await self._run_chunked(
+            rows,
+            lambda chunk: self.db.table(self.table_name).upsert(
+                chunk,
+                on_conflict=on_conflict,
+                returning=ReturnMethod.minimal,
+                default_to_null=False,
+            ),
+            "upsert",
+            chunk_size,
+            max_chunk_bytes,
+            concurrency,
+        )
+
+    async def bulk_update_by_id(
+        self,
+        rows: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        max_chunk_bytes: Optional[int] = None,
+        concurrency: Optional[int] = None,
+    ) -> BatchOperationResult:
+        """Update many existing records by ID, each with its own values.
+
+        Rows are grouped by the columns they carry and each chunk is one
+        UPDATE through the bulk_update_rows function, so a row only writes
+        the columns it has and the others keep their current values. Ids
+        that do not exist, or were deleted meanwhile, are never inserted;
+        they are reported as failed.
+        """
+        if any("id" not in row for row in rows):
+            raise ValueError("Every row passed to bulk_update_by_id needs an 'id'")
+
+        def columns(row: Dict[str, Any]) -> tuple:
+            return tuple(sorted(column for column in row if column != "id"))
+
+        missing: List[Any] = []
+
+        def confirm(chunk: List[Dict[str, Any]], result) -> int:
+            updated = {str(id) for id in result.data or []}
+            unknown = [row["id"] for row in chunk if str(row["id"]) not in updated]
+            missing.extend(unknown)
+            return len(chunk) - len(unknown)
+
+        # Rows without any column to set have nothing to write
+        writes = [row for row in rows if len(row) > 1]
+        result = await self._run_chunked(
+            writes,
+            lambda chunk: self.db.rpc(
+                "bulk_update_rows",
+                {
+                    "p_table": self.table_name,
+                    "p_columns": list(columns(chunk[0])),
+                    "p_rows": chunk,
+                },
+            ),
+            "rpc",
+            chunk_size,
+            max_chunk_bytes,
+            concurrency,
+            confirm=confirm,
+            group_by=columns,
+        )
+        succeeded = len(rows) - len(writes) + result.succeeded
+        errors = list(result.errors)
+
+        if missing:
+            logger.warning(
+                f"bulk_update_by_id skipped {len(missing)} unknown ids "
+                f"in {self.table_name}"
+            )
+            errors.append(
+                {"chunk": None, "rows": len(missing), "error": "ids not found"}
+            )
+        return BatchOperationResult(
+            total=len(rows),
+            succeeded=succeeded,
+            failed=len(rows) - succeeded,
+            errors=errors,
+        )
+
+    async def _run_chunked(
+        self,
+        rows: List[Dict[str, Any]],
+        build_query: Callable[[List[Dict[str, Any]]], Any],
+        operation: str,
+        chunk_size: Optional[int],
+        max_chunk_bytes: Optional[int],
+        concurrency: Optional[int],
+        confirm: Optional[Callable[[List[Dict[str, Any]], Any], int]] = None,
+        group_by: Optional[Callable[[Dict[str, Any]], Hashable]] = None,
+    ) -> BatchOperationResult:
+        """Run one write per chunk with bounded concurrency, collecting failures.
+
+        ``confirm(chunk, result)`` returns how many rows of a chunk were
+        written; by default a chunk that did not raise counts in full. With
+        ``group_by``, a chunk only holds rows with the same key. Chunks are
+        numbered across the whole call, in the order errors report them.
+        """
+        groups: Dict[Hashable, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(group_by(row) if group_by else None, []).append(row)
+        chunks = [
+            chunk
+            for group in groups.values()
+            for chunk in _chunk_rows(
+                group,
+                chunk_size or settings.BULK_CHUNK_ROWS,
+                max_chunk_bytes or settings.BULK_CHUNK_BYTES,
+            )
+        ]
+        semaphore = asyncio.Semaphore(concurrency or settings.BULK_MAX_CONCURRENCY)
+        errors: List[Dict[str, Any]] = []
+
+        async def run(index: int, chunk: List[Dict[str, Any]]) -> int:
+            async with semaphore:
+                try:
+                    result = await self._execute(build_query(chunk), operation)
+                    return len(chunk) if confirm is None else confirm(chunk, result)
+                except Exception as e:
+                    logger.error(
+                        f"Bulk write to {self.table_name} failed for chunk {index}: {str(e)}"
+                    )
+                    errors.append({"chunk": index, "rows": len(chunk), "error": str(e)})
+                    return 0
+
+        succeeded = sum(
+            await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)))
+        )
+        await self._record_write()
+
+        return BatchOperationResult(
+            total=len(rows),
+            succeeded=succeeded,
+            failed=len(rows) - succeeded,
+            errors=sorted(errors, key=lambda error: error["chunk"]),
+        )
+
     async def paginate(
         self,
         page: int = 1,
@@ -122,11 +542,22 @@ class SupabaseRepository(BaseRepository[T]):
         filters: Optional[Dict[str, Any]] = None,
         order_by: Optional[str] = "created_at",
         order_desc: bool = True,
+        count: Optional[str] = "exact",
     ) -> Dict[str, Any]:
-        """Get paginated results."""
+        """Get paginated results using OFFSET paging.
+
+        ``count`` selects the total count mode (exact, planned, estimated, or
+        None to skip counting). Planned and estimated totals are cached briefly
+        across pages; exact totals are counted on every page. For deep pages
+        prefer paginate_keyset, whose cost does not grow with depth.
+        """
+        count = _validate_count_mode(count)
         offset = (page - 1) * page_size
 
-        query = self.db.table(self.table_name).select("*", count="exact")
+        total_count = self._cached_count(count, filters)
+        request_count = count if total_count is None else None
+
+        query = self._reader().table(self.table_name).select("*", count=request_count)
 
         if filters:
             for key, value in filters.items():
@@ -136,18 +567,93 @@ class SupabaseRepository(BaseRepository[T]):
         if order_by:
             query = query.order(order_by, desc=order_desc)
 
-        query = query.range(offset, offset + page_size - 1)
-        result = query.execute()
+        # Fetch one extra row to know whether another page exists
+        query = query.range(offset, offset + page_size)
+        result = await self._execute(query, "select")
+
+        rows = result.data or []
+        has_next = len(rows) > page_size
 
-        total_count = result.count or 0
-        total_pages = (total_count + page_size - 1) // page_size
+        if request_count and result.count is not None:
+            total_count = result.count
+            self._store_count(count, filters, total_count)
+
+        total_pages = (
+            (total_count + page_size - 1) // page_size
+            if total_count is not None
+            else None
+        )
 
         return {
-            "data": result.data or [],
+            "data": rows[:page_size],
             "page": page,
             "page_size": page_size,
             "total_count": total_count,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
+            "has_next": has_next,
             "has_prev": page > 1,
         }
+
+    async def paginate_keyset(
+        self,
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        order_desc: bool = True,
+        count: Optional[str] = None,
+        columns: str = "*",
+    ) -> Dict[str, Any]:
+        """Get a page ordered by (created_at, id), continuing after ``cursor``.
+
+        Returns ``next_cursor`` as an opaque continuation token (None on the
+        last page). Every page costs the same regardless of depth. The total
+        is only counted on the first page, and only when ``count`` is set.
+        """
+        count = _validate_count_mode(count)
+
+        total_count = self._cached_count(count, filters)
+        request_count = count if total_count is None and cursor is None else None
+
+        query = (
+            self._reader().table(self.table_name).select(columns, count=request_count)
+        )
+
+        if filters:
+            for key, value in filters.items():
+                if value is not None:
+                    query = query.eq(key, value)
+
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            op = "lt" if order_desc else "gt"
+            query = query.or_(
+                f'created_at.{op}."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.{op}."{last_id}")'
+            )
+
+        query = (
+            query.order("created_at", desc=order_desc)
+            .order("id", desc=order_desc)
+            .limit(page_size + 1)
+        )
+        result = await self._execute(query, "select")
+
+        rows = result.data or []
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if request_count and result.count is not None:
+            total_count = result.count
+            self._store_count(count, filters, total_count)
+
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+        return {
+            "data": rows,
+            "page_size": page_size,
+            "total_count": total_count,
+            "next_cursor": next_cursor,
+            "has_next": has_next,
+        }
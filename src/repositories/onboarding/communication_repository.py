@@ -1,194 +1,235 @@
 from typing import List, Dict, Any, Optional
-from supabase import Client
+from supabase import AsyncClient
 from ..base import SupabaseRepository
+from ...core.cache import ReferenceCache, ReferenceSnapshot
+from ...core.config import settings
 from ...core.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+def _name_to_identifier(name: str) -> str:
+    """Convert a name to a string identifier (lowercase, underscores)."""
+    return name.lower().replace(' ', '_').replace('-', '_')
+
+
+_REFERENCE_INDEXES = {
+    "identifier": lambda row: row["identifier"],
+    "id": lambda row: str(row["id"]),
+}
+
+# Active partners and units change rarely; keep indexed snapshots per process
+partner_cache = ReferenceCache(
+    "communication_partners", settings.REFERENCE_DATA_TTL, _REFERENCE_INDEXES
+)
+unit_cache = ReferenceCache("units", settings.REFERENCE_DATA_TTL, _REFERENCE_INDEXES)
+
+
 class CommunicationRepository(SupabaseRepository):
     """Repository for communication partners and situations."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         super().__init__(db, "communication_partners")
         self.user_partners_table = "user_communication_partners"
         self.units_table = "units"
         self.user_partner_units_table = "user_partner_units"
 
-    async def get_all_active_partners(self) -> List[Dict[str, Any]]:
-        """Get all active communication partners with identifiers."""
-        result = (
-            self.db.table(self.table_name)
+    async def _load_active(self, table: str) -> List[Dict[str, Any]]:
+        """Load active reference rows with their identifiers."""
+        result = await self._execute(
+            self._reader().table(table)
             .select("*")
             .eq("is_active", True)
-            .order("name")
-            .execute()
+            .order("name"),
+            "select",
+            table=table,
         )
-        partners = result.data or []
+        rows = result.data or []
         # Add identifier field based on name
-        for partner in partners:
-            partner['identifier'] = self._name_to_identifier(partner['name'])
-        return partners
+        for row in rows:
+            row['identifier'] = _name_to_identifier(row['name'])
+        return rows
+
+    async def _partners(self) -> ReferenceSnapshot:
+        return await partner_cache.get(lambda: self._load_active(self.table_name))
+
+    async def _units(self) -> ReferenceSnapshot:
+        return await unit_cache.get(lambda: self._load_active(self.units_table))
+
+    async def refresh_reference_data(self) -> Dict[str, int]:
+        """Reload the cached partners and units now; returns their versions."""
+        partners = await partner_cache.refresh(
+            lambda: self._load_active(self.table_name)
+        )
+        units = await unit_cache.refresh(lambda: self._load_active(self.units_table))
+        return {"partners_version": partners.version, "units_version": units.version}
+
+    async def get_all_active_partners(self) -> List[Dict[str, Any]]:
+        """Get all active communication partners with identifiers."""
+        return [dict(partner) for partner in (await self._partners()).rows]
 
     async def get_partner_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Get a specific communication partner by string identifier."""
-        # First try to find by exact identifier match (case-insensitive)
-        partners = await self.get_all_active_partners()
-        for partner in partners:
-            if partner['identifier'].lower() == identifier.lower():
-                return partner
-        return None
+        partner = (await self._partners()).get("identifier", identifier.lower())
+        return dict(partner) if partner else None
 
     async def get_all_active_units(self) -> List[Dict[str, Any]]:
         """Get all active communication situations/units with identifiers."""
-        result = (
-            self.db.table(self.units_table)
-            .select("*")
-            .eq("is_active", True)
-            .order("name")
-            .execute()
-        )
-        units = result.data or []
-        # Add identifier field based on name
-        for unit in units:
-            unit['identifier'] = self._name_to_identifier(unit['name'])
-        return units
+        return [dict(unit) for unit in (await self._units()).rows]
 
     async def get_user_selected_partners(self, user_id: str) -> List[Dict[str, Any]]:
         """Get user's selected communication partners with priority."""
-        result = (
-            self.db.table(self.user_partners_table)
+        result = await self._execute(
+            self._reader().table(self.user_partners_table)
             .select("*, communication_partners!inner(*)")
             .eq("user_id", user_id)
-            .order("priority")
-            .execute()
+            .order("priority"),
+            "select",
+            table=self.user_partners_table,
         )
         return result.data or []
 
     async def save_user_partner_selections(
         self, user_id: str, partner_ids: List[str]
     ) -> List[Dict[str, Any]]:
-        """Save user's communication partner selections with priority."""
-        # First, delete existing selections
-        self.db.table(self.user_partners_table).delete().eq(
-            "user_id", user_id
-        ).execute()
-
-        # Insert new selections with priority
-        records = []
-        for priority, partner_id in enumerate(partner_ids, start=1):
-            records.append(
-                {
-                    "user_id": user_id,
-                    "communication_partner_id": partner_id,
-                    "priority": priority,
-                }
-            )
-
-        if records:
-            result = self.db.table(self.user_partners_table).insert(records).execute()
-            return result.data or []
-        return []
+        """Replace user's communication partner selections, ranked by list order.
+
+        Runs the ``replace_user_partner_selections`` database function, which
+        applies only the changed rows in one transaction and returns the final
+        selections ordered by priority.
+        """
+        result = await self._execute(
+            self.db.rpc(
+                "replace_user_partner_selections",
+                {"p_user_id": user_id, "p_partner_ids": partner_ids},
+            ),
+            "rpc",
+            table="replace_user_partner_selections",
+        )
+        await self._record_write(table=self.user_partners_table)
+        return result.data or []
 
     async def get_user_situations_for_partner(
         self, user_id: str, partner_id: str
     ) -> List[Dict[str, Any]]:
         """Get user's selected situations for a specific partner."""
-        result = (
-            self.db.table(self.user_partner_units_table)
+        result = await self._execute(
+            self._reader().table(self.user_partner_units_table)
             .select("*, units!inner(*)")
             .eq("user_id", user_id)
             .eq("communication_partner_id", partner_id)
-            .order("priority")
-            .execute()
+            .order("priority"),
+            "select",
+            table=self.user_partner_units_table,
         )
         return result.data or []
 
     async def save_user_partner_situations(
         self, user_id: str, partner_id: str, unit_ids: List[str]
     ) -> List[Dict[str, Any]]:
-        """Save user's situation selections for a specific partner."""
-        # First, delete existing selections for this partner
-        self.db.table(self.user_partner_units_table).delete().eq("user_id", user_id).eq(
-            "communication_partner_id", partner_id
-        ).execute()
-
-        # Insert new selections with priority
-        records = []
-        for priority, unit_id in enumerate(unit_ids, start=1):
-            records.append(
+        """Replace user's situation selections for a partner, ranked by list order.
+
+        Runs the ``replace_user_partner_units`` database function, which applies
+        only the changed rows in one transaction and returns the final
+        selections ordered by priority.
+        """
+        result = await self._execute(
+            self.db.rpc(
+                "replace_user_partner_units",
                 {
-                    "user_id": user_id,
-                    "communication_partner_id": partner_id,
-                    "unit_id": unit_id,
-                    "priority": priority,
-                    "is_custom": False,
-                }
-            )
+                    "p_user_id": user_id,
+                    "p_partner_id": partner_id,
+                    "p_unit_ids": unit_ids,
+                },
+            ),
+            "rpc",
+            table="replace_user_partner_units",
+        )
+        await self._record_write(table=self.user_partner_units_table)
+        return result.data or []
 
-        if records:
-            result = (
-                self.db.table(self.user_partner_units_table).insert(records).execute()
+    async def get_user_selection_tree(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get user's selected partners with their ordered situations in one query.
+
+        Each row carries ``communication_partners`` (the partner record) with a
+        nested ``user_partner_units`` list of the user's situations for that
+        partner, ordered by priority, each with its ``units`` record.
+        """
+        result = await self._execute(
+            self._reader().table(self.user_partners_table)
+            .select(
+                "communication_partner_id, priority, "
+                "communication_partners!inner(*, "
+                "user_partner_units(unit_id, priority, units!inner(*)))"
             )
-            return result.data or []
-        return []
+            .eq("user_id", user_id)
+            .eq("communication_partners.user_partner_units.user_id", user_id)
+            .order("priority")
+            .order(
+                "priority", foreign_table="communication_partners.user_partner_units"
+            ),
+            "select",
+            table=self.user_partners_table,
+        )
+        partners = result.data or []
+        for partner in partners:
+            details = partner.get("communication_partners") or {}
+            partner["situations"] = details.pop("user_partner_units", None) or []
+        return partners
+
+    async def count_user_selected_partners(
+        self, user_id: str, primary: bool = False
+    ) -> int:
+        """Count user's selected communication partners without fetching them.
+
+        Pass ``primary=True`` when the count must see selections saved by an
+        earlier request, which the replica may not have applied yet.
+        """
+        result = await self._execute(
+            self._reader(primary).table(self.user_partners_table)
+            .select("communication_partner_id", count="exact", head=True)
+            .eq("user_id", user_id),
+            "count",
+            table=self.user_partners_table,
+        )
+        return result.count or 0
 
     async def get_user_complete_selections(self, user_id: str) -> Dict[str, Any]:
         """Get complete overview of user's selections."""
-        # Get partners with their situations
-        partners = await self.get_user_selected_partners(user_id)
+        partners = await self.get_user_selection_tree(user_id)
 
-        result = {"user_id": user_id, "partners": []}
-
-        for partner in partners:
-            partner_id = partner["communication_partner_id"]
-            situations = await self.get_user_situations_for_partner(user_id, partner_id)
-
-            result["partners"].append(
+        return {
+            "user_id": user_id,
+            "partners": [
                 {
                     "partner": partner["communication_partners"],
                     "priority": partner["priority"],
                     "situations": [
                         {"unit": sit["units"], "priority": sit["priority"]}
-                        for sit in situations
+                        for sit in partner["situations"]
                     ],
                 }
-            )
-
-        return result
+                for partner in partners
+            ],
+        }
     
     def _name_to_identifier(self, name: str) -> str:
         """Convert a name to a string identifier (lowercase, underscores)."""
-        return name.lower().replace(' ', '_').replace('-', '_')
+        return _name_to_identifier(name)
     
     async def get_unit_by_identifier(self, identifier: str) -> Optional[Dict[str, Any]]:
         """Get a specific unit by string identifier."""
-        units = await self.get_all_active_units()
-        for unit in units:
-            if unit['identifier'].lower() == identifier.lower():
-                return unit
-        return None
+        unit = (await self._units()).get("identifier", identifier.lower())
+        return dict(unit) if unit else None
     
     async def resolve_partner_identifiers(self, identifiers: List[str]) -> List[str]:
         """Convert partner identifiers to UUIDs for database operations."""
-        partners = await self.get_all_active_partners()
-        identifier_map = {p['identifier'].lower(): str(p['id']) for p in partners}
-        
-        resolved_ids = []
-        for identifier in identifiers:
-            uuid_id = identifier_map.get(identifier.lower())
-            if uuid_id:
-                resolved_ids.append(uuid_id)
-        return resolved_ids
+        partners = await self._partners()
+        resolved = (partners.get("identifier", i.lower()) for i in identifiers)
+        return [str(p['id']) for p in resolved if p]
     
     async def resolve_unit_identifiers(self, identifiers: List[str]) -> List[str]:
         """Convert unit identifiers to UUIDs for database operations."""
-        units = await self.get_all_active_units()
-        identifier_map = {u['identifier'].lower(): str(u['id']) for u in units}
-        
-        resolved_ids = []
-        for identifier in identifiers:
-            uuid_id = identifier_map.get(identifier.lower())
-            if uuid_id:
-                resolved_ids.append(uuid_id)
-        return resolved_ids
+        units = await self._units()
+        resolved = (units.get("identifier", i.lower()) for i in identifiers)
+        return [str(u['id']) for u in resolved if u]
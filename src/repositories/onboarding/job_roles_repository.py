@@ -1,5 +1,5 @@
-from typing import Optional, Dict, Any, List
-from supabase import Client
+from typing import AsyncIterator, Optional, Dict, Any, List
+from supabase import AsyncClient
 from ..base import SupabaseRepository
 from ...core.logging import get_logger
 
@@ -7,7 +7,9 @@ logger = get_logger(__name__)
 
 
 class JobRolesRepository(SupabaseRepository):
-    def __init__(self, db: Client):
+    INDEXING_COLUMNS = "id, title, description, industry_id, embedding_vector, is_system_role, industries!inner(id, name)"
+
+    def __init__(self, db: AsyncClient):
         super().__init__(db, "roles")
 
     async def get_roles_by_industry(self, industry_id: str) -> List[Dict[str, Any]]:
@@ -27,29 +29,41 @@ class JobRolesRepository(SupabaseRepository):
         }
         return await self.create(data)
 
+    async def get_roles_missing_embeddings(self) -> List[Dict[str, Any]]:
+        """Get the text columns of roles that have no embedding yet."""
+        return await self.get_all(
+            columns="id, title, description, industry_id",
+            is_null=["embedding_vector"],
+        )
+
     async def get_all_roles_for_indexing(self) -> List[Dict[str, Any]]:
         """Get all roles with industry information for Azure indexing."""
-        query = self.db.table(self.table_name).select(
-            "id, title, description, industry_id, embedding_vector, is_system_role, industries!inner(id, name)"
-        )
-        result = query.execute()
+        query = self._reader().table(self.table_name).select(self.INDEXING_COLUMNS)
+        result = await self._execute(query, "select")
 
         # Flatten the response
-        roles = []
-        for role in result.data:
-            roles.append(
-                {
-                    "id": role["id"],
-                    "title": role["title"],
-                    "description": role["description"],
-                    "industry_id": role["industry_id"],
-                    "industry_name": role["industries"]["name"],
-                    "embedding_vector": role["embedding_vector"],
-                    "is_system_role": role["is_system_role"],
-                }
-            )
+        return [self._flatten_indexing_row(role) for role in result.data]
 
-        return roles
+    async def iter_roles_for_indexing(
+        self, batch_size: int = 100
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Stream roles with industry information in fixed-size batches."""
+        async for rows in self.iter_batches(
+            batch_size=batch_size, columns=self.INDEXING_COLUMNS
+        ):
+            yield [self._flatten_indexing_row(role) for role in rows]
+
+    @staticmethod
+    def _flatten_indexing_row(role: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": role["id"],
+            "title": role["title"],
+            "description": role["description"],
+            "industry_id": role["industry_id"],
+            "industry_name": role["industries"]["name"],
+            "embedding_vector": role["embedding_vector"],
+            "is_system_role": role["is_system_role"],
+        }
 
     async def update_user_selected_role(
         self,
@@ -66,5 +80,11 @@ class JobRolesRepository(SupabaseRepository):
             "updated_at": "now()",
         }
 
-        result = self.db.table("users").update(data).eq("id", user_id).execute()
-        return result.data[0] if result.data else None
+        result = await self._execute(
+            self.db.table("users").update(data).eq("id", user_id),
+            "update",
+            table="users",
+        )
+        row = result.data[0] if result.data else None
+        await self._record_write(row, table="users", key=user_id)
+        return row
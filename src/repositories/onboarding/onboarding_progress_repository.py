@@ -1,5 +1,5 @@
-from typing import Optional, Dict, Any
-from supabase import Client
+from typing import Optional, Dict, Any, List, Sequence
+from supabase import AsyncClient
 from ..base import SupabaseRepository
 from ...core.logging import get_logger
 
@@ -9,20 +9,25 @@ logger = get_logger(__name__)
 class OnboardingProgressRepository(SupabaseRepository):
     """Repository for user onboarding progress operations."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         super().__init__(db, "user_onboarding_progress")
 
     async def get_user_progress(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get onboarding progress for a user."""
-        try:
-            result = (
-                self.db.table(self.table_name)
-                .select("*")
-                .eq("user_id", user_id)
-                .execute()
-            )
+        """Get onboarding progress for a user.
 
+        Always read from the primary: progress is read-modify-written and
+        must not be rebuilt from a lagging replica.
+        """
+
+        async def load() -> Optional[Dict[str, Any]]:
+            result = await self._execute(
+                self.db.table(self.table_name).select("*").eq("user_id", user_id),
+                "select",
+            )
             return result.data[0] if result.data else None
+
+        try:
+            return await self._load_row("user_id", user_id, load)
         except Exception as e:
             logger.error(f"Failed to get user progress: {str(e)}")
             return None
@@ -44,24 +49,128 @@ class OnboardingProgressRepository(SupabaseRepository):
 
         try:
             # Supabase Python client's upsert with on_conflict
-            result = (
-                self.db.table(self.table_name)
-                .upsert(progress_data, on_conflict="user_id")
-                .execute()
+            result = await self._execute(
+                self.db.table(self.table_name).upsert(
+                    progress_data, on_conflict="user_id"
+                ),
+                "upsert",
             )
 
             if not result.data:
                 raise Exception("Failed to upsert onboarding progress")
 
+            await self._record_write(result.data[0], key_field="user_id")
             return result.data[0]
         except Exception as e:
             logger.error(f"Failed to upsert progress: {str(e)}")
             raise
 
+    async def apply_action(
+        self,
+        user_id: str,
+        step: str,
+        step_order: Sequence[str],
+        action: Optional[str] = None,
+        action_data: Optional[Dict[str, Any]] = None,
+        completed: bool = False,
+    ) -> Dict[str, Any]:
+        """Record an onboarding action atomically in one round trip.
+
+        Calls the apply_onboarding_action function, which advances
+        current_step only forward along ``step_order`` and merges
+        ``action_data`` under ``action`` without rewriting the rest of the
+        data document. Returns the updated progress row.
+        """
+        try:
+            result = await self._execute(
+                self.db.rpc(
+                    "apply_onboarding_action",
+                    {
+                        "p_user_id": user_id,
+                        "p_step": step,
+                        "p_step_order": list(step_order),
+                        "p_action": action,
+                        "p_action_data": action_data,
+                        "p_completed": completed,
+                    },
+                ),
+                "rpc",
+                table="apply_onboarding_action",
+            )
+
+            row = result.data[0] if isinstance(result.data, list) else result.data
+            if not row:
+                raise Exception("Failed to apply onboarding action")
+
+            await self._record_write(row, key_field="user_id", table=self.table_name)
+            return row
+        except Exception as e:
+            logger.error(f"Failed to apply onboarding action: {str(e)}")
+            raise
+
+    async def merge_progress(
+        self, rows: List[Dict[str, Any]], step_order: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """Merge many progress rows without ever moving a user backwards.
+
+        Calls the merge_onboarding_progress function in one round trip: each
+        row's current_step is kept only if it is further along ``step_order``
+        than the stored one, completed is OR-ed, and each action's data entry
+        keeps the newer of the stored and given versions. Rows may therefore
+        be stale; rows read before the user's last reset (an older
+        reset_version) are skipped. At most one row per user. Returns the
+        merged rows.
+        """
+        try:
+            result = await self._execute(
+                self.db.rpc(
+                    "merge_onboarding_progress",
+                    {"p_rows": rows, "p_step_order": list(step_order)},
+                ),
+                "rpc",
+                table="merge_onboarding_progress",
+            )
+
+            merged = result.data or []
+            for row in merged:
+                await self._record_write(
+                    row, key_field="user_id", table=self.table_name
+                )
+            return merged
+        except Exception as e:
+            logger.error(f"Failed to merge onboarding progress: {str(e)}")
+            raise
+
+    async def reset_progress(self, user_id: str, step: str) -> Dict[str, Any]:
+        """Reset a user's progress to ``step`` and bump its reset_version.
+
+        Calls the reset_onboarding_progress function. Write-behind rows read
+        before the reset carry the old version and are skipped by
+        ``merge_progress``. Returns the reset row.
+        """
+        try:
+            result = await self._execute(
+                self.db.rpc(
+                    "reset_onboarding_progress", {"p_user_id": user_id, "p_step": step}
+                ),
+                "rpc",
+                table="reset_onboarding_progress",
+            )
+
+            row = result.data[0] if isinstance(result.data, list) else result.data
+            if not row:
+                raise Exception("Failed to reset onboarding progress")
+
+            await self._record_write(row, key_field="user_id", table=self.table_name)
+            return row
+        except Exception as e:
+            logger.error(f"Failed to reset progress: {str(e)}")
+            raise
+
     async def mark_completed(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Mark onboarding as completed for a user."""
         try:
-            result = (
+            result = await self._execute(
                 self.db.table(self.table_name)
                 .update(
                     {
@@ -70,11 +179,13 @@ class OnboardingProgressRepository(SupabaseRepository):
                         "updated_at": "now()",
                     }
                 )
-                .eq("user_id", user_id)
-                .execute()
+                .eq("user_id", user_id),
+                "update",
             )
 
-            return result.data[0] if result.data else None
+            row = result.data[0] if result.data else None
+            await self._record_write(row, key_field="user_id")
+            return row
         except Exception as e:
             logger.error(f"Failed to mark completed: {str(e)}")
             return None
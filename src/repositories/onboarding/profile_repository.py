@@ -1,11 +1,33 @@
 from typing import Optional, Dict, Any
-from supabase import Client
+from supabase import AsyncClient
 from ..base import SupabaseRepository
+from ...core.cache import ReferenceCache, ReferenceSnapshot
+from ...core.config import settings
 from ...models.enums import NativeLanguage, Industry
 
+# Map enum values to database names
+INDUSTRY_NAMES = {
+    Industry.BANKING_FINANCE: "Banking & Finance",
+    Industry.SHIPPING_LOGISTICS: "Shipping & Logistics",
+    Industry.REAL_ESTATE: "Real Estate",
+    Industry.HOTELS_HOSPITALITY: "Hotels & Hospitality",
+}
+_INDUSTRIES_BY_NAME = {name: industry for industry, name in INDUSTRY_NAMES.items()}
+
+# Industries (enum <-> id <-> name), preloaded at startup and refreshed on an interval
+industry_cache = ReferenceCache(
+    "industries",
+    settings.REFERENCE_DATA_TTL,
+    {
+        "id": lambda row: str(row["id"]),
+        "name": lambda row: row["name"],
+        "enum": lambda row: _INDUSTRIES_BY_NAME.get(row["name"]),
+    },
+)
+
 
 class ProfileRepository(SupabaseRepository):
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         super().__init__(db, "users")
 
     async def get_user_by_auth0_id(self, auth0_id: str) -> Optional[Dict[str, Any]]:
@@ -21,38 +43,43 @@ class ProfileRepository(SupabaseRepository):
 
     async def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile with onboarding-related fields."""
-        result = (
-            self.db.table(self.table_name)
+        result = await self._execute(
+            self._reader()
+            .table(self.table_name)
             .select(
                 "id, full_name, email, native_language, industry_id, selected_role_id, onboarding_status, hierarchy_level, created_at, updated_at"
             )
-            .eq("id", user_id)
-            .execute()
+            .eq("id", user_id),
+            "select",
         )
         return result.data[0] if result.data else None
 
+    async def _load_industries(self):
+        result = await self._execute(
+            self._reader().table("industries").select("id, name, status"),
+            "select",
+            table="industries",
+        )
+        return result.data or []
+
+    async def _industries(self) -> ReferenceSnapshot:
+        return await industry_cache.get(self._load_industries)
+
+    async def refresh_industries(self) -> ReferenceSnapshot:
+        """Reload the cached industries map now."""
+        return await industry_cache.refresh(self._load_industries)
+
+    async def get_industry_by_id(self, industry_id: str) -> Optional[Dict[str, Any]]:
+        """Get industry details by ID from the cached industries map."""
+        industry = (await self._industries()).get("id", str(industry_id))
+        return dict(industry) if industry else None
+
     async def get_industry_id_by_name(self, industry: Industry) -> Optional[str]:
         """Get industry ID by matching industry enum to database name."""
-        # Map enum values to database names
-        industry_mapping = {
-            Industry.BANKING_FINANCE: "Banking & Finance",
-            Industry.SHIPPING_LOGISTICS: "Shipping & Logistics",
-            Industry.REAL_ESTATE: "Real Estate",
-            Industry.HOTELS_HOSPITALITY: "Hotels & Hospitality",
-        }
-
-        industry_name = industry_mapping.get(industry)
-        if not industry_name:
+        row = (await self._industries()).get("enum", industry)
+        if not row or row.get("status") != "available":
             return None
-
-        result = (
-            self.db.table("industries")
-            .select("id")
-            .eq("name", industry_name)
-            .eq("status", "available")
-            .execute()
-        )
-        return result.data[0]["id"] if result.data else None
+        return row["id"]
 
     async def update_industry(
         self, user_id: str, industry_id: str
@@ -0,0 +1,11 @@
+from typing import Dict
+from supabase import AsyncClient
+from .communication_repository import CommunicationRepository
+from .profile_repository import ProfileRepository
+
+
+async def refresh_reference_data(db: AsyncClient) -> Dict[str, int]:
+    """Reload every onboarding reference snapshot; returns their versions."""
+    versions = await CommunicationRepository(db).refresh_reference_data()
+    industries = await ProfileRepository(db).refresh_industries()
+    return {**versions, "industries_version": industries.version}
@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional, List
-from supabase import Client
+from supabase import AsyncClient
 from ..base import SupabaseRepository
 from ...core.exceptions import DatabaseError
 
@@ -7,7 +7,7 @@ from ...core.exceptions import DatabaseError
 class UserRepository(SupabaseRepository):
     """Repository for user data operations."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         super().__init__(db, "users")
 
     async def get_by_auth0_id(self, auth0_id: str) -> Optional[Dict[str, Any]]:
@@ -62,6 +62,26 @@ class UserRepository(SupabaseRepository):
                 filters={"is_active": True},
                 order_by="created_at",
                 order_desc=True,
+                count="planned",
+            )
+        except Exception as e:
+            raise DatabaseError(f"Failed to get active users: {str(e)}")
+
+    async def get_active_users_after(
+        self, cursor: Optional[str] = None, limit: int = 100
+    ) -> Dict[str, Any]:
+        """Get active users by keyset pagination.
+
+        Pass the previous page's ``next_cursor`` to continue; deep pages cost
+        the same as the first.
+        """
+        try:
+            return await self.paginate_keyset(
+                page_size=limit,
+                cursor=cursor,
+                filters={"is_active": True},
+                order_desc=True,
+                count="planned",
             )
         except Exception as e:
             raise DatabaseError(f"Failed to get active users: {str(e)}")
@@ -18,8 +18,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
     data: List[T]
     page: int
     page_size: int
-    total_count: int
-    total_pages: int
+    total_count: Optional[int] = None
+    total_pages: Optional[int] = None
     has_next: bool
     has_prev: bool
 
@@ -62,7 +62,7 @@ class SortParams(BaseModel):
 
     sort_by: str = Field(default="created_at", description="Field to sort by")
     sort_order: str = Field(
-        default="desc", regex="^(asc|desc)$", description="Sort order"
+        default="desc", pattern="^(asc|desc)$", description="Sort order"
     )
 
 
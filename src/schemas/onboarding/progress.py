@@ -18,6 +18,20 @@ class OnboardingStep(str):
     COMPLETED = "completed"
 
 
+# Steps in the order a user moves through them; progress never moves back
+STEP_ORDER = [
+    OnboardingStep.NOT_STARTED,
+    OnboardingStep.NATIVE_LANGUAGE,
+    OnboardingStep.INDUSTRY_SELECTION,
+    OnboardingStep.ROLE_INPUT,
+    OnboardingStep.ROLE_SELECTION,
+    OnboardingStep.COMMUNICATION_PARTNERS,
+    OnboardingStep.SITUATION_SELECTION,
+    OnboardingStep.SUMMARY,
+    OnboardingStep.COMPLETED,
+]
+
+
 class OnboardingProgress(BaseModel):
     """Onboarding progress model."""
 
@@ -9,16 +9,26 @@ from ...utils.validators import (
     normalize_email,
     sanitize_string,
 )
-from supabase import Client
+from supabase import AsyncClient
+from ...core.cache import TTLCache
+from ...core.config import settings
 from ...core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Users whose onboarding progress row is known to exist, so the backwards
+# compatibility check in get_or_create_user can skip the database. Kept no
+# longer than cached user rows, as a reset or deletion on another instance
+# is not seen here
+_progress_verified = TTLCache(
+    maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL
+)
+
 
 class AuthService:
     """Centralized authentication service for user auth operations"""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.db = db
         self.auth0_client = Auth0ManagementClient()
         self.user_service = UserService(db)
@@ -140,6 +150,9 @@ class AuthService:
             existing_user = await self.get_user_by_auth0_id(auth0_id)
 
             if existing_user:
+                if existing_user["id"] in _progress_verified:
+                    return existing_user
+
                 # Check if they have onboarding progress (for backwards compatibility)
                 try:
                     progress = (
@@ -158,6 +171,7 @@ class AuthService:
                         logger.info(
                             f"Created onboarding progress for existing user {existing_user['id']}"
                         )
+                    _progress_verified.set(existing_user["id"], True)
                 except Exception as e:
                     logger.error(
                         f"Failed to check/create progress for existing user: {str(e)}"
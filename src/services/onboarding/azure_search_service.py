@@ -1,5 +1,6 @@
+import asyncio
 from typing import Dict, Any
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.job_roles_repository import JobRolesRepository
 from ...integrations.openai import openai_client
 from ...integrations.azure_search import azure_search_client
@@ -11,18 +12,23 @@ logger = get_logger(__name__)
 class AzureSearchService:
     """Service for managing Azure Search operations."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.db = db
         self.job_roles_repo = JobRolesRepository(db)
 
-    async def reindex_all_roles(self) -> Dict[str, Any]:
-        """Reindex all roles in Azure Search."""
+    async def reindex_all_roles(self, batch_size: int = 100) -> Dict[str, Any]:
+        """Reindex all roles in Azure Search.
+
+        Roles are streamed page by page and uploaded as a pipeline: the next
+        page is fetched while the current batch is uploading, and at most a
+        couple of pages are held in memory.
+        """
         try:
-            # Get all roles with industry information
-            logger.info("Fetching all roles for reindexing")
-            roles = await self.job_roles_repo.get_all_roles_for_indexing()
+            logger.info("Streaming roles for reindexing")
+            batches = self.job_roles_repo.iter_roles_for_indexing(batch_size)
 
-            if not roles:
+            first_batch = await anext(batches, None)
+            if first_batch is None:
                 return {
                     "success": True,
                     "message": "No roles to index",
@@ -30,44 +36,53 @@ class AzureSearchService:
                     "documents_indexed": 0,
                 }
 
-            # Prepare documents for Azure Search
-            documents = []
-            for role in roles:
-                if role.get("embedding_vector"):
-                    # Create search keywords by combining title and industry
-                    search_keywords = f"{role['title']} {role['industry_name']}"
-
-                    documents.append(
-                        {
-                            "id": role["id"],
-                            "title": role["title"],
-                            "description": role["description"],
-                            "search_keywords": search_keywords,
-                            "industry_id": role["industry_id"],
-                            "industry_name": role["industry_name"],
-                            "is_system_role": role["is_system_role"],
-                            "embedding": role["embedding_vector"],
-                        }
-                    )
-
             # Clear existing index
             logger.info("Clearing existing index")
             await azure_search_client.delete_all_documents()
 
-            # Upload documents in batches of 100
-            batch_size = 100
-            total_indexed = 0
+            # Bounded hand-off between the fetching and uploading stages
+            queue: asyncio.Queue = asyncio.Queue(maxsize=2)
 
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i : i + batch_size]
-                await azure_search_client.upload_documents(batch)
-                total_indexed += len(batch)
-                logger.info(f"Indexed {total_indexed}/{len(documents)} documents")
+            async def fetch_pages():
+                try:
+                    await queue.put(first_batch)
+                    async for batch in batches:
+                        await queue.put(batch)
+                except asyncio.CancelledError:
+                    # The uploader stopped reading; a sentinel could block
+                    raise
+                except Exception:
+                    await queue.put(None)
+                    raise
+                await queue.put(None)
+
+            producer = asyncio.create_task(fetch_pages())
+            total_roles = 0
+            total_indexed = 0
+            try:
+                while (roles := await queue.get()) is not None:
+                    total_roles += len(roles)
+                    documents = [
+                        self._to_search_document(role)
+                        for role in roles
+                        if role.get("embedding_vector")
+                    ]
+                    if documents:
+                        await azure_search_client.upload_documents(documents)
+                        total_indexed += len(documents)
+                    logger.info(
+                        f"Indexed {total_indexed} documents ({total_roles} roles read)"
+                    )
+                await producer
+            finally:
+                if not producer.done():
+                    producer.cancel()
+                    await asyncio.gather(producer, return_exceptions=True)
 
             return {
                 "success": True,
                 "message": f"Successfully reindexed {total_indexed} roles",
-                "total_roles": len(roles),
+                "total_roles": total_roles,
                 "documents_indexed": total_indexed,
             }
 
@@ -75,17 +90,30 @@ class AzureSearchService:
             logger.error(f"Reindexing failed: {str(e)}")
             raise
 
+    @staticmethod
+    def _to_search_document(role: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a role row to an Azure Search document."""
+        # Create search keywords by combining title and industry
+        search_keywords = f"{role['title']} {role['industry_name']}"
+        return {
+            "id": role["id"],
+            "title": role["title"],
+            "description": role["description"],
+            "search_keywords": search_keywords,
+            "industry_id": role["industry_id"],
+            "industry_name": role["industry_name"],
+            "is_system_role": role["is_system_role"],
+            "embedding": role["embedding_vector"],
+        }
+
     async def generate_missing_embeddings(self) -> Dict[str, Any]:
         """Generate embeddings for roles that don't have them."""
         try:
-            # Get all roles
+            # Fetch only the text columns of roles without embeddings
             logger.info("Fetching roles without embeddings")
-            all_roles = await self.job_roles_repo.get_all()
-
-            # Filter roles without embeddings
-            roles_without_embeddings = [
-                role for role in all_roles if not role.get("embedding_vector")
-            ]
+            roles_without_embeddings = (
+                await self.job_roles_repo.get_roles_missing_embeddings()
+            )
 
             if not roles_without_embeddings:
                 return {
@@ -94,36 +122,44 @@ class AzureSearchService:
                     "embeddings_generated": 0,
                 }
 
-            # Generate embeddings
-            embeddings_generated = 0
-            for role in roles_without_embeddings:
-                try:
-                    # Combine title and description for embedding
-                    text = f"Job Title: {role['title']}\n\nDescription: {role.get('description', '')}"
-
-                    # Generate embedding
-                    embedding = await openai_client.generate_embedding(text)
-
-                    # Update role with embedding
-                    await self.job_roles_repo.update(
-                        role["id"], {"embedding_vector": embedding}
-                    )
-
-                    embeddings_generated += 1
-                    logger.info(
-                        f"Generated embedding for role {role['id']} ({embeddings_generated}/{len(roles_without_embeddings)})"
-                    )
+            # Generate embeddings in batches, one OpenAI call per batch, and
+            # store each batch as soon as it returns
+            batch_size = 100
+            stored = 0
+            for i in range(0, len(roles_without_embeddings), batch_size):
+                batch = roles_without_embeddings[i : i + batch_size]
+                texts = [
+                    f"Job Title: {role['title']}\n\nDescription: {role.get('description', '')}"
+                    for role in batch
+                ]
 
+                try:
+                    embeddings = await openai_client.generate_embeddings_batch(texts)
                 except Exception as e:
                     logger.error(
-                        f"Failed to generate embedding for role {role['id']}: {str(e)}"
+                        f"Failed to generate embeddings for roles {i}-{i + len(batch)}: {str(e)}"
                     )
                     continue
 
+                updates = [
+                    {"id": role["id"], "embedding_vector": embedding}
+                    for role, embedding in zip(batch, embeddings)
+                ]
+                result = await self.job_roles_repo.bulk_update_by_id(updates)
+                for error in result.errors:
+                    logger.error(
+                        f"Failed to store embeddings for roles {i}-{i + len(batch)}: "
+                        f"{error['error']}"
+                    )
+                stored += result.succeeded
+                logger.info(
+                    f"Stored embeddings for {stored}/{len(roles_without_embeddings)} roles"
+                )
+
             return {
                 "success": True,
-                "message": f"Generated {embeddings_generated} embeddings",
-                "embeddings_generated": embeddings_generated,
+                "message": f"Generated {stored} embeddings",
+                "embeddings_generated": stored,
                 "total_without_embeddings": len(roles_without_embeddings),
             }
 
@@ -1,5 +1,5 @@
 from typing import List, Dict, Any
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.communication_repository import CommunicationRepository
 from ...repositories.onboarding.profile_repository import ProfileRepository
 from ...core.exceptions import DatabaseError
@@ -11,7 +11,7 @@ logger = get_logger(__name__)
 class CommunicationService:
     """Service for managing communication partner and situation selections."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.comm_repo = CommunicationRepository(db)
         self.profile_repo = ProfileRepository(db)
 
@@ -92,7 +92,7 @@ class CommunicationService:
                 user_id=user["id"], partner_id=partner_uuid
             )
             # Convert selected UUIDs back to identifiers
-            selected_unit_ids = [s["unit_id"] for s in selected]
+            selected_unit_ids = {str(s["unit_id"]) for s in selected}
             selected_identifiers = []
             for situation in all_situations:
                 if str(situation["id"]) in selected_unit_ids:
@@ -190,8 +190,11 @@ class CommunicationService:
                 raise DatabaseError("User not found")
 
             # Verify user has made selections
-            summary = await self.get_user_selections_summary(auth0_id)
-            if summary["total_partners_selected"] == 0:
+            # From the primary: the selections were saved by an earlier request
+            selected = await self.comm_repo.count_user_selected_partners(
+                user["id"], primary=True
+            )
+            if selected == 0:
                 raise ValueError("No communication partners selected")
 
             # No longer update onboarding_status in users table
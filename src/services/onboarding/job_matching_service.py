@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.job_roles_repository import JobRolesRepository
 from ...repositories.onboarding.profile_repository import ProfileRepository
 from ...integrations.openai import openai_client
@@ -12,7 +12,7 @@ logger = get_logger(__name__)
 
 
 class JobMatchingService:
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.job_roles_repo = JobRolesRepository(db)
         self.profile_repo = ProfileRepository(db)
 
@@ -138,13 +138,8 @@ class JobMatchingService:
         """Index a single role in Azure Search."""
         try:
             # Get industry name
-            industry = (
-                await self.profile_repo.db.table("industries")
-                .select("name")
-                .eq("id", industry_id)
-                .execute()
-            )
-            industry_name = industry.data[0]["name"] if industry.data else "Unknown"
+            industry = await self.profile_repo.get_industry_by_id(industry_id)
+            industry_name = industry["name"] if industry else "Unknown"
 
             document = {
                 "id": role["id"],
@@ -1,10 +1,13 @@
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.onboarding_progress_repository import (
     OnboardingProgressRepository,
 )
 from ...repositories.onboarding.profile_repository import ProfileRepository
-from ...core.redis_client import onboarding_redis
+from ...core.progress_cache import progress_cache
+from ...schemas.onboarding.progress import STEP_ORDER
+from .progress_writer import progress_writer
 from ...core.logging import get_logger
 from ...core.exceptions import DatabaseError, UserNotFoundError
 
@@ -15,17 +18,7 @@ class OnboardingProgressService:
     """Service for managing onboarding progress tracking."""
 
     # Step progression mapping
-    STEP_ORDER = [
-        "not_started",
-        "native_language",
-        "industry_selection",
-        "role_input",
-        "role_selection",
-        "communication_partners",
-        "situation_selection",
-        "summary",
-        "completed",
-    ]
+    STEP_ORDER = STEP_ORDER
 
     # Map API actions to progress steps
     ACTION_TO_STEP = {
@@ -39,7 +32,8 @@ class OnboardingProgressService:
         "complete_onboarding": "completed",
     }
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
+        self.db = db
         self.progress_repo = OnboardingProgressRepository(db)
         self.profile_repo = ProfileRepository(db)
 
@@ -51,30 +45,12 @@ class OnboardingProgressService:
             if not user:
                 raise UserNotFoundError(f"User not found: {auth0_id}")
 
-            # Check Redis cache first
-            cached_progress = onboarding_redis.get_progress(user["id"])
-            if cached_progress:
-                # Extend TTL for active user
-                onboarding_redis.extend_ttl(user["id"])
-                return cached_progress
-
-            # Fallback to database
-            progress = await self.progress_repo.get_user_progress(user["id"])
-
-            if not progress:
-                # Create initial progress record
-                progress = await self.progress_repo.upsert_progress(
-                    user_id=user["id"],
-                    current_step="not_started",
-                    data={},
-                    completed=False,
-                )
-
-            # Cache in Redis
-            if progress:
-                onboarding_redis.set_progress(user["id"], progress)
-
-            return progress
+            # Check the in-process and Redis caches first; concurrent misses
+            # for a user share one database load
+            # (a Redis read also extends the TTL for active users)
+            return await progress_cache.get_or_load(
+                user["id"], lambda: self._load_progress(user["id"])
+            )
 
         except UserNotFoundError:
             raise
@@ -82,6 +58,21 @@ class OnboardingProgressService:
             logger.error(f"Failed to get onboarding progress: {str(e)}")
             raise DatabaseError(f"Failed to retrieve progress: {str(e)}")
 
+    async def _load_progress(self, user_id: str) -> Dict[str, Any]:
+        """Load progress from the database, creating the initial record."""
+        progress = await self.progress_repo.get_user_progress(user_id)
+
+        if not progress:
+            # Create initial progress record
+            progress = await self.progress_repo.upsert_progress(
+                user_id=user_id,
+                current_step="not_started",
+                data={},
+                completed=False,
+            )
+
+        return progress
+
     async def update_progress_on_action(
         self, auth0_id: str, action: str, action_data: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -92,48 +83,72 @@ class OnboardingProgressService:
             if not user:
                 raise UserNotFoundError(f"User not found: {auth0_id}")
 
-            # Get current progress
-            current_progress = await self.get_user_progress(auth0_id)
-
             # Determine new step based on action
             new_step = self.ACTION_TO_STEP.get(action)
             if not new_step:
                 logger.warning(f"Unknown action: {action}")
-                return current_progress
-
-            # Check if this is forward progress
-            current_index = self.STEP_ORDER.index(current_progress["current_step"])
-            new_index = self.STEP_ORDER.index(new_step)
-
-            # Only update step if moving forward
-            if new_index > current_index:
-                progress_step = new_step
-            else:
-                progress_step = current_progress["current_step"]
-
-            # Merge action data into existing data
-            updated_data = current_progress.get("data", {})
-            if action_data:
-                # Add timestamp for tracking
-                action_data["updated_at"] = "now()"
-                updated_data[action] = action_data
+                return await self.get_user_progress(auth0_id)
 
             # Check if completed
             is_completed = new_step == "completed"
 
-            # Update in database
-            updated_progress = await self.progress_repo.upsert_progress(
-                user_id=user["id"],
-                current_step=progress_step,
-                data=updated_data,
-                completed=is_completed,
-            )
+            updated_progress = None
+            if progress_writer.enabled and not is_completed:
+                # Write-behind: merge into the cached progress, Supabase on the
+                # next flush
+                # Read-modify-write must not start from another worker's
+                # stale local copy, so skip the in-process tier
+                current_progress = await progress_cache.get_progress(
+                    user["id"], local=False
+                ) or await self.get_user_progress(auth0_id)
+                updated_progress = await progress_writer.enqueue(
+                    user["id"],
+                    {
+                        **self._merge_action(
+                            current_progress, new_step, action, action_data
+                        ),
+                        "user_id": user["id"],
+                    },
+                    action,
+                    step_order=self.STEP_ORDER,
+                )
+                if updated_progress is not None:
+                    await progress_cache.changed(user["id"], updated_progress)
+
+            if updated_progress is None:
+                if progress_writer.enabled:
+                    # Persist this user's pending write-behind updates before
+                    # merging
+                    await progress_writer.flush_user(self.db, user["id"])
+
+                # Merged server-side in one atomic round trip; completion is
+                # durable on return
+                updated_progress = await self.progress_repo.apply_action(
+                    user_id=user["id"],
+                    step=new_step,
+                    step_order=self.STEP_ORDER,
+                    action=action,
+                    action_data=action_data,
+                    completed=is_completed,
+                )
 
-            # Update Redis cache
-            onboarding_redis.set_progress(user["id"], updated_progress)
+                # Update only the fields this action changed in the cache
+                if not await progress_cache.update_progress(
+                    user["id"],
+                    {
+                        column: updated_progress.get(column)
+                        for column in ("current_step", "completed", "updated_at")
+                    },
+                    action=action,
+                    action_data=(updated_progress.get("data") or {}).get(action),
+                    progress=updated_progress,
+                    step_order=self.STEP_ORDER,
+                ):
+                    await progress_cache.set_progress(user["id"], updated_progress)
 
             logger.info(
-                f"Updated progress for user {user['id']}: action={action}, step={progress_step}"
+                f"Updated progress for user {user['id']}: action={action}, "
+                f"step={updated_progress['current_step']}"
             )
 
             return updated_progress
@@ -144,6 +159,38 @@ class OnboardingProgressService:
             logger.error(f"Failed to update onboarding progress: {str(e)}")
             raise DatabaseError(f"Failed to update progress: {str(e)}")
 
+    def _merge_action(
+        self,
+        progress: Dict[str, Any],
+        step: str,
+        action: str,
+        action_data: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Apply an action to a snapshot of a progress row.
+
+        Builds the write-behind update: the step only moves forward from the
+        snapshot, completion never reverts, and the action data is stored
+        under its own key. The snapshot may be stale, so the forward-only
+        rule is enforced again against the cached step when it is written.
+        """
+        current_step = progress.get("current_step", "not_started")
+        if self.STEP_ORDER.index(step) > self.STEP_ORDER.index(current_step):
+            current_step = step
+
+        data = dict(progress.get("data") or {})
+        if action_data:
+            data[action] = {
+                **action_data,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+
+        return {
+            **progress,
+            "current_step": current_step,
+            "data": data,
+            "completed": bool(progress.get("completed")) or step == "completed",
+        }
+
     async def get_next_step(self, auth0_id: str) -> str:
         """Get the next step for the user to complete."""
         try:
@@ -170,13 +217,19 @@ class OnboardingProgressService:
             if not user:
                 raise UserNotFoundError(f"User not found: {auth0_id}")
 
-            # Reset in database
-            reset_progress = await self.progress_repo.upsert_progress(
-                user_id=user["id"], current_step="not_started", data={}, completed=False
+            # Reset in database; bumping reset_version makes the write-behind
+            # merge skip any cache or stream state read before the reset
+            reset_progress = await self.progress_repo.reset_progress(
+                user["id"], "not_started"
             )
 
-            # Clear Redis cache
-            onboarding_redis.delete_progress(user["id"])
+            if progress_writer.enabled:
+                # Overwrite rather than clear, so pending write-behind updates
+                # are flushed as the reset state
+                await progress_cache.set_progress(user["id"], reset_progress)
+            else:
+                # Clear Redis cache
+                await progress_cache.delete_progress(user["id"])
 
             logger.info(f"Reset onboarding progress for user {user['id']}")
 
@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.profile_repository import ProfileRepository
 from ...models.enums import NativeLanguage, Industry
 from ...core.exceptions import UserNotFoundError, DatabaseError
@@ -9,7 +9,7 @@ logger = get_logger(__name__)
 
 
 class ProfileService:
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.profile_repo = ProfileRepository(db)
 
     async def update_native_language(
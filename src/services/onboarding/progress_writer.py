@@ -0,0 +1,367 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from supabase import AsyncClient
+from ...repositories.onboarding.onboarding_progress_repository import (
+    OnboardingProgressRepository,
+)
+from ...core.codec import cache_codec
+from ...core.config import settings
+from ...core.logging import get_logger
+from ...core.metrics import metrics
+from ...core.redis_client import onboarding_redis
+from ...schemas.onboarding.progress import STEP_ORDER
+
+logger = get_logger(__name__)
+
+# reset_version lets the merge skip state read before the user's last reset
+PROGRESS_COLUMNS = ("user_id", "current_step", "data", "completed", "reset_version")
+
+progress_flushed_total = metrics.counter(
+    "progress_write_behind_flushed_total", "Progress rows merged by the flusher"
+)
+progress_events_total = metrics.counter(
+    "progress_write_behind_events_total", "Progress updates appended to the stream"
+)
+progress_flush_lag_seconds = metrics.gauge(
+    "progress_write_behind_lag_seconds",
+    "Age of the oldest update written by the last flush",
+)
+progress_stream_length = metrics.gauge(
+    "progress_write_behind_stream_length",
+    "Entries left in the progress stream after the last flush",
+)
+
+
+# Append an entry and index its id under the user, so one user's pending
+# entries can be found without scanning the stream.
+# KEYS: stream, user index. ARGV: user id, payload, index TTL.
+APPEND_ENTRY = """
+local id = redis.call('XADD', KEYS[1], '*', 'user_id', ARGV[1], 'progress', ARGV[2])
+redis.call('SADD', KEYS[2], id)
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return id
+"""
+
+
+def _entry_order(entry_id: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in entry_id.split("-"))
+
+
+def _text(value: Any) -> str:
+    # Stream ids and field names are returned as bytes
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class ProgressWriteBehind:
+    """Write-behind persistence of onboarding progress.
+
+    Updates are applied to the Redis progress cache and appended to a Redis
+    stream in one transaction, so the request does not wait for Supabase.
+    The flusher reads the stream through a consumer group, coalesces the
+    updates per user and merges the latest state in one batch, acknowledging
+    entries only once the write succeeded. The merge only moves progress
+    forward, so a row read before a newer synchronous write cannot revert
+    it. Entries left pending by a worker that died are claimed after
+    PROGRESS_FLUSH_CLAIM_IDLE seconds.
+
+    The stream is never trimmed: entries are deleted only once written, and
+    a backlog beyond PROGRESS_STREAM_ALERT_LENGTH is reported instead. Each
+    user's pending entry ids are also kept in a set next to the stream, so
+    ``flush_user`` reads only that user's entries.
+    """
+
+    def __init__(self, stream: str, group: str):
+        self.stream = stream
+        self.group = group
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+        self._lock = asyncio.Lock()
+        self._append_script = None
+        self._script_client = None
+
+    def _redis(self):
+        return onboarding_redis.redis_client
+
+    def _append(self, client):
+        # Scripts are bound to the client they were registered on
+        if self._script_client is not client:
+            self._append_script = client.register_script(APPEND_ENTRY)
+            self._script_client = client
+        return self._append_script
+
+    def _index(self, user_id: str) -> str:
+        return f"{self.stream}:pending:{user_id}"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PROGRESS_WRITE_BEHIND and self._redis() is not None
+
+    async def enqueue(
+        self,
+        user_id: str,
+        progress: Dict[str, Any],
+        action: Optional[str] = None,
+        step_order: Optional[Sequence[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Update the cached progress and append it to the stream.
+
+        Only the step and ``action``'s data field are written to the cache;
+        with ``step_order`` the step is only moved forward, atomically against
+        the cached one. Completion is never written here. Returns ``progress``
+        with the step now cached, or None when Redis is unavailable; the
+        caller must then write to the database itself.
+        """
+        client = self._redis()
+        if not client:
+            return None
+
+        try:
+            payload = cache_codec.encode(
+                {column: progress.get(column) for column in PROGRESS_COLUMNS}
+            )
+            pipe = client.pipeline(transaction=True)
+            await onboarding_redis.update_progress(
+                user_id,
+                {"current_step": progress.get("current_step")},
+                action=action,
+                action_data=(progress.get("data") or {}).get(action),
+                step_order=step_order,
+                pipe=pipe,
+            )
+            await self._append(client)(
+                keys=[self.stream, self._index(user_id)],
+                args=[user_id, payload, onboarding_redis.ttl],
+                client=pipe,
+            )
+            cached_step = (await pipe.execute())[0]
+            progress_events_total.inc()
+        except Exception as e:
+            logger.error(f"Failed to enqueue progress for user {user_id}: {e}")
+            return None
+
+        if isinstance(cached_step, bytes):
+            progress = {**progress, "current_step": cache_codec.decode(cached_step)}
+        return progress
+
+    async def _ensure_group(self, client) -> None:
+        if self._group_ready:
+            return
+        try:
+            await client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def _read_batch(self, client) -> List[Tuple[str, Dict[str, bytes]]]:
+        """Take over stale pending entries, then read new ones."""
+        count = settings.PROGRESS_FLUSH_BATCH
+        claimed = await client.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=int(settings.PROGRESS_FLUSH_CLAIM_IDLE * 1000),
+            start_id="0-0",
+            count=count,
+        )
+        entries = list(claimed[1]) if claimed else []
+        if len(entries) < count:
+            response = await client.xreadgroup(
+                self.group,
+                self.consumer,
+                {self.stream: ">"},
+                count=count - len(entries),
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+        return [
+            (_text(entry_id), {_text(k): v for k, v in (fields or {}).items()})
+            for entry_id, fields in entries
+        ]
+
+    async def _latest_rows(
+        self, entries: List[Tuple[str, Dict[str, bytes]]]
+    ) -> List[Dict[str, Any]]:
+        """Coalesce entries into one row per user holding their newest state.
+
+        The progress cache is preferred over the stream payload: it always
+        holds the latest update, including writes that bypassed the stream.
+        Either may still be older than the database row; ``merge_progress``
+        keeps whichever state is further along.
+        """
+        payloads: Dict[str, bytes] = {}
+        for _, fields in entries:
+            if fields.get("user_id"):
+                payloads[_text(fields["user_id"])] = fields["progress"]
+
+        user_ids = list(payloads)
+        try:
+            cached = await onboarding_redis.get_many_progress(user_ids)
+        except Exception as e:
+            logger.warning(f"Progress cache unavailable, flushing stream payloads: {e}")
+            cached = [None] * len(user_ids)
+
+        rows = []
+        for user_id, current in zip(user_ids, cached):
+            progress = current or cache_codec.decode(payloads[user_id])
+            row = {column: progress.get(column) for column in PROGRESS_COLUMNS}
+            row["user_id"] = user_id
+            rows.append(row)
+        return rows
+
+    async def flush(self, db: AsyncClient) -> int:
+        """Write every pending update to Supabase; returns rows merged."""
+        client = self._redis()
+        if not client:
+            return 0
+
+        flushed = 0
+        async with self._lock:
+            await self._ensure_group(client)
+            while True:
+                entries = await self._read_batch(client)
+                if not entries:
+                    break
+
+                rows = await self._latest_rows(entries)
+                if rows:
+                    try:
+                        await OnboardingProgressRepository(db).merge_progress(
+                            rows, STEP_ORDER
+                        )
+                    except Exception as e:
+                        # Leave the entries pending; they are claimed again later
+                        logger.error(f"Progress flush failed for {len(rows)} rows: {e}")
+                        break
+
+                ids = [entry_id for entry_id, _ in entries]
+                await client.xack(self.stream, self.group, *ids)
+                await client.xdel(self.stream, *ids)
+                await self._unindex(client, entries)
+
+                oldest_ms = min(int(entry_id.split("-")[0]) for entry_id in ids)
+                progress_flush_lag_seconds.set(time.time() - oldest_ms / 1000)
+                progress_flushed_total.inc(len(rows))
+                flushed += len(rows)
+
+                if len(entries) < settings.PROGRESS_FLUSH_BATCH:
+                    break
+
+            await self._check_backlog(client)
+
+        if flushed:
+            logger.debug(f"Flushed {flushed} onboarding progress rows")
+        return flushed
+
+    async def flush_user(self, db: AsyncClient, user_id: str) -> int:
+        """Write one user's pending updates to Supabase; returns rows merged.
+
+        Only this user's stream entries are read, merged and then deleted, so
+        the flusher cannot replay them after the caller's own write and other
+        users' entries are left to the flusher.
+        """
+        client = self._redis()
+        if not client:
+            return 0
+
+        try:
+            entries = await self._user_entries(client, user_id)
+        except Exception as e:
+            logger.warning(f"Failed to read pending progress for user {user_id}: {e}")
+            return 0
+        if not entries:
+            return 0
+
+        rows = await self._latest_rows(entries)
+        try:
+            await OnboardingProgressRepository(db).merge_progress(rows, STEP_ORDER)
+        except Exception as e:
+            logger.error(f"Progress flush failed for user {user_id}: {e}")
+            return 0
+
+        ids = [entry_id for entry_id, _ in entries]
+        try:
+            await self._ensure_group(client)
+            await client.xack(self.stream, self.group, *ids)
+            await client.xdel(self.stream, *ids)
+            await client.srem(self._index(user_id), *ids)
+        except Exception as e:
+            # Harmless: replaying them later merges the same state again
+            logger.warning(f"Failed to delete flushed entries for {user_id}: {e}")
+        return len(rows)
+
+    async def _user_entries(
+        self, client, user_id: str
+    ) -> List[Tuple[str, Dict[str, bytes]]]:
+        """Every entry of ``user_id`` in the stream, pending or not yet read.
+
+        Ids come from the user's index; ids whose entries the flusher has
+        already deleted are dropped from it.
+        """
+        index = self._index(user_id)
+        ids = sorted((_text(i) for i in await client.smembers(index)), key=_entry_order)
+        if not ids:
+            return []
+
+        pipe = client.pipeline(transaction=False)
+        for entry_id in ids:
+            pipe.xrange(self.stream, min=entry_id, max=entry_id)
+        found = await pipe.execute()
+
+        entries, gone = [], []
+        for entry_id, batch in zip(ids, found):
+            if batch:
+                fields = {_text(k): v for k, v in (batch[0][1] or {}).items()}
+                entries.append((entry_id, fields))
+            else:
+                gone.append(entry_id)
+        if gone:
+            await client.srem(index, *gone)
+        return entries
+
+    async def _unindex(self, client, entries: List[Tuple[str, Dict[str, bytes]]]):
+        """Remove written entries from their users' indexes."""
+        by_user: Dict[str, List[str]] = {}
+        for entry_id, fields in entries:
+            if fields.get("user_id"):
+                by_user.setdefault(_text(fields["user_id"]), []).append(entry_id)
+        if not by_user:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for user_id, ids in by_user.items():
+                pipe.srem(self._index(user_id), *ids)
+            await pipe.execute()
+        except Exception as e:
+            # Stale ids are dropped by the next flush_user for that user
+            logger.warning(f"Failed to update pending progress indexes: {e}")
+
+    async def _check_backlog(self, client) -> None:
+        try:
+            length = await client.xlen(self.stream)
+        except Exception as e:
+            logger.warning(f"Failed to read progress stream length: {e}")
+            return
+        progress_stream_length.set(length)
+        if length > settings.PROGRESS_STREAM_ALERT_LENGTH:
+            logger.warning(f"Progress stream backlog of {length} entries")
+
+    async def run(self, db: AsyncClient) -> None:
+        """Flush every PROGRESS_FLUSH_INTERVAL seconds until cancelled."""
+        while True:
+            try:
+                await self.flush(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress flush failed: {e}")
+            await asyncio.sleep(settings.PROGRESS_FLUSH_INTERVAL)
+
+
+# Global instance
+progress_writer = ProgressWriteBehind(
+    stream=settings.PROGRESS_STREAM_KEY, group="progress-flusher"
+)
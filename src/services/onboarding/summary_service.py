@@ -1,6 +1,6 @@
 """Service for managing onboarding summary and completion."""
 from typing import Dict, Any, List, Optional
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.onboarding.profile_repository import ProfileRepository
 from ...repositories.onboarding.job_roles_repository import JobRolesRepository
 from ...repositories.onboarding.communication_repository import CommunicationRepository
@@ -14,7 +14,7 @@ logger = get_logger(__name__)
 class OnboardingSummaryService:
     """Service for managing onboarding summary and completion."""
 
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.profile_repo = ProfileRepository(db)
         self.roles_repo = JobRolesRepository(db)
         self.comm_repo = CommunicationRepository(db)
@@ -125,14 +125,7 @@ class OnboardingSummaryService:
             return None
 
         try:
-            result = (
-                self.db.table("industries")
-                .select("id, name")
-                .eq("id", industry_id)
-                .execute()
-            )
-
-            return result.data[0] if result.data else None
+            return await self.profile_repo.get_industry_by_id(industry_id)
         except Exception as e:
             logger.error(f"Failed to get industry details: {str(e)}")
             return None
@@ -180,8 +173,8 @@ class OnboardingSummaryService:
     async def _get_communication_summary(self, user_id: str) -> Dict[str, Any]:
         """Get communication partners and situations summary."""
         try:
-            # Get selected partners
-            partners = await self.comm_repo.get_user_selected_partners(user_id)
+            # Get selected partners with their situations in one query
+            partners = await self.comm_repo.get_user_selection_tree(user_id)
 
             partner_summaries = []
             total_situations = 0
@@ -189,13 +182,8 @@ class OnboardingSummaryService:
             for partner in partners:
                 partner_id = partner["communication_partner_id"]
 
-                # Get situations for this partner
-                situations = await self.comm_repo.get_user_situations_for_partner(
-                    user_id, partner_id
-                )
-
                 situation_summaries = []
-                for sit in situations:
+                for sit in partner["situations"]:
                     if sit.get("units"):
                         situation_summaries.append(
                             {
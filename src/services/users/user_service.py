@@ -1,5 +1,5 @@
 from typing import Dict, Any, Optional
-from supabase import Client
+from supabase import AsyncClient
 from ...repositories.users.user_repository import UserRepository
 from ...integrations.auth0 import auth0_client
 from ...schemas.users.user import UserUpdate
@@ -7,7 +7,7 @@ from ...core.exceptions import UserNotFoundError, DatabaseError
 
 
 class UserService:
-    def __init__(self, db: Client):
+    def __init__(self, db: AsyncClient):
         self.user_repo = UserRepository(db)
 
     async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
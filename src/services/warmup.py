@@ -0,0 +1,92 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+from supabase import AsyncClient
+from ..core.auth import auth0_validator
+from ..core.config import settings
+from ..core.logging import get_logger
+from ..core.metrics import metrics
+from ..core.redis_client import get_redis
+from ..integrations.azure_search import azure_search_client
+from ..integrations.openai import openai_client
+from ..repositories.onboarding.reference_data import refresh_reference_data
+
+logger = get_logger(__name__)
+
+warmup_step_seconds = metrics.gauge(
+    "warmup_step_seconds", "Duration of each startup warm-up step", ("step",)
+)
+app_ready = metrics.gauge("app_ready", "1 once the instance accepts traffic")
+
+
+class WarmUp:
+    """Startup warm-up that gates readiness.
+
+    Opens the pooled connections to Supabase, Redis, Azure Search, OpenAI
+    and Auth0, fetches the JWKS and loads the reference data caches, so the
+    first requests after a deploy do not pay for handshakes and cold
+    caches. Steps run concurrently, each bounded by WARMUP_TIMEOUT. A step
+    that fails is logged and reported but does not hold the instance back:
+    the request path falls back the same way it would without warm-up.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.results: Dict[str, str] = {}
+
+    def _steps(self, db: AsyncClient) -> Dict[str, Callable[[], Awaitable[Any]]]:
+        return {
+            "supabase": lambda: db.table("industries").select("id").limit(1).execute(),
+            "reference_data": lambda: refresh_reference_data(db),
+            "redis": self._warm_redis,
+            "auth0_jwks": auth0_validator.get_jwks,
+            "azure_search": azure_search_client.warm_up,
+            "openai": openai_client.warm_up,
+        }
+
+    async def _warm_redis(self) -> None:
+        client = get_redis()
+        if client is None:
+            return
+        # Concurrent pings check out (and so open) several pooled connections
+        await asyncio.gather(
+            *(client.ping() for _ in range(settings.WARMUP_REDIS_CONNECTIONS))
+        )
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), timeout=settings.WARMUP_TIMEOUT)
+            self.results[name] = "ok"
+        except asyncio.TimeoutError:
+            self.results[name] = "timeout"
+            logger.warning(f"Warm-up step {name} timed out")
+        except Exception as e:
+            self.results[name] = "failed"
+            logger.warning(f"Warm-up step {name} failed: {e}")
+        warmup_step_seconds.set(time.perf_counter() - started, step=name)
+
+    async def run(self, db: AsyncClient) -> Dict[str, str]:
+        """Run every step, then mark the instance ready; returns step results."""
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(self._run_step(name, step) for name, step in self._steps(db).items())
+        )
+        self.mark_ready()
+        logger.info(
+            f"Warm-up finished in {time.perf_counter() - started:.2f}s: {self.results}"
+        )
+        return self.results
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        app_ready.set(1)
+
+    def reset(self) -> None:
+        self.ready = False
+        self.results = {}
+        app_ready.set(0)
+
+
+# Global instance
+warmup = WarmUp()
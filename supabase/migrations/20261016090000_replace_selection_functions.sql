@@ -0,0 +1,102 @@
+-- Atomic, diff-based replacement of a user's communication selections.
+--
+-- Each function runs in a single transaction (one PostgREST RPC round trip),
+-- serializes concurrent calls for the same user with an advisory lock, and
+-- only touches rows whose membership or priority changed. Both return the
+-- final selection set ordered by priority.
+
+create or replace function public.replace_user_partner_selections(
+    p_user_id uuid,
+    p_partner_ids uuid[]
+)
+returns setof public.user_communication_partners
+language plpgsql
+as $$
+begin
+    perform pg_advisory_xact_lock(
+        hashtext('user_communication_partners:' || p_user_id::text)
+    );
+
+    -- Drop partners that are no longer selected
+    delete from public.user_communication_partners ucp
+    where ucp.user_id = p_user_id
+      and not (ucp.communication_partner_id = any(p_partner_ids));
+
+    -- Re-rank partners that stay selected but moved
+    update public.user_communication_partners ucp
+    set priority = wanted.priority::int
+    from unnest(p_partner_ids) with ordinality as wanted(partner_id, priority)
+    where ucp.user_id = p_user_id
+      and ucp.communication_partner_id = wanted.partner_id
+      and ucp.priority is distinct from wanted.priority::int;
+
+    -- Add newly selected partners
+    insert into public.user_communication_partners
+        (user_id, communication_partner_id, priority)
+    select p_user_id, wanted.partner_id, wanted.priority::int
+    from unnest(p_partner_ids) with ordinality as wanted(partner_id, priority)
+    where not exists (
+        select 1
+        from public.user_communication_partners ucp
+        where ucp.user_id = p_user_id
+          and ucp.communication_partner_id = wanted.partner_id
+    );
+
+    return query
+    select *
+    from public.user_communication_partners ucp
+    where ucp.user_id = p_user_id
+    order by ucp.priority;
+end;
+$$;
+
+
+create or replace function public.replace_user_partner_units(
+    p_user_id uuid,
+    p_partner_id uuid,
+    p_unit_ids uuid[]
+)
+returns setof public.user_partner_units
+language plpgsql
+as $$
+begin
+    perform pg_advisory_xact_lock(
+        hashtext('user_partner_units:' || p_user_id::text || ':' || p_partner_id::text)
+    );
+
+    -- Drop situations that are no longer selected for this partner
+    delete from public.user_partner_units upu
+    where upu.user_id = p_user_id
+      and upu.communication_partner_id = p_partner_id
+      and not (upu.unit_id = any(p_unit_ids));
+
+    -- Re-rank situations that stay selected but moved
+    update public.user_partner_units upu
+    set priority = wanted.priority::int
+    from unnest(p_unit_ids) with ordinality as wanted(unit_id, priority)
+    where upu.user_id = p_user_id
+      and upu.communication_partner_id = p_partner_id
+      and upu.unit_id = wanted.unit_id
+      and upu.priority is distinct from wanted.priority::int;
+
+    -- Add newly selected situations
+    insert into public.user_partner_units
+        (user_id, communication_partner_id, unit_id, priority, is_custom)
+    select p_user_id, p_partner_id, wanted.unit_id, wanted.priority::int, false
+    from unnest(p_unit_ids) with ordinality as wanted(unit_id, priority)
+    where not exists (
+        select 1
+        from public.user_partner_units upu
+        where upu.user_id = p_user_id
+          and upu.communication_partner_id = p_partner_id
+          and upu.unit_id = wanted.unit_id
+    );
+
+    return query
+    select *
+    from public.user_partner_units upu
+    where upu.user_id = p_user_id
+      and upu.communication_partner_id = p_partner_id
+    order by upu.priority;
+end;
+$$;
@@ -0,0 +1,55 @@
+-- Atomic onboarding progress update for one API action.
+--
+-- Runs as a single upsert (one PostgREST RPC round trip) so concurrent
+-- actions for the same user serialize on the row lock instead of
+-- overwriting each other's read-modify-write. current_step only moves
+-- forward along p_step_order, completed never reverts, and only the
+-- action's own key in data is written; the rest of the document is kept.
+-- Returns the updated row.
+
+create or replace function public.apply_onboarding_action(
+    p_user_id uuid,
+    p_step text,
+    p_step_order text[],
+    p_action text default null,
+    p_action_data jsonb default null,
+    p_completed boolean default false
+)
+returns public.user_onboarding_progress
+language plpgsql
+as $$
+declare
+    v_entry jsonb;
+    v_row public.user_onboarding_progress;
+begin
+    if array_position(p_step_order, p_step) is null then
+        raise exception 'Unknown onboarding step: %', p_step
+            using errcode = '22023';
+    end if;
+
+    if p_action is not null and p_action_data is not null then
+        v_entry := jsonb_build_object(
+            p_action, p_action_data || jsonb_build_object('updated_at', now())
+        );
+    else
+        v_entry := '{}'::jsonb;
+    end if;
+
+    insert into public.user_onboarding_progress as p
+        (user_id, current_step, data, completed)
+    values (p_user_id, p_step, v_entry, p_completed)
+    on conflict (user_id) do update
+    set current_step = case
+            when array_position(p_step_order, excluded.current_step)
+                 > coalesce(array_position(p_step_order, p.current_step), 0)
+            then excluded.current_step
+            else p.current_step
+        end,
+        data = coalesce(p.data, '{}'::jsonb) || v_entry,
+        completed = p.completed or excluded.completed,
+        updated_at = now()
+    returning p.* into v_row;
+
+    return v_row;
+end;
+$$;
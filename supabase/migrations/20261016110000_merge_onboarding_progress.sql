@@ -0,0 +1,56 @@
+-- Monotonic batch merge of onboarding progress rows.
+--
+-- Used by the write-behind flusher, whose rows may be older than what is
+-- already stored (a synchronous apply_onboarding_action can commit between
+-- the flusher's read and its write). Every row is merged the way
+-- apply_onboarding_action merges one action: current_step only moves
+-- forward along p_step_order, completed never reverts, and each action's
+-- key in data keeps whichever entry has the newer updated_at. A stale row
+-- can therefore never undo a newer one. p_rows must hold at most one row
+-- per user. Returns the merged rows.
+
+create or replace function public.merge_onboarding_progress(
+    p_rows jsonb,
+    p_step_order text[]
+)
+returns setof public.user_onboarding_progress
+language sql
+as $$
+    insert into public.user_onboarding_progress as p
+        (user_id, current_step, data, completed)
+    select r.user_id,
+           coalesce(r.current_step, p_step_order[1]),
+           coalesce(r.data, '{}'::jsonb),
+           coalesce(r.completed, false)
+    from jsonb_to_recordset(p_rows)
+        as r(user_id uuid, current_step text, data jsonb, completed boolean)
+    on conflict (user_id) do update
+    set current_step = case
+            when coalesce(array_position(p_step_order, excluded.current_step), 0)
+                 > coalesce(array_position(p_step_order, p.current_step), 0)
+            then excluded.current_step
+            else p.current_step
+        end,
+        data = (
+            select coalesce(
+                jsonb_object_agg(
+                    coalesce(stored.key, incoming.key),
+                    case
+                        when incoming.key is null then stored.value
+                        when stored.key is null then incoming.value
+                        when (incoming.value ->> 'updated_at')::timestamptz
+                             > (stored.value ->> 'updated_at')::timestamptz
+                        then incoming.value
+                        else stored.value
+                    end
+                ),
+                '{}'::jsonb
+            )
+            from jsonb_each(coalesce(p.data, '{}'::jsonb)) as stored
+            full join jsonb_each(excluded.data) as incoming
+                on incoming.key = stored.key
+        ),
+        completed = p.completed or excluded.completed,
+        updated_at = now()
+    returning p.*;
+$$;
@@ -0,0 +1,40 @@
+-- Bulk update of existing rows by id, each row with its own values.
+--
+-- Backs SupabaseRepository.bulk_update_by_id. Runs as a single UPDATE
+-- (one PostgREST RPC round trip per chunk) joined to the given rows, so
+-- ids that do not exist, including rows deleted concurrently, are never
+-- inserted. Only p_columns are written; every row must carry all of them.
+-- Identifiers are quoted and the function runs with the caller's
+-- privileges, so table grants and RLS still apply. Returns the ids that
+-- were updated.
+
+create or replace function public.bulk_update_rows(
+    p_table text,
+    p_columns text[],
+    p_rows jsonb
+)
+returns setof text
+language plpgsql
+as $$
+declare
+    v_id text;
+begin
+    if array_length(p_columns, 1) is null or 'id' = any(p_columns) then
+        raise exception 'p_columns must list the columns to update, without id'
+            using errcode = '22023';
+    end if;
+
+    for v_id in execute format(
+        'update public.%1$I as t set (%2$s) = row(%3$s) '
+        'from jsonb_populate_recordset(null::public.%1$I, $1) as r '
+        'where t.id = r.id '
+        'returning t.id::text',
+        p_table,
+        (select string_agg(format('%I', c), ', ') from unnest(p_columns) as c),
+        (select string_agg(format('r.%I', c), ', ') from unnest(p_columns) as c)
+    ) using p_rows
+    loop
+        return next v_id;
+    end loop;
+end;
+$$;
@@ -0,0 +1,82 @@
+-- Reset version for onboarding progress.
+--
+-- merge_onboarding_progress only moves progress forward, so a write-behind
+-- row read before an admin reset (from the cache or the stream) would put
+-- the old progress back once merged after it. Every reset now bumps
+-- reset_version, write-behind rows carry the version they were read at,
+-- and the merge skips rows from before the user's latest reset.
+
+alter table public.user_onboarding_progress
+    add column if not exists reset_version integer not null default 0;
+
+-- Reset a user's progress to p_step and bump reset_version in one
+-- statement. Returns the reset row.
+create or replace function public.reset_onboarding_progress(
+    p_user_id uuid,
+    p_step text
+)
+returns public.user_onboarding_progress
+language sql
+as $$
+    insert into public.user_onboarding_progress as p
+        (user_id, current_step, data, completed)
+    values (p_user_id, p_step, '{}'::jsonb, false)
+    on conflict (user_id) do update
+    set current_step = excluded.current_step,
+        data = excluded.data,
+        completed = false,
+        reset_version = p.reset_version + 1,
+        updated_at = now()
+    returning p.*;
+$$;
+
+-- As in 20261016110000, plus: a row whose reset_version (0 when absent) is
+-- older than the stored one is skipped and not returned.
+create or replace function public.merge_onboarding_progress(
+    p_rows jsonb,
+    p_step_order text[]
+)
+returns setof public.user_onboarding_progress
+language sql
+as $$
+    insert into public.user_onboarding_progress as p
+        (user_id, current_step, data, completed, reset_version)
+    select r.user_id,
+           coalesce(r.current_step, p_step_order[1]),
+           coalesce(r.data, '{}'::jsonb),
+           coalesce(r.completed, false),
+           coalesce(r.reset_version, 0)
+    from jsonb_to_recordset(p_rows)
+        as r(user_id uuid, current_step text, data jsonb, completed boolean,
+             reset_version integer)
+    on conflict (user_id) do update
+    set current_step = case
+            when coalesce(array_position(p_step_order, excluded.current_step), 0)
+                 > coalesce(array_position(p_step_order, p.current_step), 0)
+            then excluded.current_step
+            else p.current_step
+        end,
+        data = (
+            select coalesce(
+                jsonb_object_agg(
+                    coalesce(stored.key, incoming.key),
+                    case
+                        when incoming.key is null then stored.value
+                        when stored.key is null then incoming.value
+                        when (incoming.value ->> 'updated_at')::timestamptz
+                             > (stored.value ->> 'updated_at')::timestamptz
+                        then incoming.value
+                        else stored.value
+                    end
+                ),
+                '{}'::jsonb
+            )
+            from jsonb_each(coalesce(p.data, '{}'::jsonb)) as stored
+            full join jsonb_each(excluded.data) as incoming
+                on incoming.key = stored.key
+        ),
+        completed = p.completed or excluded.completed,
+        updated_at = now()
+    where excluded.reset_version >= p.reset_version
+    returning p.*;
+$$;
@@ -5,6 +5,11 @@ from unittest.mock import Mock, AsyncMock, patch
 from src.main import app
 from src.core.dependencies import get_db, get_current_user
 from src.repositories.users.user_repository import UserRepository
+from src.core.cache import user_cache
+from src.core.progress_cache import progress_cache
+from src.core.redis_client import redis_breaker
+from src.repositories.onboarding.communication_repository import partner_cache, unit_cache
+from src.repositories.onboarding.profile_repository import industry_cache
 
 # Test data
 MOCK_USER_DATA = {
@@ -29,6 +34,31 @@ MOCK_AUTH0_TOKEN_PAYLOAD = {
     "exp": 1641081600
 }
 
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Keep the process-wide users and progress caches from leaking rows between tests"""
+    user_cache.clear()
+    progress_cache.clear()
+    yield
+    user_cache.clear()
+    progress_cache.clear()
+
+@pytest.fixture(autouse=True)
+def clear_reference_caches():
+    """Keep reference data snapshots from leaking between tests"""
+    for cache in (partner_cache, unit_cache, industry_cache):
+        cache.invalidate()
+    yield
+    for cache in (partner_cache, unit_cache, industry_cache):
+        cache.invalidate()
+
+@pytest.fixture(autouse=True)
+def reset_redis_breaker():
+    """Start every test with the Redis circuit closed"""
+    redis_breaker.reset()
+    yield
+    redis_breaker.reset()
+
 # Mock Supabase client
 class MockSupabaseClient:
     def __init__(self):
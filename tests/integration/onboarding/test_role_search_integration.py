@@ -17,7 +17,7 @@ class TestRoleSearchIntegration:
         mock.insert = Mock(return_value=mock)
         mock.update = Mock(return_value=mock)
         mock.eq = Mock(return_value=mock)
-        mock.execute = Mock()
+        mock.execute = AsyncMock()
         
         return mock
     
@@ -111,7 +111,7 @@ class TestRoleSearchIntegration:
         }]
         
         industry_result = Mock()
-        industry_result.data = [{"name": "Shipping & Logistics"}]
+        industry_result.data = [{"id": "ind-shipping", "name": "Shipping & Logistics", "status": "available"}]
         
         # The execute method on mock_db should be used for role creation (job_roles table)
         mock_db.execute.return_value = role_result
@@ -140,18 +140,18 @@ class TestRoleSearchIntegration:
         # For select operations (get_user_by_auth0_id)
         mock_users_comprehensive.select = Mock(return_value=mock_users_comprehensive)
         mock_users_comprehensive.eq = Mock(return_value=mock_users_comprehensive)
-        mock_users_comprehensive.execute = Mock(return_value=user_result)
+        mock_users_comprehensive.execute = AsyncMock(return_value=user_result)
         
-        # For update operations (update_user_selected_role) - return sync mock
+        # For update operations (update_user_selected_role)
         mock_update_chain = Mock()
         mock_update_chain.eq = Mock(return_value=mock_update_chain)
-        mock_update_chain.execute = Mock(return_value=update_result)
+        mock_update_chain.execute = AsyncMock(return_value=update_result)
         mock_users_comprehensive.update = Mock(return_value=mock_update_chain)
         
         # Create mock for job_roles table operations
         mock_job_roles_table = Mock()
         mock_job_roles_table.insert = Mock(return_value=mock_job_roles_table)
-        mock_job_roles_table.execute = Mock(return_value=role_result)
+        mock_job_roles_table.execute = AsyncMock(return_value=role_result)
         
         # Setup table side effect to return appropriate mock
         def table_side_effect(table_name):
@@ -0,0 +1,17 @@
+import pytest
+
+_MEASUREMENTS = pytest.StashKey[list]()
+
+
+@pytest.fixture
+def perf_report(request):
+    """Record a measurement line, shown in the terminal summary."""
+    return request.config.stash.setdefault(_MEASUREMENTS, []).append
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    lines = config.stash.get(_MEASUREMENTS, [])
+    if lines:
+        terminalreporter.section("performance measurements")
+        for line in lines:
+            terminalreporter.write_line(line)
@@ -0,0 +1,95 @@
+import pytest
+import time
+from datetime import datetime, timezone
+from src.core.codec import Codec, CodecError
+
+CANDIDATES = [
+    ("json", "none"),
+    ("orjson", "none"),
+    ("msgpack", "none"),
+    ("orjson", "zstd"),
+    ("orjson", "lz4"),
+    ("msgpack", "zstd"),
+]
+
+# Shapes of the values held in the progress and row caches
+PROGRESS_FIELD = {
+    "role_id": "b3c1e7a2-5d4f-4c1e-9a8b-2f6d0e4c7a11",
+    "role_title": "Relationship Manager",
+    "is_custom": False,
+    "updated_at": datetime(2026, 10, 16, 9, 0, tzinfo=timezone.utc),
+}
+SUMMARY = {
+    "user_id": "b3c1e7a2-5d4f-4c1e-9a8b-2f6d0e4c7a11",
+    "native_language": "chinese_traditional",
+    "industry": {"id": "4f2a", "name": "Banking & Finance", "status": "available"},
+    "selected_roles": [
+        {
+            "id": f"role-{i}",
+            "title": "Relationship Manager",
+            "description": "Manages client portfolios and advises on products. " * 3,
+            "hierarchy_level": "associate",
+            "search_keywords": ["client", "portfolio", "banking", "advisory"],
+        }
+        for i in range(10)
+    ],
+}
+
+ITERATIONS = 2000
+# Best-of runs and headroom for the codec comparison, so a busy machine
+# does not decide it
+REPEATS = 5
+MARGIN = 1.2
+
+
+def _measure(codec: Codec, value) -> tuple:
+    payload = codec.encode(value)
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        codec.encode(value)
+    encode_us = (time.perf_counter() - started) / ITERATIONS * 1e6
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        codec.decode(payload)
+    decode_us = (time.perf_counter() - started) / ITERATIONS * 1e6
+    return encode_us, decode_us, len(payload)
+
+
+@pytest.mark.performance
+class TestCodecPerformance:
+    """Compare cache codecs on realistic cached values."""
+
+    @pytest.mark.parametrize("serializer,compression", CANDIDATES)
+    @pytest.mark.parametrize(
+        "name,value", [("progress_field", PROGRESS_FIELD), ("summary", SUMMARY)]
+    )
+    def test_codec_speed_and_size(
+        self, serializer, compression, name, value, perf_report
+    ):
+        """Encode/decode time and payload size per codec."""
+        try:
+            codec = Codec(serializer, compression, compress_threshold=512)
+        except CodecError:
+            pytest.skip(f"{serializer}+{compression} not installed")
+
+        encode_us, decode_us, size = _measure(codec, value)
+
+        assert encode_us < 1000 and decode_us < 1000
+        perf_report(
+            f"{codec.name:<16} {name:<15} encode {encode_us:7.1f}us "
+            f"decode {decode_us:7.1f}us {size:6d} bytes"
+        )
+
+    def test_orjson_is_not_slower_than_json(self, perf_report):
+        """The default codec should beat the stdlib fallback on the hot path."""
+        try:
+            fast = Codec("orjson")
+        except CodecError:
+            pytest.skip("orjson not installed")
+        stdlib = Codec("json")
+
+        fast_total = min(sum(_measure(fast, SUMMARY)[:2]) for _ in range(REPEATS))
+        json_total = min(sum(_measure(stdlib, SUMMARY)[:2]) for _ in range(REPEATS))
+
+        perf_report(f"orjson {fast_total:.1f}us vs json {json_total:.1f}us per value")
+        assert fast_total <= json_total * MARGIN
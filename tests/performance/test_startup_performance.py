@@ -0,0 +1,95 @@
+import os
+import pytest
+import subprocess
+import sys
+import time
+import httpx
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Budgets for a cold start on a small instance; the measured values are
+# reported so regressions show up before they hit a budget
+IMPORT_BUDGET = 5.0  # seconds, cumulative import time of src.main
+FIRST_RESPONSE_BUDGET = 5.0  # seconds, lifespan startup to first /health reply
+
+# Fails the import if anything opens a network connection
+NO_CONNECT = """
+import socket
+
+def refuse(self, address):
+    raise AssertionError(f"connection to {address} during import")
+
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+import src.main
+"""
+
+
+def _run(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        **kwargs,
+    )
+
+
+def _import_times(stderr: str) -> list:
+    """Parse ``-X importtime`` output into (cumulative seconds, module)."""
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        times.append((int(cumulative_us) / 1e6, module.strip()))
+    return times
+
+
+@pytest.mark.performance
+class TestStartupPerformance:
+    """Cold start cost of the API process."""
+
+    def test_import_opens_no_connections(self):
+        """Clients for Redis, Supabase, OpenAI and Azure are created later."""
+        result = _run("-c", NO_CONNECT)
+
+        assert result.returncode == 0, result.stderr
+
+    def test_import_time(self, perf_report):
+        """``python -X importtime -c 'import src.main'``."""
+        result = _run("-X", "importtime", "-c", "import src.main")
+        assert result.returncode == 0, result.stderr
+
+        times = _import_times(result.stderr)
+        total = next(t for t, module in times if module == "src.main")
+
+        perf_report(f"import src.main: {total:.3f}s; slowest imports:")
+        for seconds, module in sorted(times, reverse=True)[:10]:
+            perf_report(f"  {seconds:7.3f}s {module}")
+        assert total < IMPORT_BUDGET
+
+    @pytest.mark.asyncio
+    async def test_time_to_first_response(self, perf_report):
+        """Lifespan startup to the first /health response, in-process.
+
+        Runs the app over ASGI rather than a server process, so no port or
+        network is involved; import time is measured by test_import_time.
+        """
+        from src.main import app
+
+        started = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                response = await client.get("/health")
+            elapsed = time.perf_counter() - started
+
+        assert response.status_code == 200
+        perf_report(f"time to first response: {elapsed:.3f}s")
+        assert elapsed < FIRST_RESPONSE_BUDGET
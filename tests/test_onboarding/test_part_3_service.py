@@ -57,13 +57,11 @@ class TestOnboardingSummaryService:
                     mock_profile_repo.get_user_by_auth0_id.return_value = mock_user_data
                     MockProfileRepo.return_value = mock_profile_repo
                     
-                    # Mock industry query
-                    mock_industry_result = MagicMock()
-                    mock_industry_result.data = [{
+                    # Mock industry lookup (served from the cached industries map)
+                    mock_profile_repo.get_industry_by_id.return_value = {
                         "id": mock_user_data["industry_id"],
                         "name": "Banking & Finance"
-                    }]
-                    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_industry_result
+                    }
                     
                     # Mock role
                     mock_roles_repo = AsyncMock()
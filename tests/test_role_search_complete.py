@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, AsyncMock, patch
 
 # Import all components to verify they exist
 from src.core.config import settings
@@ -99,7 +99,7 @@ class TestRoleSearchComplete:
         mock_db.table = Mock(return_value=mock_db)
         mock_db.select = Mock(return_value=mock_db)
         mock_db.eq = Mock(return_value=mock_db)
-        mock_db.execute = Mock(return_value=Mock(data=[{
+        mock_db.execute = AsyncMock(return_value=Mock(data=[{
             "id": "user123",
             "auth0_id": "auth0|test",
             "industry_id": "ind123"
@@ -0,0 +1,49 @@
+import pytest
+from collections import Counter
+from contextlib import contextmanager
+from src.core.instrumentation import add_query_listener, remove_query_listener
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block issues too many or repeated queries."""
+
+
+@contextmanager
+def _query_budget(max_queries, max_repeats=1):
+    """Fail if the block runs more than max_queries queries, or runs the same
+    query more than max_repeats times (a likely N+1)."""
+    records = []
+    listener = records.append
+    add_query_listener(listener)
+    try:
+        yield records
+    finally:
+        remove_query_listener(listener)
+
+    described = "\n".join(
+        f"  {r.operation} {r.table} ({r.fingerprint})" for r in records
+    )
+    if len(records) > max_queries:
+        raise QueryBudgetExceeded(
+            f"{len(records)} queries issued, budget is {max_queries}:\n{described}"
+        )
+    repeated = {
+        fingerprint: count
+        for fingerprint, count in Counter(r.fingerprint for r in records).items()
+        if count > max_repeats
+    }
+    if repeated:
+        raise QueryBudgetExceeded(
+            f"Repeated queries (possible N+1): {repeated}\n{described}"
+        )
+
+
+@pytest.fixture
+def query_budget():
+    """Assert a maximum query count for the requests made inside the block.
+
+    Usage:
+        with query_budget(max_queries=4):
+            client.get("/api/v1/onboarding/part-3/summary")
+    """
+    return _query_budget
@@ -0,0 +1,207 @@
+import asyncio
+import httpx
+import pytest
+from postgrest import AsyncPostgrestClient
+from unittest.mock import Mock, AsyncMock
+from fastapi.testclient import TestClient
+from src.main import app
+from src.core.dependencies import get_current_user_auth0_id, get_db
+from src.repositories.onboarding.communication_repository import CommunicationRepository
+from src.repositories.onboarding.reference_data import refresh_reference_data
+
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+INDUSTRY_ID = "00000000-0000-0000-0000-0000000000a1"
+ROLE_ID = "00000000-0000-0000-0000-0000000000b1"
+PARTNER_ID = "00000000-0000-0000-0000-0000000000c1"
+UNIT_ID = "00000000-0000-0000-0000-0000000000d1"
+
+USER = {
+    "id": USER_ID,
+    "auth0_id": "auth0|test123",
+    "native_language": "english",
+    "industry_id": INDUSTRY_ID,
+    "selected_role_id": ROLE_ID,
+    "custom_role_title": None,
+    "custom_role_description": None,
+    "updated_at": "2026-10-16T09:00:00+00:00",
+}
+
+TABLE_DATA = {
+    "users": [USER],
+    "industries": [{"id": INDUSTRY_ID, "name": "Banking & Finance"}],
+    "communication_partners": [{"id": PARTNER_ID, "name": "Clients", "is_active": True}],
+    "units": [{"id": UNIT_ID, "name": "Meetings", "is_active": True}],
+    "roles": [{"id": ROLE_ID, "title": "Analyst", "description": "Analyzes", "is_system_role": True}],
+    "user_onboarding_progress": [
+        {"user_id": USER_ID, "current_step": "summary", "data": {}, "completed": False}
+    ],
+    "user_communication_partners": [
+        {
+            "communication_partner_id": PARTNER_ID,
+            "priority": 1,
+            "communication_partners": {
+                "id": PARTNER_ID,
+                "name": "Clients",
+                "user_partner_units": [
+                    {"unit_id": UNIT_ID, "priority": 1, "units": {"id": UNIT_ID, "name": "Meetings"}}
+                ],
+            },
+        }
+    ],
+}
+
+RPC_DATA = {
+    "apply_onboarding_action": TABLE_DATA["user_onboarding_progress"][0],
+    "replace_user_partner_selections": [
+        {"user_id": USER_ID, "communication_partner_id": PARTNER_ID, "priority": 1}
+    ],
+    "replace_user_partner_units": [
+        {
+            "user_id": USER_ID,
+            "communication_partner_id": PARTNER_ID,
+            "unit_id": UNIT_ID,
+            "priority": 1,
+        }
+    ],
+}
+
+
+def fake_db():
+    """Chainable Supabase stand-in that answers per table."""
+    db = Mock()
+
+    def table(name):
+        query = Mock()
+        for method in ("select", "eq", "is_", "order", "limit", "range", "update", "upsert", "insert", "delete"):
+            getattr(query, method).return_value = query
+        query.execute = AsyncMock(return_value=Mock(data=TABLE_DATA.get(name, []), count=1))
+        return query
+
+    def rpc(name, params):
+        query = Mock()
+        query.execute = AsyncMock(return_value=Mock(data=RPC_DATA.get(name, [])))
+        return query
+
+    db.table.side_effect = table
+    db.rpc.side_effect = rpc
+    return db
+
+
+def postgrest_db():
+    """Supabase stand-in that builds real PostgREST requests, answered locally."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    http_client = httpx.AsyncClient(base_url="http://db.test/rest/v1", transport=transport)
+    db = Mock()
+    db.table.side_effect = AsyncPostgrestClient(
+        "http://db.test/rest/v1", http_client=http_client
+    ).from_
+    return db
+
+
+class TestQueryBudgets:
+    """Round-trip budgets for the onboarding endpoints."""
+
+    @pytest.fixture
+    def client(self):
+        db = fake_db()
+        # Reference data is preloaded at startup in production
+        asyncio.run(refresh_reference_data(db))
+        app.dependency_overrides[get_current_user_auth0_id] = lambda: "auth0|test123"
+        app.dependency_overrides[get_db] = lambda: db
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+
+    def test_part_3_summary_budget(self, client, query_budget):
+        """Summary loads user, role and selections, then records the view."""
+        with query_budget(max_queries=4):
+            response = client.get("/api/v1/onboarding/part-3/summary")
+
+        assert response.status_code == 200
+        assert response.json()["summary"]["total_situations"] == 1
+
+    def test_part_2_summary_budget(self, client, query_budget):
+        """Selections summary is one user lookup plus one nested query."""
+        with query_budget(max_queries=2):
+            response = client.get("/api/v1/onboarding/part-2/summary")
+
+        assert response.status_code == 200
+
+    def test_complete_part_2_budget(self, client, query_budget):
+        """Completing Part 2 only counts selections."""
+        with query_budget(max_queries=4):
+            response = client.post("/api/v1/onboarding/part-2/complete")
+
+        assert response.status_code == 200
+
+    def test_select_partners_budget(self, client, query_budget):
+        """Saving partners is a user lookup, the replace RPC and the progress RPC."""
+        with query_budget(max_queries=3) as records:
+            response = client.post(
+                "/api/v1/onboarding/part-2/select-partners",
+                json={"partner_ids": ["clients"]},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["selected_count"] == 1
+        assert [r.table for r in records if r.operation == "rpc"] == [
+            "replace_user_partner_selections",
+            "apply_onboarding_action",
+        ]
+
+    def test_select_situations_budget(self, client, query_budget):
+        """Saving situations resolves identifiers from memory, not the database."""
+        with query_budget(max_queries=3) as records:
+            response = client.post(
+                "/api/v1/onboarding/part-2/select-situations",
+                json={"partner_id": "clients", "situation_ids": ["meetings"]},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["selected_count"] == 1
+        assert [r.table for r in records if r.operation == "rpc"] == [
+            "replace_user_partner_units",
+            "apply_onboarding_action",
+        ]
+
+    def test_progress_update_budget(self, client, query_budget):
+        """Recording an action is one atomic RPC after the profile write."""
+        with query_budget(max_queries=3) as records:
+            response = client.post(
+                "/api/v1/onboarding/part-1/native-language",
+                json={"native_language": "english"},
+            )
+
+        assert response.status_code == 200
+        assert [r.table for r in records if r.operation == "rpc"] == [
+            "apply_onboarding_action"
+        ]
+        assert not [r for r in records if r.table == "user_onboarding_progress"]
+
+    @pytest.mark.asyncio
+    async def test_repeated_queries_are_flagged(self, query_budget):
+        """Per-partner lookups in a loop are reported as N+1."""
+        repo = CommunicationRepository(fake_db())
+
+        with pytest.raises(AssertionError, match="possible N\\+1"):
+            with query_budget(max_queries=10):
+                for partner_id in ("p-1", "p-2", "p-3"):
+                    await repo.get_user_situations_for_partner("user-1", partner_id)
+
+    @pytest.mark.asyncio
+    async def test_repeated_queries_with_different_ids_are_flagged(self, query_budget):
+        """The same lookup per id is an N+1 even though the filter values differ."""
+        repo = CommunicationRepository(postgrest_db())
+
+        with pytest.raises(AssertionError, match="possible N\\+1"):
+            with query_budget(max_queries=10):
+                for partner_id in (PARTNER_ID, UNIT_ID):
+                    await repo.get_user_situations_for_partner(USER_ID, partner_id)
+
+    @pytest.mark.asyncio
+    async def test_different_queries_are_not_flagged(self, query_budget):
+        repo = CommunicationRepository(postgrest_db())
+
+        with query_budget(max_queries=10):
+            await repo.get_user_situations_for_partner(USER_ID, PARTNER_ID)
+            await repo.get_user_selected_partners(USER_ID)
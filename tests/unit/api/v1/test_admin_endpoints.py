@@ -80,6 +80,22 @@ class TestAdminEndpoints:
         assert data["success"] == True
         assert data["embeddings_generated"] == 10
     
+    def test_refresh_reference_data_returns_versions(self, client, admin_headers, mock_admin_dependencies):
+        """Test reloading the reference data caches."""
+        versions = {"partners_version": 3, "units_version": 2, "industries_version": 1}
+
+        with patch(
+            'src.api.v1.admin.reload_reference_data', AsyncMock(return_value=versions)
+        ) as reload:
+            response = client.post(
+                "/api/v1/admin/refresh-reference-data",
+                headers=admin_headers
+            )
+
+        assert response.status_code == 200
+        assert response.json() == {"success": True, **versions}
+        reload.assert_awaited_once()
+    
     def test_admin_endpoints_unauthorized(self, client):
         """Test admin endpoints without authentication."""
         response = client.post("/api/v1/admin/reindex-roles")
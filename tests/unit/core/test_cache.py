@@ -0,0 +1,223 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+import asyncio
+from src.core.cache import ReferenceCache, SingleFlight, TTLCache, user_cache
+from src.core.request_context import request_scope
+from src.repositories.users.user_repository import UserRepository
+from src.repositories.onboarding.profile_repository import ProfileRepository
+from src.models.enums import NativeLanguage
+
+MOCK_USER = {"id": "user-1", "auth0_id": "auth0|abc", "native_language": None}
+
+
+class TestTTLCache:
+    """Test the in-process LRU + TTL cache."""
+
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted when full."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_expired_entries_miss(self):
+        """Entries past their TTL are treated as misses."""
+        cache = TTLCache(maxsize=10, ttl=60)
+        with patch("src.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("src.core.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("a") is None
+        assert cache.misses == 1
+
+    def test_stale_window(self):
+        """Expired entries stay readable as stale until the stale window ends."""
+        cache = TTLCache(maxsize=10, ttl=60, stale_ttl=30)
+        with patch("src.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("src.core.cache.time.monotonic", return_value=1070.0):
+            assert cache.lookup("a") == (1, False)
+            assert cache.get("a") is None
+        with patch("src.core.cache.time.monotonic", return_value=1091.0):
+            assert cache.lookup("a") == (None, False)
+
+
+class TestSingleFlight:
+    """Test per-key load coalescing."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_share_one_call(self):
+        """Callers waiting on the same key share one loader run."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": "row-1"}
+
+        results = await asyncio.gather(*[flight.do("key", loader) for _ in range(5)])
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_failures_are_shared_but_not_kept(self):
+        """Waiters see the error; the next call loads again."""
+        flight = SingleFlight()
+        loader = AsyncMock(side_effect=[RuntimeError("boom"), "ok"])
+
+        with pytest.raises(RuntimeError):
+            await flight.do("key", loader)
+
+        assert await flight.do("key", loader) == "ok"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_load(self):
+        """A cancelled waiter leaves the shared load running for the others."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "done"
+
+        first = asyncio.ensure_future(flight.do("key", loader))
+        second = asyncio.ensure_future(flight.do("key", loader))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "done"
+
+
+class TestUserCache:
+    """Test the cross-request users cache in the repository layer."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.select = Mock(return_value=mock)
+        mock.update = Mock(return_value=mock)
+        mock.eq = Mock(return_value=mock)
+        mock.execute = AsyncMock(return_value=Mock(data=[dict(MOCK_USER)]))
+        return mock
+
+    @pytest.mark.asyncio
+    async def test_lookup_cached_across_requests(self, mock_db):
+        """Second request finds the user without a database call."""
+        repo = UserRepository(mock_db)
+
+        with request_scope():
+            await repo.get_by_auth0_id("auth0|abc")
+        with request_scope():
+            by_auth0 = await repo.get_by_auth0_id("auth0|abc")
+            by_id = await repo.get_by_id("user-1")
+
+        assert by_auth0["id"] == "user-1"
+        assert by_id["auth0_id"] == "auth0|abc"
+        assert mock_db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_primary_reads_skip_the_cache(self, mock_db):
+        """A primary read must see writes made by other instances."""
+        repo = UserRepository(mock_db)
+        await repo.get_by_auth0_id("auth0|abc")
+
+        updated = dict(MOCK_USER, native_language="english")
+        mock_db.execute.return_value = Mock(data=[updated])
+        with request_scope():
+            row = await repo.get_by_field("auth0_id", "auth0|abc", primary=True)
+
+        assert row["native_language"] == "english"
+        assert mock_db.execute.await_count == 2
+        assert (await user_cache.get("id", "user-1"))["native_language"] == "english"
+
+    @pytest.mark.asyncio
+    async def test_primary_reads_skip_the_identity_map(self, mock_db):
+        """A row already loaded in the request is read again from the primary."""
+        repo = UserRepository(mock_db)
+        updated = dict(MOCK_USER, native_language="english")
+
+        with request_scope():
+            await repo.get_by_auth0_id("auth0|abc")
+            mock_db.execute.return_value = Mock(data=[updated])
+            row = await repo.get_by_field("auth0_id", "auth0|abc", primary=True)
+            again = await repo.get_by_auth0_id("auth0|abc")
+
+        assert row["native_language"] == "english"
+        assert again["native_language"] == "english"
+        assert mock_db.execute.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_writes_through(self, mock_db):
+        """Profile updates replace the cached row under every key."""
+        repo = ProfileRepository(mock_db)
+        await repo.get_user_by_auth0_id("auth0|abc")
+
+        updated = dict(MOCK_USER, native_language="english")
+        mock_db.execute.return_value = Mock(data=[updated])
+        await repo.update_native_language("user-1", NativeLanguage.ENGLISH)
+
+        assert (await user_cache.get("auth0_id", "auth0|abc"))["native_language"] == "english"
+        assert (await user_cache.get("id", "user-1"))["native_language"] == "english"
+
+    @pytest.mark.asyncio
+    async def test_failed_update_invalidates(self, mock_db):
+        """An update that returns no row drops the cached user."""
+        repo = UserRepository(mock_db)
+        await repo.get_by_auth0_id("auth0|abc")
+
+        mock_db.execute.return_value = Mock(data=[])
+        await repo.update_user("user-1", {"full_name": "New Name"})
+
+        assert (await user_cache.get("auth0_id", "auth0|abc")) is None
+        assert (await user_cache.get("id", "user-1")) is None
+
+
+class TestReferenceCache:
+    """Test versioned reference data snapshots."""
+
+    def _cache(self, ttl=60):
+        return ReferenceCache("partners", ttl, {"id": lambda row: row["id"]})
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_share_one_load(self):
+        """Cold concurrent reads load the table once."""
+        cache = self._cache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [{"id": "p1"}, {"id": "p2"}]
+
+        snapshots = await asyncio.gather(*[cache.get(loader) for _ in range(5)])
+
+        assert calls == 1
+        assert all(s is snapshots[0] for s in snapshots)
+        assert snapshots[0].get("id", "p2") == {"id": "p2"}
+
+    @pytest.mark.asyncio
+    async def test_refresh_and_expiry_bump_version(self):
+        """Explicit refreshes and expired snapshots reload with a new version."""
+        loader = AsyncMock(return_value=[{"id": "p1"}])
+        cache = self._cache()
+
+        first = await cache.get(loader)
+        refreshed = await cache.refresh(loader)
+        assert (first.version, refreshed.version) == (1, 2)
+
+        cache.ttl = 0
+        expired = await cache.get(loader)
+        assert expired.version == 3
+        assert loader.await_count == 3
@@ -0,0 +1,103 @@
+import pytest
+from src.core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    circuit_breaker_state,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test the closed / open / half-open state machine."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker(
+            "test",
+            failure_threshold=3,
+            slow_call=0.5,
+            cooldown=10.0,
+            probes=2,
+            clock=clock,
+        )
+
+    def test_opens_after_consecutive_failures(self, breaker):
+        """Failures must be consecutive; a success resets the count."""
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert circuit_breaker_state.value(breaker="test") == 2
+
+    def test_slow_calls_count_as_failures(self, breaker):
+        for _ in range(3):
+            breaker.record_success(duration=0.8)
+
+        assert breaker.state == OPEN
+
+    def test_half_opens_after_cooldown_with_limited_probes(self, breaker, clock):
+        """After the cooldown only ``probes`` calls are let through."""
+        for _ in range(3):
+            breaker.record_failure()
+
+        clock.now = 10.0
+
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_successful_probes_close_the_circuit(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10.0
+
+        for _ in range(2):
+            assert breaker.allow()
+            breaker.record_success()
+
+        assert breaker.state == CLOSED
+
+    def test_failed_probe_reopens_the_circuit(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10.0
+
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        clock.now = 15.0
+        assert not breaker.allow()
+
+    def test_released_probe_frees_its_slot(self, breaker, clock):
+        """A cancelled probe does not block later probes."""
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now = 10.0
+        breaker.allow()
+        breaker.allow()
+
+        breaker.release()
+
+        assert breaker.allow()
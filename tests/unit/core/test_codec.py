@@ -0,0 +1,83 @@
+import pytest
+import zlib
+from datetime import datetime, timezone
+from src.core import codec as codec_module
+from src.core.codec import Codec, CodecError, MARKER, build_codec
+
+PROGRESS = {
+    "user_id": "user-1",
+    "current_step": "industry_selection",
+    "completed": False,
+    "data": {"set_industry": {"industry": "banking_finance"}},
+}
+
+
+@pytest.fixture
+def fake_compression(monkeypatch):
+    """Register zlib as compression id 1 so the tests run without zstd."""
+    compressors = codec_module._compressors
+
+    def with_zlib():
+        return {**compressors(), 1: (zlib.compress, zlib.decompress)}
+
+    monkeypatch.setattr(codec_module, "_compressors", with_zlib)
+
+
+class TestCodec:
+    """Test versioned encoding of cached values."""
+
+    @pytest.mark.parametrize("serializer", ["json", "orjson", "msgpack"])
+    def test_round_trip(self, serializer):
+        """Each installed serializer decodes its own payloads."""
+        try:
+            codec = Codec(serializer)
+        except CodecError:
+            pytest.skip(f"{serializer} not installed")
+
+        payload = codec.encode(PROGRESS)
+
+        assert payload[0] == MARKER
+        assert codec.decode(payload) == PROGRESS
+
+    def test_datetimes_are_iso_strings(self):
+        """Timestamps from Supabase rows are cached in ISO format."""
+        updated_at = datetime(2026, 10, 16, 9, 0, tzinfo=timezone.utc)
+
+        assert Codec().decode(Codec().encode({"at": updated_at})) == {
+            "at": updated_at.isoformat()
+        }
+
+    def test_decodes_unversioned_json(self):
+        """Values cached before the header was introduced still decode."""
+        assert Codec().decode(b'{"a": 1}') == {"a": 1}
+        assert Codec().decode('"role_input"') == "role_input"
+
+    def test_decodes_payloads_of_other_codecs(self):
+        """The header, not the configured codec, selects the decoder."""
+        payload = Codec("json").encode(PROGRESS)
+
+        assert build_codec().decode(payload) == PROGRESS
+
+    def test_compresses_only_above_threshold(self, fake_compression):
+        """Small values skip compression; large ones are compressed."""
+        codec = Codec("json", "zstd", compress_threshold=256)
+        large = {"roles": ["Relationship Manager"] * 100}
+
+        small_payload = codec.encode(PROGRESS)
+        large_payload = codec.encode(large)
+
+        assert small_payload[2] == 0
+        assert large_payload[2] == 1
+        assert len(large_payload) < len(Codec("json").encode(large))
+        assert codec.decode(large_payload) == large
+
+    def test_missing_library_is_reported(self):
+        """Decoding a payload of an unavailable codec fails clearly."""
+        payload = bytes((MARKER, 9, 0)) + b"{}"
+
+        with pytest.raises(CodecError):
+            Codec().decode(payload)
+
+    def test_unknown_setting_is_rejected(self):
+        with pytest.raises(CodecError):
+            Codec("pickle")
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from fastapi.testclient import TestClient
+from postgrest import AsyncPostgrestClient
+from src.core.config import settings
+from src.core.instrumentation import _fingerprint, execute_query, query_scope
+from src.core.metrics import MetricsRegistry
+from src.main import app
+
+
+class TestQueryInstrumentation:
+    """Test per-request query recording and metrics export."""
+
+    @pytest.mark.asyncio
+    async def test_queries_are_attached_to_scope(self):
+        """Executed queries land in the current request's log."""
+        query = Mock()
+        query.execute = AsyncMock(return_value=Mock(data=[{"id": "1"}, {"id": "2"}]))
+
+        with query_scope() as log:
+            await execute_query(query, "roles", "select")
+
+        assert log.count == 1
+        record = log.records[0]
+        assert (record.table, record.operation, record.rows) == ("roles", "select", 2)
+        assert record.bytes == len('[{"id":"1"},{"id":"2"}]')
+        assert log.summary()["queries"][0]["table"] == "roles"
+
+    @pytest.mark.asyncio
+    async def test_failed_queries_are_recorded(self):
+        """Errors are recorded and re-raised."""
+        query = Mock()
+        query.execute = AsyncMock(side_effect=RuntimeError("timeout"))
+
+        with query_scope() as log:
+            with pytest.raises(RuntimeError):
+                await execute_query(query, "users", "update")
+
+        assert log.records[0].error == "RuntimeError"
+
+    def test_fingerprint_ignores_filter_values(self):
+        """Lookups differing only by id share a fingerprint; operators count."""
+        client = AsyncPostgrestClient("http://db.test/rest/v1")
+
+        def lookup(op, value):
+            builder = client.from_("units").select("id").limit(5)
+            return getattr(builder, op)("id", value)
+
+        first = _fingerprint(lookup("eq", "u-1"), "units", "select")
+        assert first == _fingerprint(lookup("eq", "u-2"), "units", "select")
+        assert first != _fingerprint(lookup("neq", "u-1"), "units", "select")
+
+    def test_metrics_render_prometheus_text(self):
+        """Counters and histograms render in the exposition format."""
+        registry = MetricsRegistry()
+        registry.counter("queries_total", "Queries", ("table",)).inc(table="users")
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)).observe(
+            0.5
+        )
+
+        text = registry.render()
+
+        assert 'queries_total{table="users"} 1' in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1.0"} 1' in text
+        assert "latency_seconds_count 1" in text
+
+
+class TestMetricsEndpoint:
+    """Test that /metrics is only served to the scraper."""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_disabled_without_token(self, client):
+        with patch.object(settings, "METRICS_TOKEN", ""):
+            assert client.get("/metrics").status_code == 404
+
+    def test_requires_token(self, client):
+        with patch.object(settings, "METRICS_TOKEN", "scrape-secret"):
+            assert client.get("/metrics").status_code == 401
+            wrong = client.get("/metrics", headers={"Authorization": "Bearer nope"})
+            assert wrong.status_code == 401
+
+            response = client.get(
+                "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from src.core.progress_cache import ProgressCache, cache_requests_total
+
+PROGRESS = {"user_id": "user-1", "current_step": "summary", "data": {}, "completed": False}
+
+
+class TestProgressCache:
+    """Test the in-process tier in front of the Redis progress cache."""
+
+    @pytest.fixture
+    def redis(self):
+        """Mock shared Redis client."""
+        redis = Mock()
+        redis.publish = AsyncMock()
+        with patch("src.core.progress_cache.get_redis", return_value=redis):
+            yield redis
+
+    @pytest.fixture
+    def cache(self, redis):
+        remote = Mock()
+        remote.redis_client = redis
+        remote.get_progress = AsyncMock(return_value=dict(PROGRESS))
+        remote.set_progress = AsyncMock(return_value=True)
+        return ProgressCache(remote, channel="progress:invalidate")
+
+    @pytest.mark.asyncio
+    async def test_repeated_reads_are_served_locally(self, cache):
+        """Only the first read goes to Redis."""
+        local_hits = cache_requests_total.value(
+            cache="onboarding_progress", tier="local", result="hit"
+        )
+
+        for _ in range(3):
+            assert (await cache.get_progress("user-1"))["current_step"] == "summary"
+
+        cache.remote.get_progress.assert_awaited_once()
+        assert (
+            cache_requests_total.value(cache="onboarding_progress", tier="local", result="hit")
+            == local_hits + 2
+        )
+
+    @pytest.mark.asyncio
+    async def test_writes_publish_invalidation(self, cache, redis):
+        """A write updates the local copy and notifies other workers."""
+        await cache.set_progress("user-1", dict(PROGRESS, current_step="completed"))
+
+        assert (await cache.get_progress("user-1"))["current_step"] == "completed"
+        channel, message = redis.publish.call_args[0]
+        assert channel == "progress:invalidate"
+        assert json.loads(message) == {"user_id": "user-1", "origin": cache.origin}
+
+    @pytest.mark.asyncio
+    async def test_invalidation_from_other_worker_evicts(self, cache):
+        """Messages from other workers evict; our own are ignored."""
+        await cache.get_progress("user-1")
+
+        cache._on_message(json.dumps({"user_id": "user-1", "origin": cache.origin}))
+        await cache.get_progress("user-1")
+        assert cache.remote.get_progress.await_count == 1
+
+        cache._on_message(json.dumps({"user_id": "user-1", "origin": "other-worker"}))
+        await cache.get_progress("user-1")
+        assert cache.remote.get_progress.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_load_once(self, cache):
+        """Concurrent misses for a user run the database loader once."""
+        cache.remote.get_progress.return_value = None
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            return dict(PROGRESS)
+
+        loader_mock = AsyncMock(side_effect=loader)
+        results = await asyncio.gather(
+            *[cache.get_or_load("user-1", loader_mock) for _ in range(5)]
+        )
+
+        assert loader_mock.await_count == 1
+        assert all(r["current_step"] == "summary" for r in results)
+        cache.remote.set_progress.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_is_served_while_revalidating(self, cache):
+        """Within the stale window the old value is returned and refreshed once."""
+        cache._local.stale_ttl = 60
+        with patch("src.core.cache.time.monotonic", return_value=1000.0):
+            await cache.get_progress("user-1")
+
+        cache.remote.get_progress.return_value = dict(PROGRESS, current_step="completed")
+        with patch("src.core.cache.time.monotonic", return_value=1010.0):
+            stale = await cache.get_or_load("user-1", AsyncMock())
+            await asyncio.sleep(0)
+
+        assert stale["current_step"] == "summary"
+        assert cache.remote.get_progress.await_count == 2
+        assert (await cache.get_progress("user-1"))["current_step"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_quiet_channel_does_not_reset_listener(self, cache, redis):
+        """A channel quiet for longer than socket_timeout keeps the local tier."""
+        polls = 0
+
+        async def get_message(ignore_subscribe_messages, timeout):
+            nonlocal polls
+            polls += 1
+            if polls == 1:
+                cache._local.set("user-1", dict(PROGRESS))
+                cache._local.set("user-2", dict(PROGRESS, user_id="user-2"))
+            if polls <= 3:
+                # Nothing published within this poll's timeout
+                return None
+            if polls == 4:
+                return {
+                    "type": "message",
+                    "data": json.dumps({"user_id": "user-2", "origin": "other-worker"}),
+                }
+            raise asyncio.CancelledError
+
+        pubsub = Mock()
+        pubsub.subscribe = AsyncMock()
+        pubsub.aclose = AsyncMock()
+        pubsub.get_message = AsyncMock(side_effect=get_message)
+        # A blocking listen() would time out on a quiet channel
+        pubsub.listen = Mock(side_effect=TimeoutError)
+        redis.pubsub.return_value = pubsub
+        cache.poll_timeout = 0.01
+
+        with patch("src.core.progress_cache.logger") as logger:
+            with pytest.raises(asyncio.CancelledError):
+                await cache.listen()
+
+        logger.error.assert_not_called()
+        pubsub.subscribe.assert_awaited_once()
+        assert all(
+            call.kwargs["timeout"] == 0.01 for call in pubsub.get_message.call_args_list
+        )
+        assert cache._local.get("user-1") is not None
+        assert cache._local.get("user-2") is None
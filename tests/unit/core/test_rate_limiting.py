@@ -0,0 +1,226 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import Mock, AsyncMock, patch
+from fastapi import Request
+from src.core.config import settings
+from src.core.rate_limiting import (
+    BatchedCounter,
+    RateLimiter,
+    RateLimitExceeded,
+    parse_rate,
+    rate_limit_key,
+)
+
+
+def _request(sub=None, host="10.0.0.1"):
+    return SimpleNamespace(
+        state=SimpleNamespace(auth0_id=sub) if sub else SimpleNamespace(),
+        client=SimpleNamespace(host=host),
+    )
+
+
+class TestRateLimitKey:
+    """Test who a request is counted against."""
+
+    def test_authenticated_requests_use_sub(self):
+        """Users behind one NAT get separate budgets."""
+        assert rate_limit_key(_request("auth0|a")) == "user:auth0|a"
+        assert rate_limit_key(_request("auth0|b")) == "user:auth0|b"
+
+    def test_anonymous_requests_use_ip(self):
+        assert rate_limit_key(_request()) == "ip:10.0.0.1"
+
+    def test_parse_rate(self):
+        assert parse_rate("100/minute") == (100, 60)
+        assert parse_rate("5/hours") == (5, 3600)
+        with pytest.raises(ValueError):
+            parse_rate("100 per fortnight")
+
+
+class TestRateLimiter:
+    """Test the GCRA limiter."""
+
+    @pytest.fixture
+    def clock(self):
+        with patch("src.core.rate_limiting.time") as time:
+            time.monotonic.return_value = 1000.0
+            yield time
+
+    @pytest.mark.asyncio
+    async def test_local_limit_allows_burst_then_spaces_requests(self, clock):
+        """Without Redis, ``limit`` requests pass, then one per interval."""
+        limiter = RateLimiter()
+
+        with patch("src.core.rate_limiting.get_redis", return_value=None):
+            results = [await limiter.hit("k", "3/minute") for _ in range(4)]
+            assert results[:3] == [0.0, 0.0, 0.0]
+            assert results[3] == pytest.approx(20.0)
+
+            clock.monotonic.return_value = 1020.0
+            assert await limiter.hit("k", "3/minute") == 0.0
+            assert await limiter.hit("other", "3/minute") == 0.0
+
+    @pytest.mark.asyncio
+    async def test_redis_check_is_one_script_call(self):
+        """The limit is checked atomically in Redis with one round trip."""
+        script = AsyncMock(return_value=[0, 1500])
+        client = Mock()
+        client.register_script.return_value = script
+        limiter = RateLimiter()
+
+        with patch("src.core.rate_limiting.get_redis", return_value=client):
+            retry_after = await limiter.hit("k", "100/minute")
+
+        assert retry_after == 1.5
+        script.assert_awaited_once_with(keys=["k"], args=[600.0, 60000])
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_to_local(self, clock):
+        client = Mock()
+        client.register_script.return_value = AsyncMock(side_effect=Exception("down"))
+        limiter = RateLimiter()
+
+        with patch("src.core.rate_limiting.get_redis", return_value=client):
+            assert await limiter.hit("k", "1/minute") == 0.0
+            assert await limiter.hit("k", "1/minute") == pytest.approx(60.0)
+
+
+class TestBatchedCounter:
+    """Test approximate counting with batched Redis syncs."""
+
+    @pytest.fixture
+    def clock(self):
+        with patch("src.core.rate_limiting.time") as time:
+            time.time.return_value = 600.0  # Start of a one-minute window
+            yield time
+
+    @pytest.fixture
+    def client(self):
+        client = Mock()
+        client.pipeline.return_value.execute = AsyncMock()
+        return client
+
+    def test_counts_locally(self, clock):
+        """Checks need no network call until the budget is spent."""
+        counter = BatchedCounter("rl")
+
+        results = [counter.hit("k", 3, 60) for _ in range(4)]
+
+        assert results[:3] == [0.0, 0.0, 0.0]
+        assert results[3] == pytest.approx(60.0)
+
+    @pytest.mark.asyncio
+    async def test_sync_sends_hits_and_adopts_global_count(self, clock, client):
+        """Hits from other workers use up this worker's budget after a sync."""
+        counter = BatchedCounter("rl")
+        counter.hit("k", 10, 60)
+        counter.hit("k", 10, 60)
+        pipe = client.pipeline.return_value
+        pipe.execute.return_value = [9, True, None]
+
+        assert await counter.sync(client) == 1
+
+        pipe.incrby.assert_called_once_with("rl:k:10", 2)
+        pipe.get.assert_called_once_with("rl:k:9")
+        assert counter.hit("k", 10, 60) == 0.0
+        assert counter.hit("k", 10, 60) > 0
+
+    def test_previous_window_is_weighted_by_overlap(self, clock):
+        """A busy previous window keeps limiting early in the next one."""
+        counter = BatchedCounter("rl")
+        for _ in range(10):
+            counter.hit("k", 10, 60)
+
+        clock.time.return_value = 675.0  # A quarter into the next window
+
+        # 10 * 0.75 of the previous window leaves room for 3 more
+        results = [counter.hit("k", 10, 60) for _ in range(4)]
+        assert results[:3] == [0.0, 0.0, 0.0]
+        assert results[3] > 0
+
+        clock.time.return_value = 700.0
+        assert counter.hit("k", 10, 60) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_failed_sync_keeps_hits_for_next_sync(self, clock, client):
+        counter = BatchedCounter("rl")
+        counter.hit("k", 10, 60)
+        client.pipeline.return_value.execute.side_effect = Exception("down")
+
+        with pytest.raises(Exception):
+            await counter.sync(client)
+
+        client.pipeline.return_value.execute.side_effect = None
+        client.pipeline.return_value.execute.return_value = [1, True, None]
+        assert await counter.sync(client) == 1
+
+    @pytest.mark.asyncio
+    async def test_late_hits_expire_and_survive_failed_sync(self, clock, client):
+        """Hits of an ended window are sent with a TTL, and retried on failure."""
+        counter = BatchedCounter("rl")
+        counter.hit("k", 10, 60)
+        clock.time.return_value = 660.0
+        counter.hit("k", 10, 60)  # Rolls the window; the first hit is late
+        pipe = client.pipeline.return_value
+        pipe.execute.side_effect = Exception("down")
+
+        with pytest.raises(Exception):
+            await counter.sync(client)
+
+        pipe.reset_mock()
+        pipe.execute.side_effect = None
+        pipe.execute.return_value = [1, True, None, 1, True]
+        assert await counter.sync(client) == 1
+
+        pipe.incrby.assert_any_call("rl:k:10", 1)
+        pipe.expire.assert_any_call("rl:k:10", 120)
+
+
+class TestLimitModes:
+    """Test which routes are counted exactly."""
+
+    @pytest.fixture
+    def request_(self):
+        return Mock(spec=Request, state=Mock(auth0_id="auth0|a"))
+
+    @pytest.mark.asyncio
+    async def test_routes_are_exact_by_default(self, request_):
+        limiter = RateLimiter()
+        endpoint = limiter.limit("5/minute")(AsyncMock(__name__="f", return_value=1))
+        script = AsyncMock(return_value=[1, 0])
+
+        with patch("src.core.rate_limiting.get_redis") as get_redis:
+            get_redis.return_value.register_script.return_value = script
+            await endpoint(request=request_)
+
+        script.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_hot_routes_skip_redis(self, request_):
+        """With RATE_LIMIT_APPROXIMATE, routes not marked exact count locally."""
+        limiter = RateLimiter()
+        endpoint = limiter.limit("1/minute")(AsyncMock(__name__="f", return_value=1))
+
+        with patch("src.core.rate_limiting.get_redis") as get_redis, patch.object(
+            settings, "RATE_LIMIT_APPROXIMATE", True
+        ):
+            assert await endpoint(request=request_) == 1
+            with pytest.raises(RateLimitExceeded):
+                await endpoint(request=request_)
+
+        get_redis.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_exact_routes_check_redis_every_request(self, request_):
+        limiter = RateLimiter()
+        endpoint = limiter.limit("5/minute", exact=True)(
+            AsyncMock(__name__="login", return_value=1)
+        )
+        script = AsyncMock(return_value=[1, 0])
+
+        with patch("src.core.rate_limiting.get_redis") as get_redis:
+            get_redis.return_value.register_script.return_value = script
+            await endpoint(request=request_)
+            await endpoint(request=request_)
+
+        assert script.await_count == 2
@@ -0,0 +1,199 @@
+import pytest
+import redis.asyncio as redis_lib
+from datetime import datetime, timezone
+from unittest.mock import Mock, AsyncMock, patch
+from src.core.codec import cache_codec
+from src.core.circuit_breaker import OPEN
+from src.core.redis_client import (
+    InstrumentedConnectionPool,
+    OnboardingRedisClient,
+    RedisUnavailable,
+    _guarded,
+    get_redis,
+    init_redis,
+    decode_progress,
+    encode_progress,
+    redis_breaker,
+)
+
+
+class TestProgressHash:
+    """Test the Redis hash representation of onboarding progress."""
+
+    PROGRESS = {
+        "user_id": "user-1",
+        "current_step": "industry_selection",
+        "completed": False,
+        "data": {
+            "set_native_language": {"language": "english"},
+            "set_industry": {"industry": "banking_finance"},
+        },
+    }
+
+    @pytest.fixture
+    def redis(self):
+        """Mock shared asyncio Redis client."""
+        redis = Mock()
+        redis.pipeline.return_value.execute = AsyncMock()
+        with patch("src.core.redis_client._redis", redis):
+            yield redis
+
+    def test_round_trip(self):
+        """Each action is its own field and decodes back to the same row."""
+        fields = encode_progress(self.PROGRESS)
+
+        assert cache_codec.decode(fields["data:set_industry"]) == {
+            "industry": "banking_finance"
+        }
+        assert cache_codec.decode(fields["completed"]) is False
+        assert decode_progress(fields) == self.PROGRESS
+
+    def test_decodes_binary_field_names_and_legacy_json(self):
+        """Hashes read back as bytes, including pre-codec JSON values."""
+        fields = {b"current_step": b'"role_input"', b"data:set_role": b'{"role": 1}'}
+
+        assert decode_progress(fields) == {
+            "current_step": "role_input",
+            "data": {"set_role": {"role": 1}},
+        }
+
+    def test_datetimes_are_iso_strings(self):
+        """Timestamps are cached in ISO format."""
+        updated_at = datetime(2026, 10, 16, 9, 0, tzinfo=timezone.utc)
+
+        fields = encode_progress({"updated_at": updated_at})
+
+        assert decode_progress(fields)["updated_at"] == updated_at.isoformat()
+
+    @pytest.mark.asyncio
+    async def test_get_progress_refreshes_ttl_in_same_round_trip(self, redis):
+        """Read and TTL refresh are pipelined into one round trip."""
+        pipe = redis.pipeline.return_value
+        pipe.execute.return_value = [encode_progress(self.PROGRESS), True]
+
+        progress = await OnboardingRedisClient().get_progress("user-1")
+
+        assert progress == self.PROGRESS
+        pipe.hgetall.assert_called_once_with("onboarding:progress:user-1")
+        pipe.expire.assert_called_once_with("onboarding:progress:user-1", 86400)
+        pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_update_writes_only_changed_fields(self, redis):
+        """An action rewrites its own field, not the whole document."""
+        script = AsyncMock(return_value=1)
+        redis.register_script.return_value = script
+
+        assert await OnboardingRedisClient().update_progress(
+            "user-1",
+            {"current_step": "role_input"},
+            action="search_roles",
+            action_data={"query": "analyst"},
+        )
+
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["onboarding:progress:user-1"]
+        assert kwargs["args"] == [
+            86400,
+            0,
+            "current_step",
+            cache_codec.encode("role_input"),
+            "data:search_roles",
+            cache_codec.encode({"query": "analyst"}),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_update_passes_step_order_to_script(self, redis):
+        """The forward-only step check runs in the script, against the cache."""
+        script = AsyncMock(return_value=cache_codec.encode("summary"))
+        redis.register_script.return_value = script
+
+        assert await OnboardingRedisClient().update_progress(
+            "user-1",
+            {"current_step": "role_input"},
+            step_order=["not_started", "role_input", "summary"],
+        )
+
+        assert script.call_args.kwargs["args"] == [
+            86400,
+            3,
+            cache_codec.encode("not_started"),
+            cache_codec.encode("role_input"),
+            cache_codec.encode("summary"),
+            "current_step",
+            cache_codec.encode("role_input"),
+        ]
+
+
+class TestSharedRedis:
+    """Test the process-wide asyncio Redis client."""
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_falls_back(self):
+        """Without a reachable Redis, callers get None and use the database."""
+        with patch("src.core.redis_client.settings") as settings:
+            settings.REDIS_URL = "redis://127.0.0.1:1/0"
+            settings.REDIS_POOL_MAX_CONNECTIONS = 2
+            settings.REDIS_POOL_TIMEOUT = 0.1
+            settings.REDIS_SOCKET_TIMEOUT = 0.1
+
+            assert await init_redis() is None
+
+        assert get_redis() is None
+        assert await OnboardingRedisClient().get_progress("user-1") is None
+
+    @pytest.mark.asyncio
+    async def test_pool_forwards_connection_arguments(self):
+        """redis-py 5.0.x still passes command_name to get_connection."""
+        pool = InstrumentedConnectionPool(max_connections=1)
+        connection = Mock()
+        with patch.object(
+            redis_lib.BlockingConnectionPool,
+            "get_connection",
+            AsyncMock(return_value=connection),
+        ) as get_connection, patch.object(pool, "_export_usage"):
+            assert await pool.get_connection("GET", key="k") is connection
+
+        get_connection.assert_awaited_once_with("GET", key="k")
+
+
+class TestRedisBreaker:
+    """Test the circuit breaker around Redis commands."""
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_open_the_circuit(self):
+        """Once open, Redis is skipped without waiting on a timeout."""
+        failing = AsyncMock(side_effect=redis_lib.ConnectionError("timeout"))
+
+        for _ in range(redis_breaker.failure_threshold):
+            with pytest.raises(redis_lib.ConnectionError):
+                await _guarded(failing)
+
+        assert redis_breaker.state == OPEN
+        with pytest.raises(RedisUnavailable):
+            await _guarded(failing)
+        assert failing.await_count == redis_breaker.failure_threshold
+
+    @pytest.mark.asyncio
+    async def test_command_errors_do_not_count(self):
+        """A reply such as BUSYGROUP means Redis itself is healthy."""
+        rejected = AsyncMock(side_effect=redis_lib.ResponseError("BUSYGROUP"))
+
+        for _ in range(redis_breaker.failure_threshold):
+            with pytest.raises(redis_lib.ResponseError):
+                await _guarded(rejected)
+
+        assert redis_breaker.state != OPEN
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_hides_the_client(self):
+        """Callers see no client and use the database directly."""
+        client = Mock()
+        with patch("src.core.redis_client._redis", client):
+            for _ in range(redis_breaker.failure_threshold):
+                redis_breaker.record_failure()
+
+            assert get_redis() is None
+            assert get_redis(ignore_breaker=True) is client
+            assert await OnboardingRedisClient().get_progress("user-1") is None
+        client.pipeline.assert_not_called()
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.core.request_context import IdentityMap, get_identity_map, request_scope
+from src.repositories.onboarding.profile_repository import ProfileRepository
+
+
+class TestIdentityMap:
+    """Test request-scoped read coalescing."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.select = Mock(return_value=mock)
+        mock.update = Mock(return_value=mock)
+        mock.eq = Mock(return_value=mock)
+        mock.execute = AsyncMock(
+            return_value=Mock(data=[{"id": "user-1", "auth0_id": "auth0|abc"}])
+        )
+        return mock
+
+    @pytest.mark.asyncio
+    async def test_concurrent_reads_share_one_load(self):
+        """Concurrent identical reads run the loader once."""
+        identity_map = IdentityMap()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"id": "row-1"}
+
+        results = await asyncio.gather(
+            *[identity_map.get_or_load(("users", "id", "row-1"), loader) for _ in range(5)]
+        )
+
+        assert calls == 1
+        assert all(r is results[0] for r in results)
+
+    @pytest.mark.asyncio
+    async def test_failed_load_is_not_memoized(self):
+        """A failing loader is retried on the next read."""
+        identity_map = IdentityMap()
+        loader = AsyncMock(side_effect=[RuntimeError("boom"), {"id": "row-1"}])
+
+        with pytest.raises(RuntimeError):
+            await identity_map.get_or_load(("users", "id", "row-1"), loader)
+
+        result = await identity_map.get_or_load(("users", "id", "row-1"), loader)
+        assert result == {"id": "row-1"}
+        assert loader.await_count == 2
+
+    def test_no_identity_map_outside_scope(self):
+        """Identity map only exists inside a request scope."""
+        assert get_identity_map() is None
+        with request_scope() as identity_map:
+            assert get_identity_map() is identity_map
+        assert get_identity_map() is None
+
+    @pytest.mark.asyncio
+    async def test_repository_reads_are_deduplicated(self, mock_db):
+        """Repeated user lookups in one request hit the database once."""
+        repo = ProfileRepository(mock_db)
+
+        with request_scope():
+            first = await repo.get_user_by_auth0_id("auth0|abc")
+            second = await ProfileRepository(mock_db).get_user_by_auth0_id("auth0|abc")
+
+        assert first == second
+        assert mock_db.execute.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_returned_rows_are_copies(self, mock_db):
+        """A caller editing its row does not leak into later reads."""
+        repo = ProfileRepository(mock_db)
+
+        with request_scope():
+            first = await repo.get_user_by_auth0_id("auth0|abc")
+            first["native_language"] = "english"
+            second = await repo.get_user_by_auth0_id("auth0|abc")
+
+        assert first is not second
+        assert "native_language" not in second
+
+    @pytest.mark.asyncio
+    async def test_reads_see_own_writes(self, mock_db):
+        """A lookup after an update returns the written row, not the stale one."""
+        repo = ProfileRepository(mock_db)
+
+        with request_scope():
+            await repo.get_user_by_auth0_id("auth0|abc")
+            mock_db.execute.return_value = Mock(
+                data=[{"id": "user-1", "auth0_id": "auth0|abc", "native_language": "english"}]
+            )
+            await repo.update("user-1", {"native_language": "english"})
+            user = await repo.get_user_by_auth0_id("auth0|abc")
+
+        assert user["native_language"] == "english"
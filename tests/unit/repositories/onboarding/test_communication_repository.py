@@ -1,6 +1,7 @@
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, AsyncMock
 from uuid import uuid4
+from src.core.request_context import request_scope
 from src.repositories.onboarding.communication_repository import CommunicationRepository
 
 
@@ -18,7 +19,8 @@ class TestCommunicationRepository:
         mock.delete = Mock(return_value=mock)
         mock.eq = Mock(return_value=mock)
         mock.order = Mock(return_value=mock)
-        mock.execute = Mock()
+        mock.rpc = Mock(return_value=mock)
+        mock.execute = AsyncMock()
         return mock
     
     @pytest.mark.asyncio
@@ -94,15 +96,12 @@ class TestCommunicationRepository:
         user_id = str(uuid4())
         partner_ids = [str(uuid4()), str(uuid4()), str(uuid4())]
         
-        # Mock the delete operation
-        mock_db.execute.side_effect = [
-            Mock(data=[]),  # Delete response
-            Mock(data=[     # Insert response
-                {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[0], "priority": 1},
-                {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[1], "priority": 2},
-                {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[2], "priority": 3}
-            ])
-        ]
+        # Mock the replace function response (final ordered set)
+        mock_db.execute.return_value = Mock(data=[
+            {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[0], "priority": 1},
+            {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[1], "priority": 2},
+            {"id": str(uuid4()), "user_id": user_id, "communication_partner_id": partner_ids[2], "priority": 3}
+        ])
         
         repo = CommunicationRepository(mock_db)
         result = await repo.save_user_partner_selections(user_id, partner_ids)
@@ -113,16 +112,14 @@ class TestCommunicationRepository:
         assert result[1]["priority"] == 2
         assert result[2]["priority"] == 3
         
-        # Verify delete was called first
-        mock_db.delete.assert_called_once()
-        
-        # Verify insert was called with correct data
-        mock_db.insert.assert_called_once()
-        insert_data = mock_db.insert.call_args[0][0]
-        assert len(insert_data) == 3
-        assert insert_data[0]["priority"] == 1
-        assert insert_data[1]["priority"] == 2
-        assert insert_data[2]["priority"] == 3
+        # Verify a single atomic replace call instead of delete + insert
+        mock_db.rpc.assert_called_once_with(
+            "replace_user_partner_selections",
+            {"p_user_id": user_id, "p_partner_ids": partner_ids}
+        )
+        mock_db.delete.assert_not_called()
+        mock_db.insert.assert_not_called()
+        assert mock_db.execute.await_count == 1
     
     @pytest.mark.asyncio
     async def test_get_user_selected_partners_with_joins(self, mock_db):
@@ -182,28 +179,25 @@ class TestCommunicationRepository:
         partner_id = str(uuid4())
         unit_ids = [str(uuid4()), str(uuid4())]
         
-        # Mock responses
-        mock_db.execute.side_effect = [
-            Mock(data=[]),  # Delete response
-            Mock(data=[     # Insert response
-                {
-                    "id": str(uuid4()),
-                    "user_id": user_id,
-                    "communication_partner_id": partner_id,
-                    "unit_id": unit_ids[0],
-                    "priority": 1,
-                    "is_custom": False
-                },
-                {
-                    "id": str(uuid4()),
-                    "user_id": user_id,
-                    "communication_partner_id": partner_id,
-                    "unit_id": unit_ids[1],
-                    "priority": 2,
-                    "is_custom": False
-                }
-            ])
-        ]
+        # Mock the replace function response (final ordered set)
+        mock_db.execute.return_value = Mock(data=[
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "communication_partner_id": partner_id,
+                "unit_id": unit_ids[0],
+                "priority": 1,
+                "is_custom": False
+            },
+            {
+                "id": str(uuid4()),
+                "user_id": user_id,
+                "communication_partner_id": partner_id,
+                "unit_id": unit_ids[1],
+                "priority": 2,
+                "is_custom": False
+            }
+        ])
         
         repo = CommunicationRepository(mock_db)
         result = await repo.save_user_partner_situations(user_id, partner_id, unit_ids)
@@ -215,4 +209,78 @@ class TestCommunicationRepository:
         assert result[0]["is_custom"] == False
         
         # Verify table name
-        mock_db.table.assert_any_call("user_partner_units")
\ No newline at end of file
+        mock_db.rpc.assert_called_once()
+        assert mock_db.rpc.call_args[0][0] == "replace_user_partner_units"
+    
+    @pytest.mark.asyncio
+    async def test_get_user_complete_selections_single_query(self, mock_db):
+        """Test partners and situations are fetched in one nested query."""
+        user_id = str(uuid4())
+        partner_id = str(uuid4())
+        mock_db.execute.return_value = Mock(data=[
+            {
+                "communication_partner_id": partner_id,
+                "priority": 1,
+                "communication_partners": {
+                    "id": partner_id,
+                    "name": "Clients",
+                    "user_partner_units": [
+                        {"unit_id": "u1", "priority": 1, "units": {"name": "Meetings"}},
+                        {"unit_id": "u2", "priority": 2, "units": {"name": "Presentations"}}
+                    ]
+                }
+            }
+        ])
+        
+        repo = CommunicationRepository(mock_db)
+        result = await repo.get_user_complete_selections(user_id)
+        
+        assert mock_db.execute.await_count == 1
+        partner = result["partners"][0]
+        assert partner["partner"] == {"id": partner_id, "name": "Clients"}
+        assert [s["unit"]["name"] for s in partner["situations"]] == ["Meetings", "Presentations"]
+        mock_db.eq.assert_any_call("communication_partners.user_partner_units.user_id", user_id)
+    
+    @pytest.mark.asyncio
+    async def test_count_user_selected_partners(self, mock_db):
+        """Test counting selections uses a head-only count query."""
+        mock_db.execute.return_value = Mock(data=[], count=2)
+        
+        repo = CommunicationRepository(mock_db)
+        result = await repo.count_user_selected_partners("user-1")
+        
+        assert result == 2
+        mock_db.select.assert_called_with("communication_partner_id", count="exact", head=True)
+
+    @pytest.mark.asyncio
+    async def test_count_after_saving_selections_reads_primary(self, mock_db):
+        """Test a count in the same request as the replace RPC sees its write."""
+        mock_db.execute.return_value = Mock(data=[], count=1)
+        repo = CommunicationRepository(mock_db)
+        repo.read_db = Mock()
+        
+        with request_scope():
+            await repo.save_user_partner_selections("user-1", ["partner-1"])
+            result = await repo.count_user_selected_partners("user-1")
+        
+        assert result == 1
+        repo.read_db.table.assert_not_called()
+
+    
+    @pytest.mark.asyncio
+    async def test_identifier_resolution_uses_cached_snapshot(self, mock_db):
+        """Test identifiers resolve from one cached load of the partners table."""
+        clients_id = str(uuid4())
+        colleagues_id = str(uuid4())
+        mock_db.execute.return_value = Mock(data=[
+            {"id": clients_id, "name": "Clients", "is_active": True},
+            {"id": colleagues_id, "name": "Senior Management", "is_active": True}
+        ])
+        
+        repo = CommunicationRepository(mock_db)
+        resolved = await repo.resolve_partner_identifiers(["senior_management", "unknown", "CLIENTS"])
+        partner = await CommunicationRepository(mock_db).get_partner_by_identifier("clients")
+        
+        assert resolved == [colleagues_id, clients_id]
+        assert partner["id"] == clients_id
+        assert mock_db.execute.await_count == 1
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, AsyncMock
 from src.repositories.onboarding.job_roles_repository import JobRolesRepository
 
 class TestJobRolesRepository:
@@ -14,7 +14,11 @@ class TestJobRolesRepository:
         mock.insert = Mock(return_value=mock)
         mock.update = Mock(return_value=mock)
         mock.eq = Mock(return_value=mock)
-        mock.execute = Mock()
+        mock.is_ = Mock(return_value=mock)
+        mock.gt = Mock(return_value=mock)
+        mock.order = Mock(return_value=mock)
+        mock.limit = Mock(return_value=mock)
+        mock.execute = AsyncMock()
         return mock
     
     @pytest.mark.asyncio
@@ -97,6 +101,47 @@ class TestJobRolesRepository:
             "id, title, description, industry_id, embedding_vector, is_system_role, industries!inner(id, name)"
         )
     
+    @pytest.mark.asyncio
+    async def test_get_roles_missing_embeddings(self, mock_db):
+        """Test fetching only text columns of roles without embeddings."""
+        mock_db.execute.return_value = Mock(
+            data=[{"id": "role1", "title": "Teller", "description": None, "industry_id": "ind1"}]
+        )
+
+        repo = JobRolesRepository(mock_db)
+        result = await repo.get_roles_missing_embeddings()
+
+        assert result[0]["id"] == "role1"
+        mock_db.select.assert_called_with("id, title, description, industry_id")
+        mock_db.is_.assert_called_once_with("embedding_vector", "null")
+
+    @pytest.mark.asyncio
+    async def test_iter_roles_for_indexing(self, mock_db):
+        """Test streaming roles in keyset pages."""
+        def role(i):
+            return {
+                "id": f"role{i}",
+                "title": f"Role {i}",
+                "description": "",
+                "industry_id": "ind1",
+                "embedding_vector": None,
+                "is_system_role": True,
+                "industries": {"id": "ind1", "name": "Banking & Finance"}
+            }
+
+        mock_db.execute.side_effect = [
+            Mock(data=[role(1), role(2)]),
+            Mock(data=[role(3)]),
+        ]
+
+        repo = JobRolesRepository(mock_db)
+        batches = [batch async for batch in repo.iter_roles_for_indexing(batch_size=2)]
+
+        assert [len(b) for b in batches] == [2, 1]
+        assert batches[1][0]["industry_name"] == "Banking & Finance"
+        mock_db.gt.assert_called_once_with("id", "role2")
+        mock_db.limit.assert_called_with(2)
+
     @pytest.mark.asyncio
     async def test_update_user_selected_role(self, mock_db):
         """Test updating user's selected role."""
@@ -0,0 +1,95 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.repositories.onboarding.onboarding_progress_repository import (
+    OnboardingProgressRepository,
+)
+from src.services.onboarding.onboarding_progress_service import OnboardingProgressService
+
+
+class TestOnboardingProgressRepository:
+    """Test onboarding progress repository."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.rpc = Mock(return_value=mock)
+        mock.execute = AsyncMock(
+            return_value=Mock(
+                data={
+                    "user_id": "user-1",
+                    "current_step": "industry_selection",
+                    "data": {"set_industry": {"industry": "banking_finance"}},
+                    "completed": False,
+                }
+            )
+        )
+        return mock
+
+    @pytest.mark.asyncio
+    async def test_apply_action_merges_server_side(self, mock_db):
+        """An action is one RPC carrying only the new step and action data."""
+        repo = OnboardingProgressRepository(mock_db)
+
+        row = await repo.apply_action(
+            "user-1",
+            "industry_selection",
+            OnboardingProgressService.STEP_ORDER,
+            action="set_industry",
+            action_data={"industry": "banking_finance"},
+        )
+
+        assert row["current_step"] == "industry_selection"
+        mock_db.rpc.assert_called_once_with(
+            "apply_onboarding_action",
+            {
+                "p_user_id": "user-1",
+                "p_step": "industry_selection",
+                "p_step_order": OnboardingProgressService.STEP_ORDER,
+                "p_action": "set_industry",
+                "p_action_data": {"industry": "banking_finance"},
+                "p_completed": False,
+            },
+        )
+
+    @pytest.mark.asyncio
+    async def test_merge_progress_is_one_monotonic_rpc(self, mock_db):
+        """Flushed rows go through the forward-only merge, not a plain upsert."""
+        mock_db.execute.return_value = Mock(
+            data=[{"user_id": "user-1", "current_step": "completed", "completed": True}]
+        )
+        repo = OnboardingProgressRepository(mock_db)
+        rows = [
+            {
+                "user_id": "user-1",
+                "current_step": "role_input",
+                "data": {},
+                "completed": False,
+            }
+        ]
+
+        merged = await repo.merge_progress(rows, OnboardingProgressService.STEP_ORDER)
+
+        assert merged[0]["completed"] is True
+        mock_db.rpc.assert_called_once_with(
+            "merge_onboarding_progress",
+            {"p_rows": rows, "p_step_order": OnboardingProgressService.STEP_ORDER},
+        )
+        mock_db.table.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reset_progress_bumps_reset_version(self, mock_db):
+        """Resets go through the RPC that bumps reset_version."""
+        mock_db.execute.return_value = Mock(
+            data=[{"user_id": "user-1", "current_step": "not_started", "reset_version": 2}]
+        )
+        repo = OnboardingProgressRepository(mock_db)
+
+        row = await repo.reset_progress("user-1", "not_started")
+
+        assert row["reset_version"] == 2
+        mock_db.rpc.assert_called_once_with(
+            "reset_onboarding_progress",
+            {"p_user_id": "user-1", "p_step": "not_started"},
+        )
+        mock_db.table.assert_not_called()
@@ -0,0 +1,34 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.repositories.onboarding.profile_repository import ProfileRepository
+from src.models.enums import Industry
+
+
+class TestProfileRepository:
+    """Test profile repository industry lookups."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.select = Mock(return_value=mock)
+        mock.eq = Mock(return_value=mock)
+        mock.execute = AsyncMock(return_value=Mock(data=[
+            {"id": "ind1", "name": "Banking & Finance", "status": "available"},
+            {"id": "ind2", "name": "Real Estate", "status": "coming_soon"}
+        ]))
+        return mock
+
+    @pytest.mark.asyncio
+    async def test_industry_lookups_use_cached_map(self, mock_db):
+        """Test enum, id and name lookups share one load of the industries table."""
+        repo = ProfileRepository(mock_db)
+
+        assert await repo.get_industry_id_by_name(Industry.BANKING_FINANCE) == "ind1"
+        assert await repo.get_industry_id_by_name(Industry.REAL_ESTATE) is None
+        industry = await ProfileRepository(mock_db).get_industry_by_id("ind1")
+
+        assert industry["name"] == "Banking & Finance"
+        assert mock_db.execute.await_count == 1
+        mock_db.table.assert_called_once_with("industries")
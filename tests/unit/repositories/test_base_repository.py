@@ -0,0 +1,289 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.core.request_context import request_scope
+from src.repositories.base import (
+    SupabaseRepository,
+    _chunk_rows,
+    _count_cache,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class TestBulkOperations:
+    """Test chunked bulk writes on SupabaseRepository."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.insert = Mock(return_value=mock)
+        mock.upsert = Mock(return_value=mock)
+        mock.execute = AsyncMock(return_value=Mock(data=[]))
+        return mock
+
+    def test_chunk_rows_by_count(self):
+        """Rows are split at the row limit."""
+        rows = [{"id": str(i)} for i in range(5)]
+        chunks = list(_chunk_rows(rows, max_rows=2, max_bytes=1_000_000))
+
+        assert [len(c) for c in chunks] == [2, 2, 1]
+
+    def test_chunk_rows_by_bytes(self):
+        """Large rows are split before the payload limit is exceeded."""
+        rows = [{"id": str(i), "embedding_vector": [0.1] * 100} for i in range(4)]
+        chunks = list(_chunk_rows(rows, max_rows=100, max_bytes=1000))
+
+        assert len(chunks) == 4
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_chunks_requests(self, mock_db):
+        """bulk_create issues one insert per chunk."""
+        repo = SupabaseRepository(mock_db, "roles")
+        rows = [{"title": f"Role {i}"} for i in range(5)]
+
+        result = await repo.bulk_create(rows, chunk_size=2)
+
+        assert mock_db.insert.call_count == 3
+        assert result.total == 5
+        assert result.succeeded == 5
+        assert result.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_bulk_upsert_reports_failed_chunks(self, mock_db):
+        """Failed chunks are reported without aborting the others."""
+        mock_db.execute.side_effect = [Mock(data=[]), Exception("timeout"), Mock(data=[])]
+        repo = SupabaseRepository(mock_db, "roles")
+        rows = [{"id": str(i)} for i in range(6)]
+
+        result = await repo.bulk_upsert(rows, on_conflict="id", chunk_size=2, concurrency=1)
+
+        assert result.succeeded == 4
+        assert result.failed == 2
+        assert result.errors == [{"chunk": 1, "rows": 2, "error": "timeout"}]
+        assert mock_db.upsert.call_args.kwargs["on_conflict"] == "id"
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_requires_ids(self, mock_db):
+        """bulk_update_by_id rejects rows without an id."""
+        repo = SupabaseRepository(mock_db, "roles")
+
+        with pytest.raises(ValueError):
+            await repo.bulk_update_by_id([{"title": "No id"}])
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_reports_unknown_ids(self, mock_db):
+        """Ids the UPDATE did not touch are reported, never inserted."""
+        mock_db.rpc = Mock(return_value=mock_db)
+        mock_db.execute.return_value = Mock(data=["1"])
+        repo = SupabaseRepository(mock_db, "roles")
+
+        result = await repo.bulk_update_by_id(
+            [{"id": "1", "title": "Known"}, {"id": "2", "title": "Deleted"}]
+        )
+
+        mock_db.upsert.assert_not_called()
+        mock_db.rpc.assert_called_once_with(
+            "bulk_update_rows",
+            {
+                "p_table": "roles",
+                "p_columns": ["title"],
+                "p_rows": [
+                    {"id": "1", "title": "Known"},
+                    {"id": "2", "title": "Deleted"},
+                ],
+            },
+        )
+        assert result.succeeded == 1
+        assert result.failed == 1
+        assert result.errors[-1] == {"chunk": None, "rows": 1, "error": "ids not found"}
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_groups_rows_by_columns(self, mock_db):
+        """A column missing from a row is not written for that row."""
+        mock_db.rpc = Mock(return_value=mock_db)
+        mock_db.execute.side_effect = [Mock(data=["1", "3"]), Mock(data=["2"])]
+        repo = SupabaseRepository(mock_db, "roles")
+
+        result = await repo.bulk_update_by_id(
+            [
+                {"id": "1", "title": "A"},
+                {"id": "2", "title": "B", "description": "Kept"},
+                {"id": "3", "title": "C"},
+            ]
+        )
+
+        calls = [c.args[1] for c in mock_db.rpc.call_args_list]
+        assert [(c["p_columns"], [r["id"] for r in c["p_rows"]]) for c in calls] == [
+            (["title"], ["1", "3"]),
+            (["description", "title"], ["2"]),
+        ]
+        assert result.succeeded == 3
+        assert result.failed == 0
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_numbers_chunks_across_groups(self, mock_db):
+        """A failed chunk's number is unique within the call."""
+        mock_db.rpc = Mock(return_value=mock_db)
+        mock_db.execute.side_effect = [Mock(data=["1"]), Exception("timeout")]
+        repo = SupabaseRepository(mock_db, "roles")
+
+        result = await repo.bulk_update_by_id(
+            [{"id": "1", "title": "A"}, {"id": "2", "description": "B"}],
+            concurrency=1,
+        )
+
+        assert result.succeeded == 1
+        assert result.errors == [{"chunk": 1, "rows": 1, "error": "timeout"}]
+
+
+class TestPagination:
+    """Test offset and keyset pagination on SupabaseRepository."""
+
+    @pytest.fixture(autouse=True)
+    def clear_count_cache(self):
+        _count_cache.clear()
+        yield
+        _count_cache.clear()
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock Supabase client."""
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.select = Mock(return_value=mock)
+        mock.eq = Mock(return_value=mock)
+        mock.or_ = Mock(return_value=mock)
+        mock.order = Mock(return_value=mock)
+        mock.range = Mock(return_value=mock)
+        mock.limit = Mock(return_value=mock)
+        mock.execute = AsyncMock()
+        return mock
+
+    def _rows(self, n):
+        return [
+            {"id": f"id-{i}", "created_at": f"2024-01-01T00:00:{i:02d}+00:00"}
+            for i in range(n)
+        ]
+
+    def test_cursor_round_trip(self):
+        """Cursors decode to the position they were built from."""
+        cursor = encode_cursor("2024-01-01T00:00:00+00:00", "id-1")
+
+        assert decode_cursor(cursor) == ["2024-01-01T00:00:00+00:00", "id-1"]
+
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    @pytest.mark.asyncio
+    async def test_paginate_reuses_cached_total(self, mock_db):
+        """A planned total is counted once and reused for later pages."""
+        mock_db.execute.return_value = Mock(data=self._rows(3), count=10)
+        repo = SupabaseRepository(mock_db, "users")
+
+        first = await repo.paginate(page=1, page_size=2, count="planned")
+        second = await repo.paginate(page=2, page_size=2, count="planned")
+
+        assert first["total_count"] == 10
+        assert first["total_pages"] == 5
+        assert first["has_next"] is True
+        assert len(first["data"]) == 2
+        assert second["total_count"] == 10
+        assert mock_db.select.call_args_list[0].kwargs["count"] == "planned"
+        assert mock_db.select.call_args_list[1].kwargs["count"] is None
+
+    @pytest.mark.asyncio
+    async def test_paginate_recounts_exact_total(self, mock_db):
+        """Exact totals are never served from the cache, so writes show up."""
+        mock_db.execute.return_value = Mock(data=self._rows(3), count=10)
+        repo = SupabaseRepository(mock_db, "users")
+        await repo.paginate(page=1, page_size=2)
+
+        mock_db.execute.return_value = Mock(data=self._rows(3), count=11)
+        second = await repo.paginate(page=1, page_size=2)
+
+        assert second["total_count"] == 11
+        assert [c.kwargs["count"] for c in mock_db.select.call_args_list] == [
+            "exact",
+            "exact",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_paginate_without_count(self, mock_db):
+        """count=None skips the total but still reports has_next."""
+        mock_db.execute.return_value = Mock(data=self._rows(2), count=None)
+        repo = SupabaseRepository(mock_db, "users")
+
+        result = await repo.paginate(page=1, page_size=2, count=None)
+
+        assert result["total_count"] is None
+        assert result["total_pages"] is None
+        assert result["has_next"] is False
+
+    @pytest.mark.asyncio
+    async def test_paginate_keyset_continues_after_cursor(self, mock_db):
+        """Keyset pages filter past the cursor and return the next one."""
+        mock_db.execute.return_value = Mock(data=self._rows(3), count=None)
+        repo = SupabaseRepository(mock_db, "users")
+
+        first = await repo.paginate_keyset(page_size=2)
+        assert first["has_next"] is True
+        assert decode_cursor(first["next_cursor"]) == [
+            "2024-01-01T00:00:01+00:00",
+            "id-1",
+        ]
+        mock_db.or_.assert_not_called()
+
+        mock_db.execute.return_value = Mock(data=self._rows(1), count=None)
+        last = await repo.paginate_keyset(page_size=2, cursor=first["next_cursor"])
+
+        assert last["next_cursor"] is None
+        assert last["has_next"] is False
+        mock_db.or_.assert_called_once_with(
+            'created_at.lt."2024-01-01T00:00:01+00:00",'
+            'and(created_at.eq."2024-01-01T00:00:01+00:00",id.lt."id-1")'
+        )
+
+
+class TestReadReplica:
+    """Test routing of repository reads to the read replica."""
+
+    def _client(self, rows):
+        mock = Mock()
+        mock.table = Mock(return_value=mock)
+        mock.select = Mock(return_value=mock)
+        mock.update = Mock(return_value=mock)
+        mock.eq = Mock(return_value=mock)
+        mock.execute = AsyncMock(return_value=Mock(data=rows))
+        return mock
+
+    @pytest.fixture
+    def repo(self):
+        repo = SupabaseRepository(self._client([{"id": "1", "name": "primary"}]), "roles")
+        repo.read_db = self._client([{"id": "1", "name": "replica"}])
+        return repo
+
+    @pytest.mark.asyncio
+    async def test_reads_use_replica(self, repo):
+        """Plain reads are served by the replica."""
+        assert (await repo.get_by_id("1"))["name"] == "replica"
+        assert (await repo.get_all())[0]["name"] == "replica"
+        repo.db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_reads_after_write_use_primary(self, repo):
+        """Once a request has written, its reads go to the primary."""
+        with request_scope():
+            await repo.update("1", {"name": "primary"})
+            rows = await repo.get_all()
+
+        assert rows[0]["name"] == "primary"
+        repo.read_db.execute.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_primary_read_can_be_forced(self, repo):
+        """get_by_field(primary=True) bypasses the replica."""
+        row = await repo.get_by_field("id", "1", primary=True)
+
+        assert row["name"] == "primary"
@@ -0,0 +1,95 @@
+import asyncio
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from src.services.onboarding.azure_search_service import AzureSearchService
+
+
+class TestAzureSearchService:
+    """Test Azure Search reindexing pipeline."""
+
+    @pytest.fixture
+    def mock_azure(self):
+        """Mock Azure Search client."""
+        with patch('src.services.onboarding.azure_search_service.azure_search_client') as mock_azure:
+            mock_azure.delete_all_documents = AsyncMock()
+            mock_azure.upload_documents = AsyncMock()
+            yield mock_azure
+
+    def _role(self, i, embedded=True):
+        return {
+            "id": f"role{i}",
+            "title": f"Role {i}",
+            "description": "",
+            "industry_id": "ind1",
+            "industry_name": "Banking & Finance",
+            "embedding_vector": [0.1] * 3 if embedded else None,
+            "is_system_role": True,
+        }
+
+    def _service(self, batches):
+        async def iter_roles(batch_size):
+            for batch in batches:
+                yield batch
+
+        service = AzureSearchService(Mock())
+        service.job_roles_repo.iter_roles_for_indexing = iter_roles
+        return service
+
+    @pytest.mark.asyncio
+    async def test_reindex_uploads_each_batch(self, mock_azure):
+        """Each streamed page is uploaded as its own batch."""
+        service = self._service([
+            [self._role(1), self._role(2, embedded=False)],
+            [self._role(3)],
+        ])
+
+        result = await service.reindex_all_roles(batch_size=2)
+
+        assert result["total_roles"] == 3
+        assert result["documents_indexed"] == 2
+        mock_azure.delete_all_documents.assert_awaited_once()
+        assert mock_azure.upload_documents.await_count == 2
+        document = mock_azure.upload_documents.call_args_list[0][0][0][0]
+        assert document["search_keywords"] == "Role 1 Banking & Finance"
+
+    @pytest.mark.asyncio
+    async def test_reindex_empty_catalog_keeps_index(self, mock_azure):
+        """An empty catalog does not clear the index."""
+        service = self._service([])
+
+        result = await service.reindex_all_roles()
+
+        assert result["documents_indexed"] == 0
+        mock_azure.delete_all_documents.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_reindex_propagates_upload_errors(self, mock_azure):
+        """Upload failures abort the reindex."""
+        mock_azure.upload_documents.side_effect = Exception("Azure down")
+        service = self._service([[self._role(1)], [self._role(2)]])
+
+        with pytest.raises(Exception, match="Azure down"):
+            await service.reindex_all_roles()
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_stops_fetching(self, mock_azure):
+        """A failed upload cancels the fetcher even while the queue is full."""
+
+        async def upload(documents):
+            # Let the fetcher fill the queue and block on it first
+            for _ in range(5):
+                await asyncio.sleep(0)
+            raise Exception("Azure down")
+
+        mock_azure.upload_documents.side_effect = upload
+        service = self._service([[self._role(i)] for i in range(6)])
+
+        with pytest.raises(Exception, match="Azure down"):
+            await asyncio.wait_for(service.reindex_all_roles(), timeout=1)
+
+        pending = [
+            task
+            for task in asyncio.all_tasks()
+            if task is not asyncio.current_task() and not task.done()
+        ]
+        assert pending == []
@@ -212,16 +212,13 @@ class TestCommunicationService:
             return_value={"id": user_id, "onboarding_status": "personalisation"}
         )
         
+        # Mock selection count check
+        mock_repositories['comm_repo'].count_user_selected_partners = AsyncMock(
+            return_value=1
+        )
+        
         # Test the service
         service = CommunicationService(mock_db)
-        # Need to mock the service's internal method
-        service.get_user_selections_summary = AsyncMock(
-            return_value={
-                "total_partners_selected": 1,
-                "total_situations_selected": 1,
-                "selections": []
-            }
-        )
         
         result = await service.complete_part_2(auth0_id)
         
@@ -229,6 +226,11 @@ class TestCommunicationService:
         assert result["success"] == True
         assert result["next_step"] == "part_3"
         
+        # Selections were saved by an earlier request, so count on the primary
+        mock_repositories['comm_repo'].count_user_selected_partners.assert_awaited_once_with(
+            user_id, primary=True
+        )
+        
         # Verify status update
         mock_repositories['profile_repo'].update.assert_called_once()
         update_args = mock_repositories['profile_repo'].update.call_args[0]
@@ -247,17 +249,14 @@ class TestCommunicationService:
             return_value={"id": user_id}
         )
         
-        # Test the service
-        service = CommunicationService(mock_db)
         # Mock empty selections
-        service.get_user_selections_summary = AsyncMock(
-            return_value={
-                "total_partners_selected": 0,
-                "total_situations_selected": 0,
-                "selections": []
-            }
+        mock_repositories['comm_repo'].count_user_selected_partners = AsyncMock(
+            return_value=0
         )
         
+        # Test the service
+        service = CommunicationService(mock_db)
+        
         # Should raise error
         with pytest.raises(ValueError) as exc_info:
             await service.complete_part_2(auth0_id)
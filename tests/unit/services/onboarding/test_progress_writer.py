@@ -0,0 +1,368 @@
+import pytest
+from unittest.mock import Mock, AsyncMock, patch
+from src.core.codec import cache_codec
+from src.core.config import settings
+from src.services.onboarding.onboarding_progress_service import OnboardingProgressService
+from src.services.onboarding.progress_writer import ProgressWriteBehind
+
+
+def _entry(entry_id, user_id, step):
+    progress = {"user_id": user_id, "current_step": step, "data": {}, "completed": False}
+    return (
+        entry_id.encode(),
+        {b"user_id": user_id.encode(), b"progress": cache_codec.encode(progress)},
+    )
+
+
+def _index(client, *entries):
+    """Index ``entries`` under their user, as enqueue does."""
+    client.smembers.return_value = {entry_id for entry_id, _ in entries}
+    # Looked up one id at a time, oldest first
+    client.pipeline.return_value.execute.return_value = [
+        [entry] for entry in sorted(entries)
+    ]
+
+
+class TestProgressWriteBehind:
+    """Test write-behind flushing of onboarding progress."""
+
+    @pytest.fixture
+    def mock_redis(self):
+        """Mock Redis client holding a pending stream."""
+        client = AsyncMock()
+        client.xautoclaim.return_value = ["0-0", [], []]
+        client.xlen.return_value = 0
+        client.register_script = Mock(return_value=AsyncMock(return_value=b"1-0"))
+        client.pipeline = Mock(return_value=Mock(execute=AsyncMock(return_value=[])))
+        client.xreadgroup.return_value = [
+            [
+                "stream",
+                [
+                    _entry("1000-0", "user-1", "native_language"),
+                    _entry("1001-0", "user-2", "native_language"),
+                    _entry("1002-0", "user-1", "industry_selection"),
+                ],
+            ]
+        ]
+        with patch("src.services.onboarding.progress_writer.onboarding_redis") as redis:
+            redis.redis_client = client
+            redis.get_many_progress = AsyncMock(return_value=[None, None])
+            client.cache = redis  # For tests that change the cached progress
+            yield client
+
+    @pytest.fixture
+    def mock_repo(self):
+        """Mock progress repository."""
+        with patch(
+            "src.services.onboarding.progress_writer.OnboardingProgressRepository"
+        ) as repo_class:
+            repo = repo_class.return_value
+            repo.merge_progress = AsyncMock(return_value=[])
+            yield repo
+
+    @pytest.mark.asyncio
+    async def test_flush_coalesces_updates_per_user(self, mock_redis, mock_repo):
+        """Several updates for one user become a single merge of the newest."""
+        writer = ProgressWriteBehind("stream", "group")
+
+        flushed = await writer.flush(Mock())
+
+        assert flushed == 2
+        rows, step_order = mock_repo.merge_progress.call_args[0]
+        assert step_order == OnboardingProgressService.STEP_ORDER
+        assert {r["user_id"]: r["current_step"] for r in rows} == {
+            "user-1": "industry_selection",
+            "user-2": "native_language",
+        }
+        mock_redis.xack.assert_awaited_once_with(
+            "stream", "group", "1000-0", "1001-0", "1002-0"
+        )
+        unindex = mock_redis.pipeline.return_value
+        unindex.srem.assert_any_call("stream:pending:user-1", "1000-0", "1002-0")
+        unindex.srem.assert_any_call("stream:pending:user-2", "1001-0")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_leaves_entries_pending(self, mock_redis, mock_repo):
+        """Entries are only acknowledged once the merge succeeded."""
+        mock_repo.merge_progress.side_effect = Exception("timeout")
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush(Mock()) == 0
+        mock_redis.xack.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_flush_falls_back_to_stream_payloads(self, mock_redis, mock_repo):
+        """A failing progress cache does not stop the flush."""
+        mock_redis.cache.get_many_progress.side_effect = Exception("down")
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush(Mock()) == 2
+        mock_redis.xack.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_flush_racing_reset_sends_pre_reset_version(
+        self, mock_redis, mock_repo
+    ):
+        """State read before a reset is merged with its old reset_version.
+
+        The flusher reads the cached rows, then an admin reset writes the
+        database and cache before the merge runs. The merge must receive the
+        version the rows were read at, so it skips them instead of putting
+        the old progress back.
+        """
+        cache = {
+            "user-1": {"current_step": "summary", "data": {}, "reset_version": 0},
+            "user-2": {"current_step": "summary", "data": {}, "reset_version": 3},
+        }
+
+        async def read_then_reset(user_ids):
+            snapshot = [dict(cache[user_id]) for user_id in user_ids]
+            # The reset lands between the flusher's read and its merge
+            cache["user-1"] = {
+                "current_step": "not_started",
+                "data": {},
+                "reset_version": 1,
+            }
+            return snapshot
+
+        mock_redis.cache.get_many_progress.side_effect = read_then_reset
+        writer = ProgressWriteBehind("stream", "group")
+
+        await writer.flush(Mock())
+
+        rows = mock_repo.merge_progress.call_args[0][0]
+        assert {r["user_id"]: r["reset_version"] for r in rows} == {
+            "user-1": 0,
+            "user-2": 3,
+        }
+
+    @pytest.mark.asyncio
+    async def test_stream_payload_keeps_reset_version(self, mock_redis, mock_repo):
+        """An expired cache entry falls back to the version in the payload."""
+        progress = {"user_id": "user-1", "current_step": "summary", "reset_version": 0}
+        mock_redis.xreadgroup.return_value = [
+            [
+                "stream",
+                [
+                    (
+                        b"1000-0",
+                        {b"user_id": b"user-1", b"progress": cache_codec.encode(progress)},
+                    )
+                ],
+            ]
+        ]
+        mock_redis.cache.get_many_progress.return_value = [None]
+        writer = ProgressWriteBehind("stream", "group")
+
+        await writer.flush(Mock())
+
+        assert mock_repo.merge_progress.call_args[0][0][0]["reset_version"] == 0
+
+    @pytest.mark.asyncio
+    async def test_enqueue_does_not_trim_stream(self, mock_redis):
+        """Unflushed entries are never dropped to cap the stream."""
+        pipe = Mock(execute=AsyncMock(return_value=[1, b"1-0"]))
+        mock_redis.pipeline = Mock(return_value=pipe)
+        mock_redis.cache.update_progress = AsyncMock()
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.enqueue("user-1", {"current_step": "native_language"})
+        pipe.xadd.assert_not_called()
+        append = mock_redis.register_script.return_value
+        assert append.call_args.kwargs["keys"] == ["stream", "stream:pending:user-1"]
+        assert append.call_args.kwargs["client"] is pipe
+
+    @pytest.mark.asyncio
+    async def test_enqueue_returns_step_kept_by_cache(self, mock_redis):
+        """A stale snapshot's step never moves the cached step backwards."""
+        pipe = Mock(
+            execute=AsyncMock(
+                return_value=[cache_codec.encode("situation_selection"), b"1-0"]
+            )
+        )
+        mock_redis.pipeline = Mock(return_value=pipe)
+        mock_redis.cache.update_progress = AsyncMock()
+        writer = ProgressWriteBehind("stream", "group")
+
+        progress = await writer.enqueue(
+            "user-1",
+            {"current_step": "communication_partners", "completed": False},
+            "select_communication_partners",
+            step_order=OnboardingProgressService.STEP_ORDER,
+        )
+
+        assert progress["current_step"] == "situation_selection"
+        changes = mock_redis.cache.update_progress.call_args[0][1]
+        assert changes == {"current_step": "communication_partners"}
+        assert (
+            mock_redis.cache.update_progress.call_args.kwargs["step_order"]
+            == OnboardingProgressService.STEP_ORDER
+        )
+
+    @pytest.mark.asyncio
+    async def test_backlog_is_reported(self, mock_redis, mock_repo):
+        mock_redis.xlen.return_value = 10
+        writer = ProgressWriteBehind("stream", "group")
+
+        with patch.object(settings, "PROGRESS_STREAM_ALERT_LENGTH", 5), patch(
+            "src.services.onboarding.progress_writer.logger"
+        ) as logger:
+            await writer.flush(Mock())
+
+        assert "backlog of 10" in logger.warning.call_args[0][0]
+
+    @pytest.mark.asyncio
+    async def test_flush_user_writes_and_deletes_own_entries(
+        self, mock_redis, mock_repo
+    ):
+        """Only the user's entries are merged, then removed from the stream."""
+        _index(
+            mock_redis,
+            _entry("1002-0", "user-1", "industry_selection"),
+            _entry("1000-0", "user-1", "native_language"),
+        )
+        mock_redis.cache.get_many_progress.return_value = [
+            {"current_step": "summary", "data": {"a": 1}, "completed": False}
+        ]
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush_user(Mock(), "user-1") == 1
+        mock_repo.merge_progress.assert_awaited_once_with(
+            [
+                {
+                    "user_id": "user-1",
+                    "current_step": "summary",
+                    "data": {"a": 1},
+                    "completed": False,
+                    "reset_version": None,
+                }
+            ],
+            OnboardingProgressService.STEP_ORDER,
+        )
+        mock_redis.xack.assert_awaited_once_with("stream", "group", "1000-0", "1002-0")
+        mock_redis.xdel.assert_awaited_once_with("stream", "1000-0", "1002-0")
+        mock_redis.srem.assert_awaited_once_with(
+            "stream:pending:user-1", "1000-0", "1002-0"
+        )
+        mock_redis.smembers.assert_awaited_once_with("stream:pending:user-1")
+        mock_redis.xrange.assert_not_awaited()
+        mock_redis.xreadgroup.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_flush_user_drops_already_flushed_ids(self, mock_redis, mock_repo):
+        """Ids the flusher already deleted are removed from the index."""
+        _index(mock_redis, _entry("1002-0", "user-1", "summary"))
+        mock_redis.smembers.return_value = {b"1000-0", b"1002-0"}
+        mock_redis.pipeline.return_value.execute.return_value = [
+            [],
+            [_entry("1002-0", "user-1", "summary")],
+        ]
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush_user(Mock(), "user-1") == 1
+        mock_redis.srem.assert_any_await("stream:pending:user-1", "1000-0")
+        mock_redis.xdel.assert_awaited_once_with("stream", "1002-0")
+
+    @pytest.mark.asyncio
+    async def test_flush_user_without_cache_uses_own_payload(
+        self, mock_redis, mock_repo
+    ):
+        """A cache miss falls back to the user's newest entry, not a full flush."""
+        _index(
+            mock_redis,
+            _entry("1002-0", "user-1", "industry_selection"),
+            _entry("1000-0", "user-1", "native_language"),
+        )
+        mock_redis.cache.get_many_progress.return_value = [None]
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush_user(Mock(), "user-1") == 1
+        rows = mock_repo.merge_progress.call_args[0][0]
+        assert rows[0]["current_step"] == "industry_selection"
+        mock_redis.xreadgroup.assert_not_awaited()
+        mock_redis.xack.assert_awaited_once_with("stream", "group", "1000-0", "1002-0")
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_user_keeps_entries(self, mock_redis, mock_repo):
+        _index(mock_redis, _entry("1000-0", "user-1", "summary"))
+        mock_repo.merge_progress.side_effect = Exception("timeout")
+        writer = ProgressWriteBehind("stream", "group")
+
+        assert await writer.flush_user(Mock(), "user-1") == 0
+        mock_redis.xack.assert_not_awaited()
+        mock_redis.xdel.assert_not_awaited()
+
+
+class TestWriteBehindProgressService:
+    """Test OnboardingProgressService in write-behind mode."""
+
+    @pytest.fixture
+    def service(self):
+        with patch(
+            "src.services.onboarding.onboarding_progress_service.progress_writer"
+        ) as writer, patch(
+            "src.services.onboarding.onboarding_progress_service.progress_cache"
+        ) as cache:
+            writer.enabled = True
+            writer.enqueue = AsyncMock(
+                side_effect=lambda user_id, progress, *a, **k: progress
+            )
+            writer.flush = AsyncMock(return_value=0)
+            writer.flush_user = AsyncMock(return_value=1)
+            cache.get_progress = AsyncMock(
+                return_value={
+                    "user_id": "user-1",
+                    "current_step": "native_language",
+                    "data": {},
+                    "completed": False,
+                }
+            )
+            cache.update_progress = AsyncMock(return_value=True)
+            cache.changed = AsyncMock()
+            service = OnboardingProgressService(Mock())
+            service.profile_repo.get_user_by_auth0_id = AsyncMock(
+                return_value={"id": "user-1"}
+            )
+            service.progress_repo.apply_action = AsyncMock(
+                return_value={"user_id": "user-1", "current_step": "completed"}
+            )
+            service.writer = writer
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_action_is_enqueued_without_db_write(self, service):
+        """Intermediate steps skip the synchronous upsert."""
+        progress = await service.update_progress_on_action("auth0|abc", "set_industry")
+
+        assert progress["current_step"] == "industry_selection"
+        service.writer.enqueue.assert_awaited_once()
+        service.progress_repo.apply_action.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_completion_is_written_through(self, service):
+        """Completing onboarding flushes the user's pending updates first."""
+        await service.update_progress_on_action("auth0|abc", "complete_onboarding")
+
+        service.writer.enqueue.assert_not_awaited()
+        service.writer.flush_user.assert_awaited_once_with(service.db, "user-1")
+        service.writer.flush.assert_not_awaited()
+        service.progress_repo.apply_action.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_reset_bumps_version_and_overwrites_cache(self, service):
+        """A reset goes through the versioned RPC and replaces the cached row."""
+        reset = {"user_id": "user-1", "current_step": "not_started", "reset_version": 1}
+        service.progress_repo.reset_progress = AsyncMock(return_value=reset)
+        service.progress_repo.upsert_progress = AsyncMock()
+        with patch(
+            "src.services.onboarding.onboarding_progress_service.progress_cache"
+        ) as cache:
+            cache.set_progress = AsyncMock()
+
+            assert await service.reset_progress("auth0|abc") == reset
+
+        service.progress_repo.reset_progress.assert_awaited_once_with(
+            "user-1", "not_started"
+        )
+        service.progress_repo.upsert_progress.assert_not_awaited()
+        cache.set_progress.assert_awaited_once_with("user-1", reset)
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import Mock, AsyncMock, patch
+from src.main import app
+from src.services.warmup import WarmUp, warmup
+
+
+class TestWarmUp:
+    """Test the startup warm-up and readiness gating."""
+
+    @pytest.fixture
+    def steps(self):
+        """Mock every dependency touched by warm-up."""
+        with patch("src.services.warmup.refresh_reference_data") as refresh, patch(
+            "src.services.warmup.auth0_validator"
+        ) as auth0, patch("src.services.warmup.azure_search_client") as azure, patch(
+            "src.services.warmup.openai_client"
+        ) as openai, patch(
+            "src.services.warmup.get_redis"
+        ) as get_redis:
+            refresh.side_effect = AsyncMock(return_value={})
+            auth0.get_jwks = AsyncMock(return_value={"keys": []})
+            azure.warm_up = AsyncMock(return_value=42)
+            openai.warm_up = AsyncMock()
+            get_redis.return_value.ping = AsyncMock(return_value=True)
+            yield {"azure": azure, "openai": openai, "redis": get_redis.return_value}
+
+    @pytest.fixture
+    def db(self):
+        db = Mock()
+        db.table.return_value.select.return_value.limit.return_value.execute = (
+            AsyncMock()
+        )
+        return db
+
+    @pytest.mark.asyncio
+    async def test_ready_after_all_steps(self, steps, db):
+        """Each dependency is touched once and the instance becomes ready."""
+        warm = WarmUp()
+
+        results = await warm.run(db)
+
+        assert warm.ready
+        assert set(results.values()) == {"ok"}
+        steps["azure"].warm_up.assert_awaited_once()
+        steps["openai"].warm_up.assert_awaited_once()
+        assert steps["redis"].ping.await_count >= 1
+
+    @pytest.mark.asyncio
+    async def test_failing_step_does_not_block_readiness(self, steps, db):
+        """A dependency that is down is reported, not waited on forever."""
+        steps["openai"].warm_up.side_effect = Exception("unreachable")
+
+        async def hang():
+            await asyncio.sleep(60)
+
+        steps["azure"].warm_up.side_effect = hang
+        warm = WarmUp()
+
+        with patch("src.services.warmup.settings") as settings:
+            settings.WARMUP_TIMEOUT = 0.05
+            settings.WARMUP_REDIS_CONNECTIONS = 2
+            results = await warm.run(db)
+
+        assert warm.ready
+        assert results["openai"] == "failed"
+        assert results["azure_search"] == "timeout"
+        assert results["supabase"] == "ok"
+
+
+class TestReadinessEndpoint:
+    """Test /ready as seen by the load balancer."""
+
+    @pytest.fixture
+    def client(self):
+        # No lifespan: the warm-up state is set by the test
+        yield TestClient(app)
+        warmup.mark_ready()
+
+    def test_not_ready_while_warming_up(self, client):
+        warmup.reset()
+
+        response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+
+    def test_ready_after_warm_up(self, client):
+        warmup.reset()
+        warmup.results = {"supabase": "ok"}
+        warmup.mark_ready()
+
+        response = client.get("/ready")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready", "warmup": {"supabase": "ok"}}